@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+import botxi
+
+def synthetic_candles(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='h'),
+        'open': np.r_[close[0], close[:-1]],
+        'high': close * (1 + np.abs(rng.normal(0, 0.005, rows))),
+        'low': close * (1 - np.abs(rng.normal(0, 0.005, rows))),
+        'close': close,
+        'volume': rng.gamma(2.0, 50.0, rows)
+    })
+
+def benchmark_model(data):
+    model = RandomForestRegressor(n_estimators=200, max_depth=20, random_state=42, n_jobs=1)
+    X = data[['open', 'high', 'low', 'close', 'volume']].iloc[:-1]
+    model.fit(X, data['close'].shift(-1).iloc[:-1])
+    return model
+
+def timings(samples):
+    samples = np.asarray(samples, dtype=np.float64) * 1e6
+    if not len(samples):
+        return {'calls': 0}
+    return {
+        'calls': len(samples),
+        'mean_us': float(samples.mean()),
+        'p50_us': float(np.percentile(samples, 50)),
+        'p99_us': float(np.percentile(samples, 99)),
+        'max_us': float(samples.max())
+    }
+
+def histogram_timings(name, exchange_ids, methods=None):
+    buckets, counts, total, calls = None, None, 0.0, 0
+    for labels, entry in botxi.metrics.histograms.get(name, {}).items():
+        labels = dict(labels)
+        if labels.get('exchange') in exchange_ids and (methods is None or labels.get('method') in methods):
+            buckets = entry[0]
+            counts = entry[1] if counts is None else [a + b for a, b in zip(counts, entry[1])]
+            total += entry[2]
+            calls += entry[3]
+    if not calls:
+        return {'calls': 0}
+    result = {'calls': calls, 'mean_us': total / calls * 1e6}
+    for label, quantile in (('p50_us', 0.5), ('p99_us', 0.99)):
+        seen = 0
+        for bound, count in zip(buckets, counts):
+            seen += count
+            if seen >= quantile * calls:
+                result[label] = bound * 1e6
+                break
+    return result
+
+def histogram_counts(name, exchange_ids):
+    return Counter({
+        (dict(labels)['exchange'], dict(labels)['symbol']): entry[3] for labels, entry in botxi.metrics.histograms.get(name, {}).items()
+        if dict(labels).get('exchange') in exchange_ids
+    })
+
+def benchmark_config(args):
+    symbols = [f"SIM{i:04d}/USDT" for i in range(max(args.symbols, 100))]
+    simulation = {'latency': args.latency, 'tick_interval': args.tick_interval, 'symbol_count': args.symbols, 'seed': 42}
+    exchanges = {
+        f"sim{i}": {'name': 'simulated', 'active': True, 'symbols': symbols[:args.symbols], 'simulation': simulation,
+                    'poll_interval': args.poll_interval, 'streaming': args.streaming}
+        for i in range(args.exchanges)
+    }
+    exchanges['bench'] = {'name': 'simulated', 'active': False, 'symbols': symbols[:100]}
+    return {
+        'exchanges': exchanges,
+        'symbols': [
+            {'symbol': symbol, 'spread': 0.002, 'take_profit': 0.005, 'trade_amount': 1.0, 'max_orders': 3,
+             'order_timeout': 60, 'max_daily_loss': 1000}
+            for symbol in symbols
+        ],
+        'order_buffer_size': max(50, args.orders // 100 + 1),
+        'model_registry': {'directory': 'models', 'cache_size': args.exchanges * args.symbols + 1}
+    }
+
+def measure(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return timings(samples)
+
+class TreeStandIn:
+    def __init__(self):
+        self.rows = {}
+
+    def insert(self, parent, index, iid, values, tags):
+        self.rows[iid] = (values, tags)
+
+    def item(self, iid, values, tags):
+        self.rows[iid] = (values, tags)
+
+    def delete(self, iid):
+        del self.rows[iid]
+
+def benchmark_predict(model, repeat):
+    return measure(lambda: botxi.predict_next_price(model, 'SIM0000/USDT', 'bench', 100.0, 101.0, 99.0, 100.5, 10.0), repeat)
+
+def benchmark_daily_loss(repeat, fills=5000):
+    for i in range(fills):
+        botxi.trade_ledger.record_fill('bench', 'SIM0000/USDT', 'buy' if i % 2 == 0 else 'sell', 1.0, 100.0 + (i % 7), f"bench-{i}")
+    return measure(lambda: botxi.calculate_daily_loss('SIM0000/USDT', 'bench'), repeat)
+
+def benchmark_orders_tab(repeat, order_count):
+    gui = botxi.BotGUI.__new__(botxi.BotGUI)
+    gui.orders_tree = TreeStandIn()
+    gui.order_rows = {}
+    gui.update_intervals = {'orders': 1000}
+    gui.last_age_refresh = time.time()
+    now = int(time.time() * 1000)
+    for i in range(order_count):
+        botxi.open_orders['bench'][f"SIM{i % 100:04d}/USDT"].append({
+            'id': str(i), 'symbol': f"SIM{i % 100:04d}/USDT", 'side': 'buy', 'amount': 1.0,
+            'price': 100.0, 'status': 'open', 'timestamp': now
+        })
+    try:
+        first = measure(gui.update_orders_tab, 1)
+        steady = measure(gui.update_orders_tab, repeat)
+    finally:
+        for orders in botxi.open_orders['bench'].values():
+            orders.clear()
+    return {'first_render': first, 'unchanged': steady, 'orders': order_count}
+
+def benchmark_journal(repeat):
+    trade = {'timestamp': '2024-01-01T00:00:00', 'exchange': 'bench', 'symbol': 'SIM0000/USDT',
+             'side': 'buy', 'amount': 1.0, 'price': 100.0, 'order_id': '1'}
+    enqueue = measure(lambda: botxi.save_trade_to_csv(trade, 'bench'), repeat)
+    started = time.perf_counter()
+    botxi.get_trade_journal().close()
+    return {'enqueue': enqueue, 'drain_seconds': time.perf_counter() - started}
+
+def benchmark_train(data):
+    started = time.perf_counter()
+    botxi.train_model(data, 'SIM0000/USDT', 'bench')
+    return {'seconds': time.perf_counter() - started, 'rows': len(data)}
+
+def resident_memory():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+async def sample_loop_lag(interval, samples, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - started - interval)
+
+def register_loop_model(model, exchange_ids, symbols):
+    path = os.path.abspath('loop_model.pkl')
+    joblib.dump(model, path)
+    registry = botxi.get_model_registry()
+    for exchange_id in exchange_ids:
+        for symbol in symbols:
+            registry.cache_put(registry.import_legacy(exchange_id, symbol, path), model)
+
+async def benchmark_trading_loop(args, model):
+    exchange_ids = [f"sim{i}" for i in range(args.exchanges)]
+    symbols = [f"SIM{i:04d}/USDT" for i in range(args.symbols)]
+    register_loop_model(model, exchange_ids, symbols)
+    memory_before = resident_memory()
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(sample_loop_lag(args.lag_interval, lag_samples, stop))
+    engine = botxi.TradingEngine()
+    started = time.perf_counter()
+    engine.start_bot(exchange_ids)
+    await asyncio.sleep(args.duration)
+    elapsed = time.perf_counter() - started
+    memory_after = resident_memory()
+    stop.set()
+    await lag_task
+    await engine.stop_bot()
+    await botxi.shutdown_bot()
+    calls = Counter()
+    for labels, count in botxi.metrics.counters.get('botxi_exchange_requests_total', {}).items():
+        labels = dict(labels)
+        if labels['exchange'] in exchange_ids:
+            calls[labels['method']] += count
+    iterations = histogram_counts('botxi_symbol_loop_seconds', exchange_ids)
+    symbol_tasks = args.exchanges * args.symbols
+    per_symbol = np.array([iterations[(exchange_id, symbol)] for exchange_id in exchange_ids for symbol in symbols], dtype=np.float64)
+    return {
+        'exchanges': args.exchanges,
+        'symbols_per_exchange': args.symbols,
+        'duration_seconds': elapsed,
+        'loop_iterations_per_second_per_symbol': {
+            'mean': float(per_symbol.mean() / elapsed),
+            'min': float(per_symbol.min() / elapsed)
+        },
+        'api_calls_per_symbol_per_minute': sum(calls.values()) / symbol_tasks / (elapsed / 60),
+        'api_calls': dict(calls),
+        'tick_to_order_latency': histogram_timings('botxi_tick_to_order_seconds', exchange_ids),
+        'symbol_loop_latency': histogram_timings('botxi_symbol_loop_seconds', exchange_ids),
+        'order_request_latency': histogram_timings('botxi_exchange_request_seconds', exchange_ids, ('create_order', 'create_orders')),
+        'event_loop_lag': timings(lag_samples),
+        'memory_bytes_per_symbol': (memory_after - memory_before) / symbol_tasks
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(results, prefix=''):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value
+
+def compare(previous, current):
+    before = dict(flatten(previous['results']))
+    for key, value in flatten(current['results']):
+        if key in before and before[key]:
+            print(f"{key:70s} {before[key]:14.3f} -> {value:14.3f} ({(value - before[key]) / before[key] * 100:+.1f}%)")
+
+async def run(args):
+    results = {}
+    data = synthetic_candles(args.rows)
+    model = benchmark_model(data)
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            botxi.apply_config_settings(benchmark_config(args))
+            botxi.initialize_structures()
+            results['predict_next_price'] = benchmark_predict(model, args.repeat)
+            results['calculate_daily_loss'] = benchmark_daily_loss(args.repeat)
+            results['update_orders_tab'] = benchmark_orders_tab(args.repeat, args.orders)
+            results['save_trade_to_csv'] = benchmark_journal(args.repeat)
+            if not args.skip_train:
+                results['train_model'] = benchmark_train(data)
+            if args.duration > 0:
+                results['trading_loop'] = await benchmark_trading_loop(args, model)
+        finally:
+            os.chdir(working_directory)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles del bucle de trading de BOTXI")
+    parser.add_argument('--exchanges', type=int, default=1, help="cuentas simuladas")
+    parser.add_argument('--symbols', type=int, default=100, help="símbolos por cuenta")
+    parser.add_argument('--duration', type=float, default=30, help="segundos del benchmark de extremo a extremo (0 lo omite)")
+    parser.add_argument('--latency', type=float, default=0.02, help="latencia simulada por petición en segundos")
+    parser.add_argument('--tick-interval', type=float, default=0.5, help="segundos entre ticks del mercado simulado")
+    parser.add_argument('--poll-interval', type=float, default=1, help="poll_interval de las cuentas simuladas")
+    parser.add_argument('--streaming', action='store_true', help="usar los streams watch_* del exchange simulado")
+    parser.add_argument('--lag-interval', type=float, default=0.05, help="periodo de muestreo del retraso del bucle de eventos")
+    parser.add_argument('--repeat', type=int, default=1000, help="repeticiones de cada micro-benchmark")
+    parser.add_argument('--orders', type=int, default=1000, help="órdenes abiertas para update_orders_tab")
+    parser.add_argument('--rows', type=int, default=1000, help="velas sintéticas para entrenar y predecir")
+    parser.add_argument('--skip-train', action='store_true', help="omitir el benchmark de train_model")
+    parser.add_argument('--output', default='benchmark_results.json', help="archivo JSON de resultados")
+    parser.add_argument('--compare', metavar='JSON', help="resultados anteriores con los que comparar")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+    results = asyncio.run(run(args))
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': vars(args),
+        'results': results
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+
+if __name__ == "__main__":
+    main()
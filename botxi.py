@@ -1,37 +1,160 @@
 import ccxt
 import ccxt.async_support as ccxt_async
+try:
+    import ccxt.pro as ccxt_pro
+except ImportError:
+    ccxt_pro = None
 import time
 import logging
-import pandas as pd
-import joblib
+import logging.handlers
+import atexit
+import numpy as np
 import asyncio
 import csv
+import queue
+import sqlite3
 import os
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import json
-import tkinter as tk
-from tkinter import simpledialog, messagebox
-from tkinter import ttk
-from ttkbootstrap import Style
-from ttkbootstrap.constants import *
+import copy
+import importlib
+import sys
+import traceback
+import argparse
+import signal
+import urllib.parse
 from collections import deque
 from cryptography.fernet import Fernet, InvalidToken
 from functools import lru_cache
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
-from sklearn.ensemble import RandomForestRegressor
-from scipy.stats import randint
-
-logging.basicConfig(
-    level=logging.WARN,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("bot.log"),
-        logging.StreamHandler()
-    ]
-)
-
-encryption_key = Fernet.generate_key()
-cipher_suite = Fernet(encryption_key)
+from collections import OrderedDict
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import heapq
+import contextvars
+import bisect
+import multiprocessing
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class LogRateLimiter(logging.Filter):
+    def __init__(self, tick_interval=60, duplicate_interval=10, max_keys=10000):
+        super().__init__()
+        self.tick_interval = tick_interval
+        self.duplicate_interval = duplicate_interval
+        self.max_keys = max_keys
+        self.last = {}
+        self.suppressed = {}
+
+    def filter(self, record):
+        if record.name == 'botxi.tick':
+            interval = self.tick_interval
+            key = (record.name, record.lineno, record.args[:2] if isinstance(record.args, tuple) else None)
+        elif record.levelno >= logging.WARNING:
+            interval = self.duplicate_interval
+            key = (record.name, record.lineno, record.getMessage())
+        else:
+            return True
+        now = time.monotonic()
+        if now - self.last.get(key, -interval) < interval:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+        if len(self.last) >= self.max_keys:
+            horizon = now - max(self.tick_interval, self.duplicate_interval)
+            self.last = {key: seen for key, seen in self.last.items() if seen >= horizon}
+            self.suppressed = {key: count for key, count in self.suppressed.items() if key in self.last}
+        self.last[key] = now
+        suppressed = self.suppressed.pop(key, 0)
+        if suppressed and record.args:
+            record.msg = f"{record.msg} (%d mensajes similares suprimidos)"
+            record.args = tuple(record.args) + (suppressed,)
+        elif suppressed:
+            record.msg = f"{record.msg} ({suppressed} mensajes similares suprimidos)"
+        return True
+
+log_queue = queue.Queue()
+log_listener = None
+
+def configure_logging(settings=None):
+    global log_listener
+    settings = settings or {}
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [logging.FileHandler(settings.get('file', 'bot.log')), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    if log_listener is not None:
+        log_listener.stop()
+        for handler in log_listener.handlers:
+            handler.close()
+    log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log_listener.start()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(LogRateLimiter(settings.get('tick_interval', 60), settings.get('duplicate_interval', 10)))
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(settings.get('level', 'WARNING'))
+    for name, level in settings.get('levels', {}).items():
+        logging.getLogger(name).setLevel(level)
+
+def stop_logging():
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
+atexit.register(stop_logging)
+
+engine_logger = logging.getLogger('botxi.engine')
+tick_logger = logging.getLogger('botxi.tick')
+config_logger = logging.getLogger('botxi.config')
+gui_logger = logging.getLogger('botxi.gui')
+api_logger = logging.getLogger('botxi.api')
+exchange_logger = logging.getLogger('botxi.exchange')
+market_logger = logging.getLogger('botxi.market')
+orders_logger = logging.getLogger('botxi.orders')
+model_logger = logging.getLogger('botxi.model')
+ledger_logger = logging.getLogger('botxi.ledger')
+journal_logger = logging.getLogger('botxi.journal')
+state_logger = logging.getLogger('botxi.state')
+monitor_logger = logging.getLogger('botxi.monitor')
+backtest_logger = logging.getLogger('botxi.backtest')
+
+tk = None
+ttk = None
+simpledialog = None
+messagebox = None
+Style = None
+
+class LazyModule:
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attr):
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+        return getattr(self.module, attr)
+
+pd = LazyModule('pandas')
+joblib = LazyModule('joblib')
+
+def preload_modules():
+    for name in ('pandas', 'joblib', 'sklearn.ensemble'):
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            model_logger.error("No se pudo importar %s: %s", name, e)
+
+def load_gui_modules():
+    global tk, ttk, simpledialog, messagebox, Style
+    import tkinter as tk
+    from tkinter import simpledialog, messagebox, ttk
+    from ttkbootstrap import Style
+
+cipher_suite = None
 
 encrypted_config_file = 'config.enc'
 
@@ -39,7 +162,10 @@ exchanges_config = {}
 symbols_config = []
 csv_filename_template = 'trades.csv'
 commission_rate = 0.001
-rate_limiter = asyncio.Semaphore(600)
+request_priorities = {'cancel': 0, 'order': 1, 'status': 2, 'market_data': 3}
+request_schedulers = {}
+symbol_scoped_open_orders = set()
+reconnect_config_keys = ('name', 'api_key', 'secret', 'password', 'streaming', 'simulation')
 
 exchanges = {}
 connection_status = {}
@@ -54,6 +180,33 @@ profit_loss = {}
 active_symbols = {}
 reactivation_thresholds = {}
 exchange_running_status = {}
+market_data_hubs = {}
+order_reconcilers = {}
+candle_stores = {}
+models = {}
+compiled_forests = weakref.WeakKeyDictionary()
+training_service = None
+training_workers = 1
+retrain_interval = 7 * 24 * 60 * 60
+default_feature_set = 'ohlcv'
+model_registry = None
+model_registry_settings = {}
+control_api_settings = {}
+trade_journal = None
+trade_sink = None
+journal_settings = {}
+state_store = None
+state_settings = {}
+loop_monitor = None
+task_profiler = None
+monitoring_settings = {}
+logging_settings = {}
+order_buffer_size = 50
+trade_history_size = 500
+symbol_settings = {}
+applied_config = None
+markets_cache_settings = {}
+sharding_settings = {}
 key_file = 'encryption_key.key'
 
 @lru_cache(maxsize=128)
@@ -64,12 +217,12 @@ def deactivate_token_if_needed(exchange_id, symbol):
     pending_sells_count = count_pending_sell_orders(exchange_id, symbol)
     if pending_sells_count >= 3:
         active_symbols[exchange_id][symbol] = False
-        logging.info(f"Trading detenido para {symbol} en {exchange_id} debido a {pending_sells_count} órdenes de venta pendientes.")
+        engine_logger.info("Trading detenido para %s en %s debido a %s órdenes de venta pendientes.", symbol, exchange_id, pending_sells_count)
 
 def reactivate_token_if_needed(exchange_id, symbol):
     if count_pending_sell_orders(exchange_id, symbol) < 4:
         active_symbols[exchange_id][symbol] = True
-        logging.info(f"Trading reactivado para {symbol} en {exchange_id}.")
+        engine_logger.info("Trading reactivado para %s en %s.", symbol, exchange_id)
 
 def get_active_symbols_and_exchanges():
     active_symbols_exchanges = {}
@@ -90,73 +243,582 @@ def load_encryption_key():
             key_file_obj.write(new_key)
         return new_key
 
-encryption_key = load_encryption_key()
-cipher_suite = Fernet(encryption_key)
+def get_cipher_suite():
+    global cipher_suite
+    if cipher_suite is None:
+        cipher_suite = Fernet(load_encryption_key())
+    return cipher_suite
 
-def load_encrypted_config():
-    global exchanges_config, symbols_config, csv_filename_template, commission_rate
-    try:
-        if not os.path.exists(encrypted_config_file):
-            raise FileNotFoundError("El archivo de configuración cifrado no fue encontrado.")
+def rotate_encryption_key():
+    global cipher_suite
+    config = read_encrypted_config() if os.path.exists(encrypted_config_file) else None
+    new_key = Fernet.generate_key()
+    new_cipher = Fernet(new_key)
+    if config is not None:
+        temp_file = f"{encrypted_config_file}.tmp"
+        with open(temp_file, 'wb') as enc_file:
+            enc_file.write(new_cipher.encrypt(json.dumps(config).encode()))
+        os.replace(temp_file, encrypted_config_file)
+    temp_file = f"{key_file}.tmp"
+    with open(temp_file, 'wb') as key_file_obj:
+        key_file_obj.write(new_key)
+    os.replace(temp_file, key_file)
+    cipher_suite = new_cipher
+    config_logger.warning("Clave de cifrado rotada%s.", " y configuración recifrada" if config is not None else "")
 
-        with open(encrypted_config_file, 'rb') as enc_file:
-            encrypted_data = enc_file.read()
+def read_encrypted_config():
+    if not os.path.exists(encrypted_config_file):
+        raise FileNotFoundError("El archivo de configuración cifrado no fue encontrado.")
+    with open(encrypted_config_file, 'rb') as enc_file:
+        encrypted_data = enc_file.read()
+    decrypted_data = get_cipher_suite().decrypt(encrypted_data)
+    return json.loads(decrypted_data.decode())
 
-        decrypted_data = cipher_suite.decrypt(encrypted_data)
-        config = json.loads(decrypted_data.decode())
+def apply_config_settings(config):
+    global exchanges_config, symbols_config, csv_filename_template, commission_rate, training_workers, model_registry_settings, control_api_settings, journal_settings, monitoring_settings, logging_settings, order_buffer_size, trade_history_size, markets_cache_settings, sharding_settings, state_settings
+    exchanges_config = config.get('exchanges', {})
+    symbols_config = config.get('symbols', [])
+    csv_filename_template = config.get('csv_filename', 'trades.csv')
+    commission_rate = config.get('commission_rate', 0.001)
+    training_workers = config.get('training_workers', 1)
+    model_registry_settings = config.get('model_registry', {})
+    control_api_settings = config.get('control_api', {})
+    journal_settings = config.get('journal', {})
+    monitoring_settings = config.get('monitoring', {})
+    logging_settings = config.get('logging', {})
+    order_buffer_size = config.get('order_buffer_size', 50)
+    trade_history_size = config.get('trade_history_size', 500)
+    markets_cache_settings = config.get('markets_cache', {})
+    sharding_settings = config.get('sharding', {})
+    state_settings = config.get('state', {})
+
+def migrate_config(config):
+    if config.get('daily_loss_unit') == 'quote':
+        return False
+    converted = 0
+    for symbol_config in config.get('symbols', []):
+        if symbol_config.get('max_daily_loss') is not None and symbol_config.get('trade_amount'):
+            symbol_config['max_daily_loss'] = symbol_config['max_daily_loss'] * symbol_config['trade_amount']
+            converted += 1
+    config['daily_loss_unit'] = 'quote'
+    config_logger.warning("max_daily_loss convertido de diferencia de precio por unidad a pérdida realizada en moneda cotizada (× trade_amount) en %s símbolos", converted)
+    return True
 
-        exchanges_config = config.get('exchanges', {})
-        symbols_config = config.get('symbols', [])
-        csv_filename_template = config.get('csv_filename', 'trades.csv')
-        commission_rate = config.get('commission_rate', 0.001)
+def load_encrypted_config():
+    global applied_config
+    try:
+        config = read_encrypted_config()
+        migrated = migrate_config(config)
+        apply_config_settings(config)
+        configure_logging(logging_settings)
 
         initialize_structures()
+        applied_config = config_snapshot()
+        if migrated:
+            save_encrypted_config()
 
     except FileNotFoundError as fnf_error:
-        logging.error(f"Archivo no encontrado: {fnf_error}")
+        config_logger.error("Archivo no encontrado: %s", fnf_error)
         save_encrypted_config()
     except (InvalidToken, ValueError) as decrypt_error:
-        logging.error(f"Error al descifrar la configuración cifrada: {decrypt_error}")
+        config_logger.error("Error al descifrar la configuración cifrada: %s", decrypt_error)
         raise decrypt_error
     except Exception as e:
-        logging.error(f"Error inesperado al cargar la configuración cifrada: {e}")
+        config_logger.error("Error inesperado al cargar la configuración cifrada: %s", e)
         raise e
 
+def config_snapshot():
+    return copy.deepcopy({
+        'daily_loss_unit': 'quote',
+        'exchanges': exchanges_config,
+        'symbols': symbols_config,
+        'csv_filename': csv_filename_template,
+        'commission_rate': commission_rate,
+        'training_workers': training_workers,
+        'model_registry': model_registry_settings,
+        'control_api': control_api_settings,
+        'journal': journal_settings,
+        'monitoring': monitoring_settings,
+        'logging': logging_settings,
+        'order_buffer_size': order_buffer_size,
+        'trade_history_size': trade_history_size,
+        'markets_cache': markets_cache_settings,
+        'sharding': sharding_settings,
+        'state': state_settings
+    })
+
 def save_encrypted_config():
     config = {
+        'daily_loss_unit': 'quote',
         'exchanges': exchanges_config,
         'symbols': symbols_config,
         'csv_filename': csv_filename_template,
-        'commission_rate': commission_rate
+        'commission_rate': commission_rate,
+        'training_workers': training_workers,
+        'model_registry': model_registry_settings,
+        'control_api': control_api_settings,
+        'journal': journal_settings,
+        'monitoring': monitoring_settings,
+        'logging': logging_settings,
+        'order_buffer_size': order_buffer_size,
+        'trade_history_size': trade_history_size,
+        'markets_cache': markets_cache_settings,
+        'sharding': sharding_settings,
+        'state': state_settings
     }
     try:
         data = json.dumps(config).encode()
-        encrypted_data = cipher_suite.encrypt(data)
+        encrypted_data = get_cipher_suite().encrypt(data)
         with open(encrypted_config_file, 'wb') as enc_file:
             enc_file.write(encrypted_data)
-        logging.info("Configuración guardada exitosamente en archivo cifrado.")
+        config_logger.info("Configuración guardada exitosamente en archivo cifrado.")
     except Exception as e:
-        logging.error(f"Error al guardar la configuración cifrada: {e}")
+        config_logger.error("Error al guardar la configuración cifrada: %s", e)
+
+def has_tracked_orders(exchange_id, symbol):
+    return bool(open_orders.get(exchange_id, {}).get(symbol)) or bool(pending_sells.get(exchange_id, {}).get(symbol))
+
+def resize_deque(orders, maxlen, tracked=False):
+    if orders.maxlen == maxlen:
+        return orders
+    if tracked and len(orders) > maxlen:
+        return orders
+    return deque(orders, maxlen=maxlen)
+
+def resize_order_books(exchange_id, symbol):
+    for book in (open_orders, pending_sells):
+        orders = book[exchange_id][symbol]
+        if orders.maxlen != order_buffer_size and len(orders) <= order_buffer_size:
+            book[exchange_id][symbol] = deque(orders, maxlen=order_buffer_size)
 
 def initialize_structures():
-    global connection_status, actions_log, daily_trades, market_prices, predicted_prices, open_orders, pending_sells, daily_losses, profit_loss, active_symbols, reactivation_thresholds, exchange_running_status
-    connection_status = {exchange_id: 'Disconnected' for exchange_id in exchanges_config.keys()}
+    global symbol_settings
+    symbol_settings = {symbol_config['symbol']: dict(symbol_config) for symbol_config in symbols_config}
+    books = (
+        (daily_trades, lambda: deque(maxlen=trade_history_size), trade_history_size, False),
+        (open_orders, lambda: deque(maxlen=order_buffer_size), order_buffer_size, True),
+        (pending_sells, lambda: deque(maxlen=order_buffer_size), order_buffer_size, True)
+    )
+    values = (market_prices, predicted_prices, daily_losses, profit_loss)
+    for exchange_id in set(open_orders) | set(pending_sells) | set(daily_trades):
+        exchange_data = exchanges_config.get(exchange_id)
+        exchange_symbols = set(exchange_data.get('symbols', [])) if exchange_data else set()
+        stale = [symbol for symbol in open_orders.get(exchange_id, {}) if symbol not in exchange_symbols and not has_tracked_orders(exchange_id, symbol)]
+        for symbol in stale:
+            for store in (daily_trades, open_orders, pending_sells, active_symbols, reactivation_thresholds) + values:
+                store.get(exchange_id, {}).pop(symbol, None)
+        if exchange_data is None and not any(has_tracked_orders(exchange_id, symbol) for symbol in open_orders.get(exchange_id, {})):
+            for store in (daily_trades, open_orders, pending_sells, active_symbols, reactivation_thresholds, connection_status, exchange_running_status) + values:
+                store.pop(exchange_id, None)
     for exchange_id, exchange_data in exchanges_config.items():
         exchange_symbols = exchange_data.get('symbols', [])
-        daily_trades[exchange_id] = {symbol: deque(maxlen=500) for symbol in exchange_symbols}
-        market_prices[exchange_id] = {symbol: 0 for symbol in exchange_symbols}
-        predicted_prices[exchange_id] = {symbol: 0 for symbol in exchange_symbols}
-        open_orders[exchange_id] = {symbol: deque(maxlen=50) for symbol in exchange_symbols}
-        pending_sells[exchange_id] = {symbol: deque(maxlen=50) for symbol in exchange_symbols}
-        daily_losses[exchange_id] = {symbol: 0 for symbol in exchange_symbols}
-        profit_loss[exchange_id] = {symbol: 0 for symbol in exchange_symbols}
-        active_symbols = {exchange_id: {symbol: True for symbol in exchange_data.get('symbols', [])} for exchange_id, exchange_data in exchanges_config.items()}
-        reactivation_thresholds[exchange_id] = {symbol: None for symbol in exchange_symbols}
-    exchange_running_status = {exchange_id: False for exchange_id in exchanges_config.keys()}
+        connection_status.setdefault(exchange_id, 'Disconnected')
+        exchange_running_status.setdefault(exchange_id, False)
+        for store, factory, maxlen, tracked in books:
+            symbols = store.setdefault(exchange_id, {})
+            for symbol in list(symbols):
+                symbols[symbol] = resize_deque(symbols[symbol], maxlen, tracked)
+                if symbols[symbol].maxlen != maxlen:
+                    config_logger.warning("%s tiene %s órdenes en seguimiento en %s, se mantiene el límite de %s hasta que baje de %s", symbol, len(symbols[symbol]), exchange_id, symbols[symbol].maxlen, maxlen)
+            for symbol in exchange_symbols:
+                if symbol not in symbols:
+                    symbols[symbol] = factory()
+        for store in values:
+            symbols = store.setdefault(exchange_id, {})
+            for symbol in exchange_symbols:
+                symbols.setdefault(symbol, 0)
+        for symbol in exchange_symbols:
+            active_symbols.setdefault(exchange_id, {}).setdefault(symbol, True)
+            reactivation_thresholds.setdefault(exchange_id, {}).setdefault(symbol, None)
+
+def get_symbol_settings(symbol):
+    return symbol_settings.get(symbol)
+
+def configured_symbols(exchange_id):
+    exchange_symbols = exchanges_config.get(exchange_id, {}).get('symbols', [])
+    return [symbol_config['symbol'] for symbol_config in symbols_config if symbol_config['symbol'] in exchange_symbols]
+
+class TradingEngine:
+    def __init__(self):
+        self.is_running = False
+        self.running_accounts = set()
+        self.status_listeners = []
+        self.account_tasks = {}
+        self.symbol_tasks = {}
+        self.reload_lock = None
+
+    def add_status_listener(self, callback):
+        self.status_listeners.append(callback)
+
+    def notify_status(self):
+        for callback in self.status_listeners:
+            try:
+                callback()
+            except Exception as e:
+                engine_logger.error("Error al notificar el cambio de estado: %s", e)
+
+    def status(self):
+        return {
+            'running': self.is_running,
+            'accounts': {
+                exchange_id: {
+                    'connection': connection_status.get(exchange_id, 'Disconnected'),
+                    'running': exchange_running_status.get(exchange_id, False),
+                    'symbols': {
+                        symbol: {
+                            'active': active_symbols.get(exchange_id, {}).get(symbol, True),
+                            'market_price': market_prices.get(exchange_id, {}).get(symbol),
+                            'predicted_price': predicted_prices.get(exchange_id, {}).get(symbol),
+                            'open_orders': len(open_orders.get(exchange_id, {}).get(symbol, [])),
+                            'pending_sells': len(pending_sells.get(exchange_id, {}).get(symbol, []))
+                        }
+                        for symbol in exchange_data.get('symbols', [])
+                    },
+                    'scheduler': request_schedulers[exchange_id].metrics() if exchange_id in request_schedulers else None
+                }
+                for exchange_id, exchange_data in exchanges_config.items()
+            }
+        }
+
+    def start_bot(self, accounts=None):
+        if not self.is_running:
+            self.is_running = True
+            self.running_accounts = {exchange_id for exchange_id, exchange_data in exchanges_config.items() if exchange_data.get('active', False)} if accounts is None else set(accounts) & set(exchanges_config)
+            for exchange_id in self.running_accounts:
+                exchange_running_status[exchange_id] = True
+            asyncio.create_task(self.run_bot(), name="run_bot")
+            self.notify_status()
+            engine_logger.info("Bot iniciado")
+        else:
+            engine_logger.info("El bot ya está en ejecución.")
+
+    async def run_bot(self):
+        try:
+            tasks = []
+            for exchange_id in self.running_accounts:
+                tasks.append(self.spawn_account(exchange_id))
+            while tasks:
+                await asyncio.gather(*tasks)
+                while self.reload_lock is not None and self.reload_lock.locked():
+                    await asyncio.sleep(0.1)
+                tasks = list(self.account_tasks.values())
+        except Exception as e:
+            engine_logger.error("Error al ejecutar el bot: %s", e)
+
+    async def prepare(self):
+        store = get_state_store()
+        if store is not None:
+            store.restore()
+            store.start_capture()
+        await asyncio.gather(initialize_exchanges(), asyncio.get_running_loop().run_in_executor(None, preload_modules))
+
+    def spawn_account(self, exchange_id):
+        task = self.account_tasks[exchange_id] = asyncio.create_task(self.run_account(exchange_id), name=f"run_account[{exchange_id}]")
+        task.add_done_callback(lambda done: self.account_tasks.pop(exchange_id, None) if self.account_tasks.get(exchange_id) is done else None)
+        return task
+
+    def start_account(self, exchange_id):
+        if exchange_id not in self.running_accounts:
+            self.running_accounts.add(exchange_id)
+            exchange_running_status[exchange_id] = True
+            engine_logger.info("Iniciando tarea para %s", exchange_id)
+            self.spawn_account(exchange_id)
+            self.notify_status()
+            engine_logger.info("Tarea iniciada para %s", exchange_id)
+
+    def stop_account(self, exchange_id):
+        if exchange_id in self.running_accounts:
+            self.running_accounts.remove(exchange_id)
+            exchange_running_status[exchange_id] = False
+            asyncio.create_task(self.shutdown_account(exchange_id), name=f"shutdown_account[{exchange_id}]")
+            self.notify_status()
+            engine_logger.info("Deteniendo operaciones para %s", exchange_id)
+
+    async def shutdown_account(self, exchange_id):
+        await stop_market_data_hub(exchange_id)
+        await stop_order_reconciler(exchange_id)
+        await close_account_open_orders(exchange_id)
+        await cancel_account_pending_buys(exchange_id)
+        exchange_running_status[exchange_id] = False
+        self.notify_status()
+        await exchanges[exchange_id].close()
+        connection_status[exchange_id] = 'Disconnected'
+        engine_logger.info("Operaciones detenidas y órdenes cerradas para %s", exchange_id)
+
+    async def stop_bot(self):
+        if self.is_running:
+            self.is_running = False
+            self.running_accounts.clear()
+            for exchange_id in exchanges_config.keys():
+                exchange_running_status[exchange_id] = False
+            self.notify_status()
+            account_tasks = list(self.account_tasks.values())
+            for task in account_tasks:
+                task.cancel()
+            await asyncio.gather(*account_tasks, return_exceptions=True)
+            for exchange_id in list(exchanges):
+                await stop_market_data_hub(exchange_id)
+                await stop_order_reconciler(exchange_id)
+                await exchanges[exchange_id].close()
+                connection_status[exchange_id] = 'Disconnected'
+            self.notify_status()
+            engine_logger.info("Bot detenido completamente")
+
+    async def run_account(self, exchange_id):
+        tasks = self.symbol_tasks.setdefault(exchange_id, {})
+        try:
+            if connection_status.get(exchange_id) != 'Connected' or exchange_id not in exchanges:
+                await initialize_exchange(exchange_id)
+            asyncio.create_task(reconnect_exchange(exchange_id), name=f"reconnect_exchange[{exchange_id}]")
+            exchange = exchanges.get(exchange_id)
+            if account_loss_exceeded(exchange_id):
+                engine_logger.warning("Pérdida diaria máxima de la cuenta alcanzada en %s, deteniendo operaciones", exchange_id)
+                self.stop_account(exchange_id)
+                return
+            if exchange and exchange_id in self.running_accounts:
+                engine_logger.info("Símbolos configurados para %s: %s", exchange_id, exchanges_config[exchange_id].get('symbols', []))
+                self.sync_symbol_tasks(exchange_id)
+            engine_logger.info("Total de tareas creadas para %s: %s", exchange_id, len(tasks))
+            if not tasks:
+                engine_logger.warning("No se crearon tareas para %s. Verifica la configuración.", exchange_id)
+            while exchange_id in self.running_accounts:
+                pending = [task for task in tasks.values() if not task.done()]
+                if pending:
+                    await asyncio.wait(pending, timeout=5, return_when=asyncio.FIRST_COMPLETED)
+                elif tasks:
+                    break
+                else:
+                    await asyncio.sleep(1)
+                if account_loss_exceeded(exchange_id):
+                    engine_logger.warning("Pérdida diaria máxima de la cuenta alcanzada en %s, deteniendo operaciones", exchange_id)
+                    self.stop_account(exchange_id)
+        except asyncio.CancelledError:
+            engine_logger.info("Tarea para %s cancelada", exchange_id)
+        except Exception as e:
+            engine_logger.error("Error en la ejecución de %s: %s", exchange_id, e)
+        finally:
+            if self.symbol_tasks.get(exchange_id) is tasks:
+                del self.symbol_tasks[exchange_id]
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            engine_logger.info("Tareas para %s finalizadas", exchange_id)
+
+    def sync_symbol_tasks(self, exchange_id):
+        tasks = self.symbol_tasks.get(exchange_id)
+        if tasks is None or exchanges.get(exchange_id) is None:
+            return [], []
+        desired = configured_symbols(exchange_id) if exchange_id in self.running_accounts else []
+        stopped = [symbol for symbol in tasks if symbol not in desired]
+        for symbol in stopped:
+            self.stop_symbol(exchange_id, symbol)
+        started = [symbol for symbol in desired if symbol not in tasks]
+        for symbol in started:
+            engine_logger.info("Creando tarea para %s en %s", symbol, exchange_id)
+            tasks[symbol] = asyncio.create_task(self.process_symbol(get_symbol_settings(symbol), exchange_id), name=f"process_symbol[{symbol}@{exchange_id}]")
+        return started, stopped
+
+    def stop_symbol(self, exchange_id, symbol):
+        task = self.symbol_tasks.get(exchange_id, {}).pop(symbol, None)
+        if task is None:
+            return
+        task.cancel()
+        take_profit = (get_symbol_settings(symbol) or {}).get('take_profit')
+        asyncio.create_task(cancel_symbol_pending_buys(exchange_id, symbol, take_profit), name=f"stop_symbol[{symbol}@{exchange_id}]")
+        engine_logger.info("Tarea detenida para %s en %s", symbol, exchange_id)
+
+    async def reload_config(self, config=None):
+        if self.reload_lock is None:
+            self.reload_lock = asyncio.Lock()
+        async with self.reload_lock:
+            try:
+                return await self.apply_config(config)
+            except Exception as e:
+                config_logger.error("Error al recargar la configuración: %s", e)
+                raise
+
+    def schedule_reload(self):
+        task = asyncio.create_task(self.reload_config(), name="reload_config")
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    async def apply_config(self, config=None):
+        global applied_config, trade_journal, state_store
+        previous = applied_config or config_snapshot()
+        if config is None:
+            config = await asyncio.get_running_loop().run_in_executor(None, read_encrypted_config)
+            migrate_config(config)
+        apply_config_settings(copy.deepcopy(config))
+        current = config_snapshot()
+        changes = {'accounts_started': [], 'accounts_stopped': [], 'accounts_restarted': [], 'symbols_started': {}, 'symbols_stopped': {}, 'settings': []}
+        old_exchanges = previous.get('exchanges', {})
+        for exchange_id, old_data in old_exchanges.items():
+            new_data = exchanges_config.get(exchange_id)
+            running = exchange_id in self.running_accounts
+            if new_data is None or not new_data.get('active', False):
+                if running:
+                    await self.halt_account(exchange_id)
+                    changes['accounts_stopped'].append(exchange_id)
+            elif any(old_data.get(key) != new_data.get(key) for key in reconnect_config_keys):
+                if running:
+                    await self.restart_account(exchange_id)
+                    changes['accounts_restarted'].append(exchange_id)
+            else:
+                apply_exchange_tuning(exchange_id, old_data, new_data)
+        initialize_structures()
+        for exchange_id, exchange_data in exchanges_config.items():
+            if self.is_running and exchange_data.get('active', False) and exchange_id not in self.running_accounts and not old_exchanges.get(exchange_id, {}).get('active', False):
+                self.start_account(exchange_id)
+                changes['accounts_started'].append(exchange_id)
+                continue
+            started, stopped = self.sync_symbol_tasks(exchange_id)
+            if started:
+                changes['symbols_started'][exchange_id] = started
+            if stopped:
+                changes['symbols_stopped'][exchange_id] = stopped
+        for key in sorted(set(previous) | set(current)):
+            if key not in ('exchanges', 'symbols') and previous.get(key) != current.get(key):
+                changes['settings'].append(key)
+        if 'logging' in changes['settings']:
+            configure_logging(logging_settings)
+        if 'monitoring' in changes['settings'] and loop_monitor is not None:
+            loop_monitor.threshold = monitoring_settings.get('loop_threshold', 0.1)
+            loop_monitor.interval = monitoring_settings.get('loop_interval', 0.25)
+        if 'journal' in changes['settings'] and trade_journal is not None:
+            journal, trade_journal = trade_journal, None
+            await asyncio.get_running_loop().run_in_executor(None, journal.close)
+        if 'state' in changes['settings'] and state_store is not None:
+            store, state_store = state_store, None
+            await store.stop()
+            store = get_state_store()
+            if store is not None:
+                store.snapshot()
+                store.start_capture()
+        applied_config = current
+        self.notify_status()
+        config_logger.warning("Configuración recargada: %s", changes)
+        return changes
+
+    async def halt_account(self, exchange_id):
+        account_task = self.account_tasks.get(exchange_id)
+        self.running_accounts.discard(exchange_id)
+        exchange_running_status[exchange_id] = False
+        if account_task is not None:
+            account_task.cancel()
+            await asyncio.gather(account_task, return_exceptions=True)
+        await self.shutdown_account(exchange_id)
+
+    async def restart_account(self, exchange_id):
+        await self.halt_account(exchange_id)
+        self.start_account(exchange_id)
+
+    async def process_symbol(self, symbol_config, exchange_id):
+        exchange = exchanges[exchange_id]
+        symbol = symbol_config['symbol']
+        engine_logger.info("Iniciando procesamiento de %s en %s", symbol, exchange_id)
+        exchange_symbols = exchanges_config[exchange_id].get('symbols', [])
+        if symbol not in exchange_symbols:
+            engine_logger.info("Símbolo %s no configurado para %s, saltando", symbol, exchange_id)
+            return
+        try:
+            candle_store = get_candle_store(exchange_id, symbol, '1h')
+            await candle_store.update(limit=500)
+            model = await prepare_model(exchange_id, symbol, candle_store.to_dataframe())
+        except Exception as e:
+            engine_logger.error("Error al entrenar el modelo para %s en %s: %s", symbol, exchange_id, e)
+            return
+        hub = get_market_data_hub(exchange_id)
+        subscription = hub.subscribe(symbol)
+        get_order_reconciler(exchange_id).start()
+        metrics.add('botxi_symbol_tasks', (('exchange', exchange_id),), 1)
+        loop_labels = (('exchange', exchange_id), ('symbol', symbol))
+        try:
+            while exchange_id in self.running_accounts and exchange_running_status[exchange_id]:
+                iteration_started = None
+                try:
+                    if not exchange_running_status[exchange_id]:
+                        engine_logger.info("Deteniendo procesamiento para %s en %s", symbol, exchange_id)
+                        break
+                    resize_order_books(exchange_id, symbol)
+                    deactivate_token_if_needed(exchange_id, symbol)
+                    if not active_symbols[exchange_id][symbol]:
+                        engine_logger.info("Símbolo %s no activo en %s, esperando reactivación", symbol, exchange_id)
+                        await asyncio.sleep(10)
+                        reactivate_token_if_needed(exchange_id, symbol)
+                        continue
+                    snapshot = await subscription.get(timeout=10)
+                    iteration_started = time.perf_counter()
+                    symbol_config = get_symbol_settings(symbol) or symbol_config
+                    spread = symbol_config['spread']
+                    take_profit = symbol_config['take_profit']
+                    trade_amount = symbol_config['trade_amount']
+                    max_orders = symbol_config['max_orders']
+                    order_timeout = symbol_config['order_timeout']
+                    max_daily_loss = symbol_config['max_daily_loss']
+                    market_price = snapshot['price'] if snapshot else None
+                    if market_price is None:
+                        engine_logger.warning("No se pudo obtener el precio para %s en %s", symbol, exchange_id)
+                        await asyncio.sleep(10)
+                        continue
+                    tick_logger.info("Precio de mercado para %s en %s: %s", symbol, exchange_id, market_price)
+                    row = snapshot['ohlcv']
+                    if row is not None:
+                        open, high, low, close, volume = row['open'], row['high'], row['low'], row['close'], row['volume']
+                    else:
+                        engine_logger.warning("No OHLCV data available for %s on %s", symbol, exchange_id)
+                        await asyncio.sleep(10)
+                        continue
+                    if get_training_service().needs_retrain(exchange_id, symbol):
+                        get_training_service().submit(exchange_id, symbol, candle_store.to_dataframe(), priority=1)
+                    model = models[exchange_id].get(symbol, model)
+                    predicted_price = snapshot.get('predicted_price')
+                    if predicted_price is None:
+                        predicted_price = predict_next_price(model, symbol, exchange_id, open, high, low, close, volume)
+                    tick_logger.info("Precio predicho para %s en %s: %s", symbol, exchange_id, predicted_price)
+                    if predicted_price > market_price and exchange_running_status[exchange_id]:
+                        tick_logger.info("Intentando abrir órdenes de compra para %s en %s", symbol, exchange_id)
+                        buy_prices = [market_price * (1 - spread * (i + 1)) for i in range(max_orders - len(open_orders[exchange_id][symbol]))]
+                        if buy_prices:
+                            context = tick_timestamps.set(snapshot['timestamp'])
+                            try:
+                                placed = await place_ladder_async(symbol, 'buy', trade_amount, buy_prices, exchange_id)
+                            finally:
+                                tick_timestamps.reset(context)
+                            tick_logger.info("Órdenes de compra abiertas en %s para %s: %s de %s", exchange_id, symbol, len(placed), len(buy_prices))
+                    if exchange_running_status[exchange_id]:
+                        await manage_open_buy_orders(exchange_id, symbol, order_timeout, take_profit)
+                    current_price = hub.last_price(symbol)
+                    if current_price is not None:
+                        market_prices[exchange_id][symbol] = current_price
+                    else:
+                        engine_logger.warning("No se pudo obtener el precio actual para %s en %s", symbol, exchange_id)
+                        continue
+                    if exchange_running_status[exchange_id]:
+                        await place_sell_orders(exchange_id, symbol, take_profit)
+                    daily_loss = calculate_daily_loss(symbol, exchange_id)
+                    if daily_loss > max_daily_loss:
+                        engine_logger.info("Pérdida diaria máxima alcanzada para %s en %s, deteniendo operaciones", symbol, exchange_id)
+                        active_symbols[exchange_id][symbol] = False
+                        reactivation_thresholds[exchange_id][symbol] = market_price * 1.05
+                        await asyncio.sleep(10)
+                        continue
+                except Exception as e:
+                    error_message = f"{e}"
+                    if "unsupported operand type(s) for *: 'NoneType' and 'float'" not in error_message:
+                        engine_logger.error("Error en el procesamiento de %s en %s: %s", symbol, exchange_id, e)
+                    await asyncio.sleep(10)
+                finally:
+                    if iteration_started is not None:
+                        metrics.observe('botxi_symbol_loop_seconds', loop_labels, time.perf_counter() - iteration_started)
+        finally:
+            metrics.add('botxi_symbol_tasks', (('exchange', exchange_id),), -1)
+            subscription.close()
+        engine_logger.info("Procesamiento detenido para %s en %s", symbol, exchange_id)
 
 class BotGUI:
-    def __init__(self, master):
+    def __init__(self, master, engine):
         self.master = master
+        self.engine = engine
         master.title("BOTXI Control Panel")
         master.geometry("1400x900")
         style = Style("darkly")
@@ -184,14 +846,9 @@ class BotGUI:
         self.account_buttons_frame.pack(fill="x", padx=10, pady=10)
         self.account_buttons = {}
         self.update_account_buttons()
-        self.is_running = False
-        self.running_accounts = set()
+        self.engine.add_status_listener(self.update_connection_status)
         self.update_interval = 2000
         self.master.after(self.update_interval, self.periodic_update)
-        self.last_update = {
-            'actions': None,
-            'orders': None,
-        }
         self.page_size = 20
         self.current_page = 0
         self.update_intervals = {
@@ -235,10 +892,14 @@ class BotGUI:
         edit_token_button.pack(fill="x", pady=5)
         remove_token_button = ttk.Button(button_frame, text="Eliminar Token", command=self.remove_token)
         remove_token_button.pack(fill="x", pady=5)
-        save_button = ttk.Button(button_frame, text="Guardar Configuración", command=save_encrypted_config)
+        save_button = ttk.Button(button_frame, text="Guardar Configuración", command=self.save_config)
         save_button.pack(fill="x", pady=5)
         self.load_config_to_listboxes()
 
+    def save_config(self):
+        save_encrypted_config()
+        self.engine.schedule_reload()
+
     def load_config_to_listboxes(self):
         self.exchange_listbox.delete(0, tk.END)
         self.token_listbox.delete(0, tk.END)
@@ -333,7 +994,7 @@ class BotGUI:
                 "trade_amount": 0.0,
                 "max_orders": 1,
                 "order_timeout": 60,
-                "max_daily_loss": 0.02,
+                "max_daily_loss": 10.0,
                 "exchanges": []
             }
         else:
@@ -351,7 +1012,7 @@ class BotGUI:
         tk.Label(dialog, text="Cantidad de Trade").grid(row=2, column=0)
         tk.Label(dialog, text="Número máximo de órdenes").grid(row=3, column=0)
         tk.Label(dialog, text="Tiempo de expiración de órdenes").grid(row=4, column=0)
-        tk.Label(dialog, text="Máxima pérdida diaria").grid(row=5, column=0)
+        tk.Label(dialog, text="Máxima pérdida diaria (moneda cotizada)").grid(row=5, column=0)
         tk.Label(dialog, text="Exchanges").grid(row=6, column=0)
         spread_var = tk.DoubleVar(value=token_data['spread'])
         take_profit_var = tk.DoubleVar(value=token_data['take_profit'])
@@ -407,6 +1068,8 @@ class BotGUI:
     def create_actions_tab(self):
         tab = ttk.Frame(self.notebook)
         self.notebook.add(tab, text="Acciones Recientes")
+        self.actions_cursor = 0
+        self.actions_rows = deque(maxlen=actions_feed.events.maxlen)
         columns = ("Fecha/Hora", "Exchange", "Acción", "Símbolo", "Cantidad", "Precio", "Profit/Loss")
         self.actions_tree = ttk.Treeview(tab, columns=columns, show="headings")
         for col in columns:
@@ -424,7 +1087,13 @@ class BotGUI:
         self.orders_tree = ttk.Treeview(tab, columns=columns, show="headings")
         for col in columns:
             self.orders_tree.heading(col, text=col)
+        self.orders_tree.tag_configure('open', background='green')
+        self.orders_tree.tag_configure('closed', background='blue')
+        self.orders_tree.tag_configure('canceled', background='coral')
+        self.orders_tree.tag_configure('unknown', background='black')
         self.orders_tree.pack(expand=True, fill="both")
+        self.order_rows = {}
+        self.last_age_refresh = 0
 
     def create_connection_status_panel(self):
         status_frame = ttk.LabelFrame(self.master, text="Estado de Exchanges")
@@ -443,33 +1112,17 @@ class BotGUI:
             self.footer_text.insert(tk.END, "\n".join(last_actions))
         self.footer_text.config(state="disabled")
 
-    def run_bot(self):
-        for exchange_id in self.running_accounts:
-            asyncio.create_task(self.run_account(exchange_id))
-        logging.info("Bot iniciado")
-
     def start_bot(self):
-        if not self.is_running:
-            self.is_running = True
-            self.running_accounts = set(exchanges_config.keys())
-            for exchange_id in self.running_accounts:
-                exchange_running_status[exchange_id] = True
-            asyncio.create_task(self.run_bot())
-            self.update_connection_status()
-            logging.info("Bot iniciado")
-        else:
-            logging.info("El bot ya está en ejecución.")
+        self.engine.start_bot()
 
-    async def run_bot(self):
-        try:
-            tasks = []
-            for exchange_id in self.running_accounts:
-                tasks.append(asyncio.create_task(self.run_account(exchange_id)))
-            await asyncio.gather(*tasks)
-        except Exception as e:
-            logging.error(f"Error al ejecutar el bot: {e}")
-        finally:
-            await shutdown_bot()
+    def stop_bot(self):
+        asyncio.create_task(self.engine.stop_bot())
+
+    def start_account(self, exchange_id):
+        self.engine.start_account(exchange_id)
+
+    def stop_account(self, exchange_id):
+        self.engine.stop_account(exchange_id)
 
     async def run_gui(self):
         while True:
@@ -477,49 +1130,13 @@ class BotGUI:
             self.master.update()
             await asyncio.sleep(0.2)
 
-    def stop_account(self, exchange_id):
-        if exchange_id in self.running_accounts:
-            self.running_accounts.remove(exchange_id)
-            exchange_running_status[exchange_id] = False
-            asyncio.create_task(self.shutdown_account(exchange_id))
-            self.update_connection_status()
-            logging.info(f"Deteniendo operaciones para {exchange_id}")
-
-    async def async_shutdown_procedures(self):
-        await shutdown_bot()
-        for exchange_id, exchange in exchanges.items():
-            if exchange:
-                await exchange.close()
-        logging.info("Bot detenido completamente")
-
-    async def stop_bot(self):
-        if self.is_running:
-            self.is_running = False
-            self.running_accounts.clear()
-            for exchange_id in exchanges_config.keys():
-                exchange_running_status[exchange_id] = False
-            self.update_connection_status()
-            await shutdown_bot()
-            for exchange_id, exchange in exchanges.items():
-                await exchange.close()
-            logging.info("Bot detenido completamente")
-
-    def start_account(self, exchange_id):
-        if exchange_id not in self.running_accounts:
-            self.running_accounts.add(exchange_id)
-            exchange_running_status[exchange_id] = True
-            logging.info(f"Iniciando tarea para {exchange_id}")
-            asyncio.create_task(self.run_account(exchange_id))
-            self.update_connection_status()
-            logging.info(f"Tarea iniciada para {exchange_id}")
-
     def update_connection_status(self):
         for exchange_id, status in connection_status.items():
             if exchange_id in self.status_labels:
                 label = self.status_labels[exchange_id]
                 conn_status = "Conectado" if status == 'Connected' else "Desconectado"
-                run_status = "Iniciado" if exchange_running_status[exchange_id] else "No iniciado"
-                if status == 'Connected' and exchange_running_status[exchange_id]:
+                run_status = "Iniciado" if exchange_running_status.get(exchange_id) else "No iniciado"
+                if status == 'Connected' and exchange_running_status.get(exchange_id):
                     color = "lime"
                 elif status == 'Connected':
                     color = "yellow"
@@ -527,55 +1144,16 @@ class BotGUI:
                     color = "red"
                 label.config(text=f"{exchange_id}: {conn_status} | {run_status}", foreground=color)
             else:
-                logging.error(f"Exchange ID '{exchange_id}' no se encontró en status_labels.")
-
-    async def shutdown_account(self, exchange_id):
-        await close_account_open_orders(exchange_id)
-        await cancel_account_pending_buys(exchange_id)
-        exchange_running_status[exchange_id] = False
-        self.update_connection_status()
-        await exchanges[exchange_id].close()
-        logging.info(f"Operaciones detenidas y órdenes cerradas para {exchange_id}")
+                gui_logger.error("Exchange ID '%s' no se encontró en status_labels.", exchange_id)
 
     def submit_command(self):
         command = self.command_entry.get()
         self.command_entry.delete(0, tk.END)
         if command.lower() == 'stop':
-            asyncio.create_task(self.stop_bot())
+            self.stop_bot()
         else:
             handle_command(command)
 
-    async def run_account(self, exchange_id):
-        try:
-            await initialize_exchange(exchange_id)
-            asyncio.create_task(reconnect_exchange(exchange_id))
-            tasks = []
-            exchange = exchanges.get(exchange_id)
-            if exchange and exchange_id in self.running_accounts:
-                exchange_symbols = exchanges_config[exchange_id].get('symbols', [])
-                logging.info(f"Símbolos configurados para {exchange_id}: {exchange_symbols}")
-                for symbol_config in symbols_config:
-                    if symbol_config['symbol'] in exchange_symbols:
-                        logging.info(f"Creando tarea para {symbol_config['symbol']} en {exchange_id}")
-                        task = asyncio.create_task(self.process_symbol(symbol_config, exchange_id))
-                        tasks.append(task)
-                    else:
-                        logging.info(f"Símbolo {symbol_config['symbol']} no configurado para {exchange_id}")
-            logging.info(f"Total de tareas creadas para {exchange_id}: {len(tasks)}")
-            if tasks:
-                await asyncio.gather(*tasks)
-            else:
-                logging.warning(f"No se crearon tareas para {exchange_id}. Verifica la configuración.")
-        except asyncio.CancelledError:
-            logging.info(f"Tarea para {exchange_id} cancelada")
-        except Exception as e:
-            logging.error(f"Error en la ejecución de {exchange_id}: {e}")
-        finally:
-            for task in tasks:
-                task.cancel()
-            await asyncio.gather(*tasks, return_exceptions=True)
-            logging.info(f"Tareas para {exchange_id} finalizadas")
-
     def periodic_update(self):
         self.update_gui()
         self.master.after(self.update_interval, self.periodic_update)
@@ -588,70 +1166,79 @@ class BotGUI:
         self.master.update_idletasks()
 
     def update_actions_tab(self):
-        current_data = self.get_actions_data()
-        if current_data != self.last_update['actions']:
-            self.actions_tree.delete(*self.actions_tree.get_children())
-            start = self.current_page * self.page_size
-            end = start + self.page_size
-            for item in current_data[start:end]:
-                self.actions_tree.insert("", "end", values=item)
-            self.last_update['actions'] = current_data
+        events = actions_feed.since(self.actions_cursor)
+        if not events:
+            return
+        self.actions_cursor = events[-1]['seq']
+        for event in events:
+            self.actions_rows.appendleft((
+                event['timestamp'], event['exchange'], event['side'], event['symbol'],
+                f"{event['amount']:.8f}", f"{event['price']:.8f}", f"{event['profit_loss']:.8f}"
+            ))
+        self.render_actions_page()
+
+    def render_actions_page(self):
+        self.actions_tree.delete(*self.actions_tree.get_children())
+        start = self.current_page * self.page_size
+        for item in itertools.islice(self.actions_rows, start, start + self.page_size):
+            self.actions_tree.insert("", "end", values=item)
 
     def update_orders_tab(self):
-        self.orders_tree.delete(*self.orders_tree.get_children())
         current_time = time.time()
+        refresh_ages = current_time - self.last_age_refresh >= self.update_intervals['orders'] / 1000
+        seen = set()
         for exchange_id, symbols in open_orders.items():
             for symbol, orders in symbols.items():
                 for order in orders:
-                    timestamp = order.get('timestamp')
-                    time_active = current_time - (timestamp / 1000 if timestamp else current_time)
-                    amount = order.get('amount')
-                    price = order.get('price')
-                    status = order.get('status', '')
-                    self.orders_tree.insert("", "end", values=(
-                        exchange_id,
-                        order.get('symbol', ''),
-                        order.get('id', ''),
-                        order.get('side', ''),
-                        f"{amount:.8f}" if amount is not None else "N/A",
-                        f"{price:.8f}" if price is not None else "N/A",
-                        status,
-                        f"{time_active:.2f} segundos" if timestamp else "N/A"
-                    ))
-                    if status and status.lower() == 'open':
-                        self.orders_tree.item(self.orders_tree.get_children()[-1], tags=('open',))
-                    elif status and status.lower() == 'closed':
-                        self.orders_tree.item(self.orders_tree.get_children()[-1], tags=('closed',))
-                    elif status and status.lower() == 'canceled':
-                        self.orders_tree.item(self.orders_tree.get_children()[-1], tags=('canceled',))
+                    iid = f"{exchange_id}|{order.get('id', '')}"
+                    if iid in seen:
+                        continue
+                    seen.add(iid)
+                    state = (order.get('status', ''), order.get('amount'), order.get('price'), order.get('side', ''), order.get('symbol', ''))
+                    if iid in self.order_rows and self.order_rows[iid] == state and not refresh_ages:
+                        continue
+                    values = self.format_order_row(exchange_id, order, current_time)
+                    status = (order.get('status') or '').lower()
+                    tags = (status if status in ('open', 'closed', 'canceled') else 'unknown',)
+                    if iid in self.order_rows:
+                        self.orders_tree.item(iid, values=values, tags=tags)
                     else:
-                        self.orders_tree.item(self.orders_tree.get_children()[-1], tags=('unknown',))
-        self.orders_tree.tag_configure('open', background='green')
-        self.orders_tree.tag_configure('closed', background='blue')
-        self.orders_tree.tag_configure('canceled', background='coral')
-        self.orders_tree.tag_configure('unknown', background='black')
+                        self.orders_tree.insert("", "end", iid=iid, values=values, tags=tags)
+                    self.order_rows[iid] = state
+        for iid in [iid for iid in self.order_rows if iid not in seen]:
+            self.orders_tree.delete(iid)
+            del self.order_rows[iid]
+        if refresh_ages:
+            self.last_age_refresh = current_time
+
+    def format_order_row(self, exchange_id, order, current_time):
+        timestamp = order.get('timestamp')
+        time_active = current_time - (timestamp / 1000 if timestamp else current_time)
+        amount = order.get('amount')
+        price = order.get('price')
+        return (
+            exchange_id,
+            order.get('symbol', ''),
+            order.get('id', ''),
+            order.get('side', ''),
+            f"{amount:.8f}" if amount is not None else "N/A",
+            f"{price:.8f}" if price is not None else "N/A",
+            order.get('status', ''),
+            f"{time_active:.2f} segundos" if timestamp else "N/A"
+        )
 
     def get_actions_data(self):
-        data = []
-        for exchange_id, symbols in daily_trades.items():
-            for symbol, trades in symbols.items():
-                for trade in list(trades)[-10:]:
-                    profit_loss = calculate_trade_profit_loss(trade)
-                    data.append((
-                        trade['timestamp'], exchange_id, trade['side'], trade['symbol'],
-                        f"{trade['amount']:.8f}", f"{trade['price']:.8f}", f"{profit_loss:.8f}"
-                    ))
-        return data
+        return list(self.actions_rows)
 
     def prev_page(self):
         if self.current_page > 0:
             self.current_page -= 1
-            self.update_actions_tab()
+            self.render_actions_page()
 
     def next_page(self):
-        if (self.current_page + 1) * self.page_size < len(self.get_actions_data()):
+        if (self.current_page + 1) * self.page_size < len(self.actions_rows):
             self.current_page += 1
-            self.update_actions_tab()
+            self.render_actions_page()
 
     def start_update_cycles(self):
         valid_update_types = ['orders', 'actions']
@@ -663,164 +1250,686 @@ class BotGUI:
         getattr(self, f"update_{update_type}_tab")()
         self.master.after(self.update_intervals[update_type], lambda: self.update_cycle(update_type))
 
-    async def process_symbol(self, symbol_config, exchange_id):
-        exchange = exchanges[exchange_id]
-        symbol = symbol_config['symbol']
-        logging.info(f"Iniciando procesamiento de {symbol} en {exchange_id}")
-        spread = symbol_config['spread']
-        take_profit = symbol_config['take_profit']
-        trade_amount = symbol_config['trade_amount']
-        max_orders = symbol_config['max_orders']
-        order_timeout = symbol_config['order_timeout']
-        max_daily_loss = symbol_config['max_daily_loss']
-        exchange_symbols = exchanges_config[exchange_id].get('symbols', [])
-        if symbol not in exchange_symbols:
-            logging.info(f"Símbolo {symbol} no configurado para {exchange_id}, saltando")
-            return
-        try:
-            data = await fetch_ohlcv_async(symbol, exchange_id, timeframe='1h', limit=500)
-            model = train_model(data, symbol, exchange_id)
-        except Exception as e:
-            logging.error(f"Error al entrenar el modelo para {symbol} en {exchange_id}: {e}")
-            return
-        while exchange_id in self.running_accounts and exchange_running_status[exchange_id]:
+class MetricsRegistry:
+    default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self):
+        self.descriptions = {}
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.callbacks = {}
+
+    def describe(self, name, kind, description):
+        self.descriptions[name] = (kind, description)
+
+    def inc(self, name, labels=(), value=1):
+        series = self.counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def add(self, name, labels=(), value=1):
+        series = self.gauges.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name, labels, value, buckets=None):
+        buckets = buckets or self.default_buckets
+        series = self.histograms.setdefault(name, {})
+        entry = series.get(labels)
+        if entry is None:
+            entry = series[labels] = [buckets, [0] * len(buckets), 0.0, 0]
+        index = bisect.bisect_left(buckets, value)
+        if index < len(buckets):
+            entry[1][index] += 1
+        entry[2] += value
+        entry[3] += 1
+
+    def register_callback(self, name, callback):
+        self.callbacks[name] = callback
+
+    @staticmethod
+    def format_labels(labels):
+        if not labels:
+            return ''
+        pairs = []
+        for name, value in labels:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{name}="{value}"')
+        return '{' + ','.join(pairs) + '}'
+
+    def render(self):
+        lines = []
+        gauges = {name: dict(series) for name, series in self.gauges.items()}
+        for name, callback in self.callbacks.items():
             try:
-                if not exchange_running_status[exchange_id]:
-                    logging.info(f"Deteniendo procesamiento para {symbol} en {exchange_id}")
-                    break
-                deactivate_token_if_needed(exchange_id, symbol)
-                if not active_symbols[exchange_id][symbol]:
-                    logging.info(f"Símbolo {symbol} no activo en {exchange_id}, esperando reactivación")
-                    await asyncio.sleep(10)
-                    reactivate_token_if_needed(exchange_id, symbol)
-                    continue
-                prices = await get_market_prices_async(exchange_id)
-                market_price = prices.get(symbol)
-                if market_price is None:
-                    logging.warning(f"No se pudo obtener el precio para {symbol} en {exchange_id}")
-                    await asyncio.sleep(10)
-                    continue
-                logging.info(f"Precio de mercado para {symbol} en {exchange_id}: {market_price}")
-                ohlcv = await fetch_ohlcv_async(symbol, exchange_id, timeframe='1h', limit=1)
-                if not ohlcv.empty:
-                    row = ohlcv.iloc[-1]
-                    open, high, low, close, volume = row['open'], row['high'], row['low'], row['close'], row['volume']
-                else:
-                    logging.warning(f"No OHLCV data available for {symbol} on {exchange_id}")
-                    await asyncio.sleep(10)
-                    continue
-                predicted_price = predict_next_price(model, symbol, exchange_id, open, high, low, close, volume)
-                logging.info(f"Precio predicho para {symbol} en {exchange_id}: {predicted_price}")
-                if predicted_price > market_price and exchange_running_status[exchange_id]:
-                    logging.info(f"Intentando abrir órdenes de compra para {symbol} en {exchange_id}")
-                    for i in range(max_orders - len(open_orders[exchange_id][symbol])):
-                        if not exchange_running_status[exchange_id]:
-                            break
-                        buy_price = market_price * (1 - spread * (i + 1))
-                        order = await place_order_async(symbol, 'buy', trade_amount, buy_price, exchange_id)
-                        if order:
-                            logging.info(f"Orden de compra abierta en {exchange_id} para {symbol}: {order}")
-                        else:
-                            logging.info(f"No se pudo abrir orden de compra en {exchange_id} para {symbol}")
-                        await asyncio.sleep(1)
-                if exchange_running_status[exchange_id]:
-                    await manage_open_buy_orders(exchange_id, symbol, order_timeout, take_profit)
-                current_price = await get_current_price(exchange_id, symbol)
-                if current_price is not None:
-                    market_prices[exchange_id][symbol] = current_price
-                else:
-                    logging.warning(f"No se pudo obtener el precio actual para {symbol} en {exchange_id}")
-                    continue
-                if exchange_running_status[exchange_id]:
-                    await place_sell_orders(exchange_id, symbol, take_profit)
-                daily_loss = calculate_daily_loss(symbol, exchange_id)
-                if daily_loss > max_daily_loss:
-                    logging.info(f"Pérdida diaria máxima alcanzada para {symbol} en {exchange_id}, deteniendo operaciones")
-                    active_symbols[exchange_id][symbol] = False
-                    reactivation_thresholds[exchange_id][symbol] = market_price * 1.05
-                    await asyncio.sleep(10)
-                    continue
-                await asyncio.sleep(1)
+                gauges[name] = callback()
             except Exception as e:
-                error_message = f"{e}"
-                if "unsupported operand type(s) for *: 'NoneType' and 'float'" not in error_message:
-                    logging.error(f"Error en el procesamiento de {symbol} en {exchange_id}: {e}")
-                await asyncio.sleep(10)
-        logging.info(f"Procesamiento detenido para {symbol} en {exchange_id}")
+                monitor_logger.error("Error al calcular la métrica %s: %s", name, e)
+        for kind, families in (('counter', self.counters), ('gauge', gauges)):
+            for name, series in families.items():
+                description = self.descriptions.get(name, (kind, name))[1]
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in series.items():
+                    lines.append(f"{name}{self.format_labels(labels)} {value}")
+        for name, series in self.histograms.items():
+            lines.append(f"# HELP {name} {self.descriptions.get(name, ('histogram', name))[1]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (buckets, counts, total, count) in series.items():
+                for bound, bucket_count in zip(buckets, itertools.accumulate(counts)):
+                    lines.append(f"{name}_bucket{self.format_labels(labels + (('le', bound),))} {bucket_count}")
+                lines.append(f"{name}_bucket{self.format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{self.format_labels(labels)} {total}")
+                lines.append(f"{name}_count{self.format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
 
-async def get_current_price(exchange_id, symbol):
-    try:
-        ticker = await exchanges[exchange_id].fetch_ticker(symbol)
-        return ticker['last']
-    except Exception as e:
-        logging.error(f"Error al obtener el precio actual para {symbol} en {exchange_id}: {e}")
-        return None
+metrics = MetricsRegistry()
+metrics.describe('botxi_exchange_requests_total', 'counter', "Llamadas a la API del exchange por método y resultado")
+metrics.describe('botxi_exchange_request_seconds', 'histogram', "Latencia de las llamadas a la API del exchange")
+metrics.describe('botxi_retries_total', 'counter', "Reintentos tras un error por operación")
+metrics.describe('botxi_backoff_seconds_total', 'counter', "Segundos de espera por backoff por operación")
+metrics.describe('botxi_symbol_loop_seconds', 'histogram', "Duración de cada iteración del bucle de un símbolo")
+metrics.describe('botxi_tick_to_order_seconds', 'histogram', "Tiempo desde el snapshot de mercado hasta la llamada create_order")
+metrics.describe('botxi_symbol_tasks', 'gauge', "Tareas de símbolo en ejecución")
+metrics.describe('botxi_open_orders', 'gauge', "Órdenes abiertas por símbolo")
+metrics.describe('botxi_pending_sells', 'gauge', "Ventas pendientes por símbolo")
+metrics.describe('botxi_scheduler_queue_depth', 'gauge', "Peticiones en cola en el planificador por prioridad")
+metrics.describe('botxi_scheduler_wait_seconds_total', 'counter', "Segundos esperando tokens en el planificador por prioridad")
+metrics.register_callback('botxi_open_orders', lambda: {
+    (('exchange', exchange_id), ('symbol', symbol)): len(orders)
+    for exchange_id, symbols in open_orders.items() for symbol, orders in symbols.items()
+})
+metrics.register_callback('botxi_pending_sells', lambda: {
+    (('exchange', exchange_id), ('symbol', symbol)): len(orders)
+    for exchange_id, symbols in pending_sells.items() for symbol, orders in symbols.items()
+})
+metrics.register_callback('botxi_scheduler_queue_depth', lambda: {
+    (('exchange', exchange_id), ('priority', priority)): depth
+    for exchange_id, scheduler in request_schedulers.items() for priority, depth in scheduler.depth.items()
+})
 
-async def place_order_async(symbol, side, amount, price, exchange_id, retries=3):
-    if not exchange_running_status[exchange_id]:
-        logging.info(f"No se colocará la orden {side} para {symbol} en {exchange_id} porque el exchange está detenido")
-        return None
-    for attempt in range(retries):
-        try:
-            exchange = exchanges[exchange_id]
-            order = await exchange.create_order(symbol, 'limit', side, amount, price)
-            logging.info(f"Orden {side} colocada en {exchange_id}: {order}")
-            if side == 'buy':
-                order['highest_price'] = order['price']
-            trade_record = {
-                'timestamp': datetime.now().isoformat(),
-                'exchange': exchange_id,
-                'symbol': symbol,
-                'side': side,
-                'amount': amount,
-                'price': price,
-                'order_id': order['id']
-            }
-            daily_trades[exchange_id][symbol].append(trade_record)
-            open_orders[exchange_id][symbol].append(order)
-            save_trade_to_csv(trade_record, exchange_id)
-            return order
-        except Exception as e:
-            logging.info(f"Error al colocar la orden {side} para {symbol} en {exchange_id}: {e}")
-            if not exchange_running_status[exchange_id]:
-                logging.info(f"El exchange {exchange_id} ha sido detenido durante el intento de colocar la orden")
-                return None
-            await asyncio.sleep(2 ** attempt)
-    logging.error(f"No se pudo colocar la orden {side} para {symbol} en {exchange_id} después de {retries} intentos")
-    return None
+def observe_exchange_call(exchange_id, method, started, status):
+    labels = (('exchange', exchange_id), ('method', method))
+    metrics.inc('botxi_exchange_requests_total', labels + (('status', status),))
+    metrics.observe('botxi_exchange_request_seconds', labels, time.perf_counter() - started)
 
-async def manage_open_buy_orders(exchange_id, symbol, order_timeout, take_profit):
-    current_time = time.time()
-    for order in list(open_orders[exchange_id][symbol]):
-        order_info = await exchanges[exchange_id].fetch_order(order['id'], symbol)
-        if order_info['status'] == 'closed':
-            logging.info(f"Orden de compra ejecutada para {symbol} en {exchange_id}: {order_info}")
-            daily_trades[exchange_id][symbol].append({
-                'timestamp': datetime.now().isoformat(),
-                'symbol': symbol,
-                'side': 'buy',
-                'amount': order_info['amount'],
-                'price': order_info['price'],
-                'order_id': order_info['id']
-            })
-            sell_price = order_info['price'] * (1 + take_profit)
-            sell_order = await place_order_async(symbol, 'sell', order_info['amount'], sell_price, exchange_id)
-            if sell_order:
-                logging.info(f"Orden de venta colocada para {symbol} en {exchange_id}: {sell_order}")
-                pending_sells[exchange_id][symbol].append(sell_order)
-            else:
-                logging.error(f"Error al colocar la orden de venta para {symbol} en {exchange_id}")
-            open_orders[exchange_id][symbol].remove(order)
-        elif order_info['status'] == 'open' and order_info['side'] == 'buy':
-            order_age = current_time - (order_info['timestamp'] / 1000)
-            if order_age > order_timeout:
+def record_retry(exchange_id, operation, delay):
+    labels = (('exchange', exchange_id), ('operation', operation))
+    metrics.inc('botxi_retries_total', labels)
+    metrics.inc('botxi_backoff_seconds_total', labels, delay)
+
+metrics.describe('botxi_loop_lag_seconds', 'histogram', "Retraso del bucle de eventos medido por el vigilante")
+metrics.describe('botxi_slow_callbacks_total', 'counter', "Bloqueos del bucle de eventos por tarea")
+
+def loop_task_name(loop):
+    task = asyncio.current_task(loop)
+    return task.get_name() if task is not None else 'callback'
+
+def describe_frames(frame, depth=4):
+    if frame is None:
+        return ''
+    return ' <- '.join(f"{os.path.basename(entry.filename)}:{entry.name}:{entry.lineno}" for entry in reversed(traceback.extract_stack(frame)[-depth:]))
+
+class LoopMonitor:
+    def __init__(self, threshold=0.1, interval=0.25):
+        self.threshold = threshold
+        self.interval = interval
+        self.loop = None
+        self.loop_thread = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.slow_callbacks = deque(maxlen=100)
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.watch, name="loop-monitor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+
+    def watch(self):
+        while not self.stopping.is_set():
+            probe = threading.Event()
+            sent = time.monotonic()
+            try:
+                self.loop.call_soon_threadsafe(probe.set)
+            except RuntimeError:
+                return
+            blocker = None
+            if not probe.wait(self.threshold):
+                blocker = (loop_task_name(self.loop), describe_frames(sys._current_frames().get(self.loop_thread)))
+                while not probe.wait(0.5):
+                    if self.stopping.is_set() or self.loop.is_closed():
+                        return
+            lag = time.monotonic() - sent
+            try:
+                self.loop.call_soon_threadsafe(self.record, lag, blocker)
+            except RuntimeError:
+                return
+            self.stopping.wait(self.interval)
+
+    def record(self, lag, blocker):
+        metrics.observe('botxi_loop_lag_seconds', (), lag)
+        if blocker is None:
+            return
+        task_name, stack = blocker
+        self.slow_callbacks.append({'timestamp': datetime.now().isoformat(), 'task': task_name, 'lag': lag, 'stack': stack})
+        metrics.inc('botxi_slow_callbacks_total', (('task', task_name),))
+        monitor_logger.warning("Bucle de eventos bloqueado %.3fs por %s: %s", lag, task_name, stack)
+
+class TaskProfiler:
+    def __init__(self, window=60, interval=0.005, directory='profiles'):
+        self.window = window
+        self.interval = interval
+        self.directory = directory
+        self.thread = None
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, window=None):
+        if self.running():
+            return False
+        loop = asyncio.get_running_loop()
+        self.thread = threading.Thread(target=self.run, args=(loop, threading.get_ident(), window or self.window), name="task-profiler", daemon=True)
+        self.thread.start()
+        monitor_logger.warning("Perfilado de tareas iniciado durante %s segundos", window or self.window)
+        return True
+
+    def run(self, loop, loop_thread, window):
+        cpu_clock = time.pthread_getcpuclockid(loop_thread) if hasattr(time, 'pthread_getcpuclockid') else None
+        stacks = {}
+        tasks = {}
+        last_wall = time.perf_counter()
+        last_cpu = time.clock_gettime(cpu_clock) if cpu_clock is not None else 0.0
+        deadline = last_wall + window
+        while last_wall < deadline and not loop.is_closed():
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(loop_thread)
+            if frame is None:
+                break
+            wall = time.perf_counter()
+            cpu = time.clock_gettime(cpu_clock) if cpu_clock is not None else 0.0
+            frames = traceback.extract_stack(frame)
+            if frames[-1].name in ('select', 'poll') and 'selectors' in frames[-1].filename:
+                name = 'idle'
+            else:
+                name = loop_task_name(loop)
+            stack = ';'.join([name] + [f"{os.path.basename(entry.filename)}:{entry.name}" for entry in frames])
+            stacks[stack] = stacks.get(stack, 0) + 1
+            totals = tasks.setdefault(name, {'samples': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+            totals['samples'] += 1
+            totals['wall_seconds'] += wall - last_wall
+            totals['cpu_seconds'] += cpu - last_cpu
+            last_wall, last_cpu = wall, cpu
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        with open(f"{base}.folded", 'w') as file:
+            for stack, count in sorted(stacks.items()):
+                file.write(f"{stack} {count}\n")
+        with open(f"{base}.json", 'w') as file:
+            json.dump(dict(sorted(tasks.items(), key=lambda item: item[1]['cpu_seconds'], reverse=True)), file, indent=2)
+        monitor_logger.warning("Perfil de tareas guardado en %s.folded y %s.json", base, base)
+
+def get_loop_monitor():
+    global loop_monitor
+    if loop_monitor is None:
+        loop_monitor = LoopMonitor(monitoring_settings.get('loop_threshold', 0.1), monitoring_settings.get('loop_interval', 0.25))
+    return loop_monitor
+
+def start_profiler(window=None):
+    global task_profiler
+    if task_profiler is None:
+        task_profiler = TaskProfiler(
+            monitoring_settings.get('profile_window', 60),
+            monitoring_settings.get('profile_interval', 0.005),
+            monitoring_settings.get('profile_directory', 'profiles')
+        )
+    return task_profiler.start(window)
+
+class RequestScheduler:
+    default_weights = {
+        'fetch_tickers': 2,
+        'fetch_open_orders': 3,
+        'fetch_closed_orders': 3,
+        'fetch_ohlcv': 1,
+        'fetch_order': 1,
+        'fetch_ticker': 1,
+        'create_order': 1,
+        'create_orders': 2,
+        'cancel_order': 1
+    }
+
+    def __init__(self, exchange_id, rate=None, burst=None, weights=None, penalty=5, share=1):
+        self.exchange_id = exchange_id
+        self.penalty = penalty
+        self.charged = {}
+        self.configure(rate, burst, weights, share)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waiters = []
+        self.counter = itertools.count()
+        self.dispatcher = None
+        self.depth = {name: 0 for name in request_priorities}
+        self.max_depth = {name: 0 for name in request_priorities}
+        self.completed = {name: 0 for name in request_priorities}
+        self.wait_seconds = {name: 0.0 for name in request_priorities}
+        self.rate_limited = 0
+
+    def configure(self, rate=None, burst=None, weights=None, share=1):
+        exchange = exchanges.get(self.exchange_id)
+        rate_limit = getattr(exchange, 'rateLimit', 0) or 0
+        self.rate = (rate or (1000 / rate_limit if rate_limit else float('inf'))) * share
+        self.capacity = burst * share if burst else max(1, self.rate)
+        self.weights = dict(self.default_weights, **(weights or {}))
+        self.fixed_weights = set(weights or ())
+        if hasattr(self, 'tokens'):
+            self.tokens = min(self.tokens, self.capacity)
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority, cost):
+        self.refill()
+        if not self.waiters and self.tokens >= cost:
+            self.tokens -= cost
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (request_priorities[priority], next(self.counter), cost, future))
+        self.depth[priority] += 1
+        self.max_depth[priority] = max(self.max_depth[priority], self.depth[priority])
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.create_task(self.dispatch(), name=f"request_scheduler[{self.exchange_id}]")
+        try:
+            await future
+        finally:
+            self.depth[priority] -= 1
+
+    async def dispatch(self):
+        while self.waiters:
+            self.refill()
+            priority, sequence, cost, future = self.waiters[0]
+            if future.done():
+                heapq.heappop(self.waiters)
+                continue
+            if self.tokens >= min(cost, self.capacity):
+                heapq.heappop(self.waiters)
+                self.tokens -= cost
+                future.set_result(None)
+                continue
+            await asyncio.sleep((min(cost, self.capacity) - self.tokens) / self.rate)
+
+    def cost(self, method, args):
+        if method in self.fixed_weights:
+            return self.weights[method]
+        return self.charged.get((method, bool(args and args[0])), self.weights.get(method, 1))
+
+    def settle(self, method, args, cost, costs):
+        if not costs:
+            return
+        charged = self.charged[(method, bool(args and args[0]))] = sum(costs)
+        if charged > cost:
+            self.refill()
+            self.tokens -= charged - cost
+
+    async def call(self, priority, method, *args, **kwargs):
+        cost = self.cost(method, args)
+        started = time.monotonic()
+        await self.acquire(priority, cost)
+        waited = time.monotonic() - started
+        self.wait_seconds[priority] += waited
+        metrics.inc('botxi_scheduler_wait_seconds_total', (('exchange', self.exchange_id), ('priority', priority)), waited)
+        status = 'error'
+        started = time.perf_counter()
+        costs = []
+        context = request_costs.set(costs)
+        tick = tick_timestamps.get()
+        if tick is not None and method in ('create_order', 'create_orders'):
+            metrics.observe('botxi_tick_to_order_seconds', (('exchange', self.exchange_id),), time.time() - tick, tick_to_order_buckets)
+        try:
+            result = await getattr(exchanges[self.exchange_id], method)(*args, **kwargs)
+            status = 'ok'
+            return result
+        except (ccxt.DDoSProtection, ccxt.RateLimitExceeded):
+            status = 'rate_limited'
+            self.rate_limited += 1
+            self.refill()
+            self.tokens = min(self.tokens, 0) - self.rate * self.penalty
+            exchange_logger.warning("Límite de peticiones alcanzado en %s, pausando %s segundos", self.exchange_id, self.penalty)
+            raise
+        finally:
+            request_costs.reset(context)
+            self.settle(method, args, cost, costs)
+            self.completed[priority] += 1
+            observe_exchange_call(self.exchange_id, method, started, status)
+
+    def metrics(self):
+        self.refill()
+        return {
+            'tokens': self.tokens if self.rate != float('inf') else None,
+            'rate': self.rate if self.rate != float('inf') else None,
+            'capacity': self.capacity if self.rate != float('inf') else None,
+            'queue_depth': dict(self.depth),
+            'max_queue_depth': dict(self.max_depth),
+            'completed': dict(self.completed),
+            'wait_seconds': dict(self.wait_seconds),
+            'rate_limited': self.rate_limited
+        }
+
+request_costs = contextvars.ContextVar('request_costs', default=None)
+tick_timestamps = contextvars.ContextVar('tick_timestamps', default=None)
+tick_to_order_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+def track_request_costs(exchange):
+    calculate = exchange.calculate_rate_limiter_cost
+
+    def tracked(api, method, path, params, config={}):
+        cost = calculate(api, method, path, params, config)
+        costs = request_costs.get()
+        if costs is not None:
+            costs.append(cost)
+        return cost
+
+    exchange.calculate_rate_limiter_cost = tracked
+    return exchange
+
+def get_request_scheduler(exchange_id):
+    scheduler = request_schedulers.get(exchange_id)
+    if scheduler is None:
+        settings = exchanges_config.get(exchange_id, {})
+        scheduler = request_schedulers[exchange_id] = RequestScheduler(
+            exchange_id,
+            rate=settings.get('rate_limit'),
+            burst=settings.get('rate_limit_burst'),
+            weights=settings.get('request_weights'),
+            share=settings.get('rate_limit_share', 1)
+        )
+    return scheduler
+
+def apply_exchange_tuning(exchange_id, old_data, new_data):
+    if exchange_id in request_schedulers and any(old_data.get(key) != new_data.get(key) for key in ('rate_limit', 'rate_limit_burst', 'request_weights', 'rate_limit_share')):
+        request_schedulers[exchange_id].configure(new_data.get('rate_limit'), new_data.get('rate_limit_burst'), new_data.get('request_weights'), new_data.get('rate_limit_share', 1))
+    hub = market_data_hubs.get(exchange_id)
+    if hub is not None:
+        hub.interval = new_data.get('poll_interval', 1)
+        hub.ohlcv_interval = new_data.get('ohlcv_interval', 60)
+    reconciler = order_reconcilers.get(exchange_id)
+    if reconciler is not None:
+        reconciler.interval = new_data.get('reconcile_interval', 2)
+
+async def exchange_request(exchange_id, priority, method, *args, **kwargs):
+    return await get_request_scheduler(exchange_id).call(priority, method, *args, **kwargs)
+
+def register_placed_order(exchange_id, symbol, side, amount, price, order):
+    orders_logger.info("Orden %s colocada en %s: %s", side, exchange_id, order)
+    if side == 'buy':
+        order['highest_price'] = order['price']
+    trade_record = {
+        'timestamp': datetime.now().isoformat(),
+        'exchange': exchange_id,
+        'symbol': symbol,
+        'side': side,
+        'amount': amount,
+        'price': price,
+        'order_id': order['id']
+    }
+    record_trade(exchange_id, symbol, trade_record)
+    open_orders[exchange_id][symbol].append(order)
+    save_trade_to_csv(trade_record, exchange_id)
+    return order
+
+async def place_order_async(symbol, side, amount, price, exchange_id, retries=3):
+    if not exchange_running_status[exchange_id]:
+        orders_logger.info("No se colocará la orden %s para %s en %s porque el exchange está detenido", side, symbol, exchange_id)
+        return None
+    for attempt in range(retries):
+        try:
+            order = await exchange_request(exchange_id, 'order', 'create_order', symbol, 'limit', side, amount, price)
+            return register_placed_order(exchange_id, symbol, side, amount, price, order)
+        except Exception as e:
+            orders_logger.info("Error al colocar la orden %s para %s en %s: %s", side, symbol, exchange_id, e)
+            if not exchange_running_status[exchange_id]:
+                orders_logger.info("El exchange %s ha sido detenido durante el intento de colocar la orden", exchange_id)
+                return None
+            record_retry(exchange_id, 'create_order', 2 ** attempt)
+            await asyncio.sleep(2 ** attempt)
+    orders_logger.error("No se pudo colocar la orden %s para %s en %s después de %s intentos", side, symbol, exchange_id, retries)
+    return None
+
+async def place_ladder_async(symbol, side, amount, prices, exchange_id, retries=3):
+    exchange = exchanges[exchange_id]
+    if not exchange.has.get('createOrders'):
+        orders = await asyncio.gather(*[place_order_async(symbol, side, amount, price, exchange_id, retries) for price in prices])
+        return [order for order in orders if order]
+    batch_limit = exchanges_config[exchange_id].get('batch_order_limit', 10)
+    placed = []
+    remaining = list(prices)
+    for attempt in range(retries):
+        if not exchange_running_status[exchange_id]:
+            orders_logger.info("No se colocarán órdenes %s para %s en %s porque el exchange está detenido", side, symbol, exchange_id)
+            return placed
+        batches = [remaining[i:i + batch_limit] for i in range(0, len(remaining), batch_limit)]
+        results = await asyncio.gather(*[
+            exchange_request(exchange_id, 'order', 'create_orders', [
+                {'symbol': symbol, 'type': 'limit', 'side': side, 'amount': amount, 'price': price} for price in batch
+            ]) for batch in batches
+        ], return_exceptions=True)
+        failed = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                orders_logger.info("Error al colocar %s órdenes %s en lote para %s en %s: %s", len(batch), side, symbol, exchange_id, result)
+                failed.extend(batch)
+                continue
+            for price, order in zip(batch, result):
+                if order.get('id') and order.get('status') not in ('rejected', 'canceled'):
+                    placed.append(register_placed_order(exchange_id, symbol, side, amount, price, order))
+                else:
+                    failed.append(price)
+            failed.extend(batch[len(result):])
+        if not failed:
+            return placed
+        remaining = failed
+        record_retry(exchange_id, 'create_orders', 2 ** attempt)
+        await asyncio.sleep(2 ** attempt)
+    orders_logger.error("No se pudieron colocar %s órdenes %s para %s en %s después de %s intentos", len(remaining), side, symbol, exchange_id, retries)
+    return placed
+
+finished_order_statuses = ('closed', 'canceled', 'expired', 'rejected')
+
+def tracked_order_ids(exchange_id):
+    return {order['id'] for book in (open_orders, pending_sells) for orders in book.get(exchange_id, {}).values() for order in orders}
+
+def get_order_state(exchange_id, order_id):
+    hub = market_data_hubs.get(exchange_id)
+    order_info = hub.streamed_order(order_id) if hub else None
+    if order_info is not None:
+        return order_info
+    reconciler = order_reconcilers.get(exchange_id)
+    return reconciler.order_states.get(order_id) if reconciler else None
+
+async def fetch_all_open_orders(exchange_id, symbols, partial=False):
+    if exchange_id not in symbol_scoped_open_orders:
+        try:
+            return await exchange_request(exchange_id, 'status', 'fetch_open_orders')
+        except ccxt.ArgumentsRequired:
+            symbol_scoped_open_orders.add(exchange_id)
+            orders_logger.info("%s requiere un símbolo para fetch_open_orders, consultando por símbolo", exchange_id)
+    limit = asyncio.Semaphore(exchanges_config.get(exchange_id, {}).get('open_orders_concurrency', 5))
+
+    async def fetch(symbol):
+        async with limit:
+            try:
+                return await exchange_request(exchange_id, 'status', 'fetch_open_orders', symbol)
+            except Exception as e:
+                if not partial:
+                    raise
+                orders_logger.error("Error al cargar órdenes abiertas para %s en %s: %s", symbol, exchange_id, e)
+                return []
+
+    results = await asyncio.gather(*[fetch(symbol) for symbol in symbols])
+    return [order for orders in results for order in orders]
+
+class OrderReconciler:
+    def __init__(self, exchange_id, interval=2):
+        self.exchange_id = exchange_id
+        self.interval = interval
+        self.order_states = {}
+        self.task = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run(), name=f"order_reconciler[{self.exchange_id}]")
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+
+    async def run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                orders_logger.error("Error al reconciliar órdenes en %s: %s", self.exchange_id, e)
+            await asyncio.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+    def tracked_orders(self):
+        tracked = {}
+        for book in (open_orders, pending_sells):
+            for symbol, orders in book.get(self.exchange_id, {}).items():
+                for order in orders:
+                    tracked[order['id']] = (symbol, order)
+        return tracked
+
+    async def reconcile(self):
+        tracked = self.tracked_orders()
+        self.order_states = {order_id: state for order_id, state in self.order_states.items() if order_id in tracked}
+        if not tracked:
+            return
+        symbols = sorted({symbol for symbol, order in tracked.values()})
+        open_list = await fetch_all_open_orders(self.exchange_id, symbols)
+        open_ids = set()
+        for order in open_list:
+            open_ids.add(order['id'])
+            if order['id'] in tracked:
+                self.order_states[order['id']] = order
+        missing = {
+            order_id: tracked[order_id] for order_id in tracked
+            if order_id not in open_ids and self.order_states.get(order_id, {}).get('status') not in finished_order_statuses
+        }
+        if not missing:
+            return
+        resolved = await self.fetch_closed(missing)
+        for order_id, (symbol, order) in missing.items():
+            order_info = resolved.get(order_id)
+            if order_info is None:
+                try:
+                    order_info = await exchange_request(self.exchange_id, 'status', 'fetch_order', order_id, symbol)
+                except Exception as e:
+                    orders_logger.error("Error al consultar la orden %s para %s en %s: %s", order_id, symbol, self.exchange_id, e)
+                    continue
+            previous = self.order_states.get(order_id, order)
+            self.order_states[order_id] = order_info
+            if order_info['status'] != previous.get('status'):
+                self.apply(symbol, order, order_info)
+
+    async def fetch_closed(self, missing):
+        exchange = exchanges[self.exchange_id]
+        if not exchange.has.get('fetchClosedOrders'):
+            return {}
+        timestamps = [order.get('timestamp') for symbol, order in missing.values() if order.get('timestamp')]
+        since = min(timestamps) if timestamps else None
+        try:
+            closed = await exchange_request(self.exchange_id, 'status', 'fetch_closed_orders', since=since)
+        except ccxt.ArgumentsRequired:
+            symbols = sorted({symbol for symbol, order in missing.values()})
+            results = await asyncio.gather(*[exchange_request(self.exchange_id, 'status', 'fetch_closed_orders', symbol, since=since) for symbol in symbols], return_exceptions=True)
+            closed = [order for orders in results if not isinstance(orders, Exception) for order in orders]
+        return {order['id']: order for order in closed if order['id'] in missing}
+
+    def apply(self, symbol, order, order_info):
+        status = order_info['status']
+        if status == 'closed':
+            event_type = 'fill'
+        elif status in ('canceled', 'expired', 'rejected'):
+            event_type = 'cancel'
+        else:
+            return
+        side = order_info.get('side', order.get('side'))
+        if side == 'sell' and order in pending_sells[self.exchange_id][symbol]:
+            pending_sells[self.exchange_id][symbol].remove(order)
+        if event_type == 'fill':
+            record_order_fill(self.exchange_id, symbol, order_info, order.get('side'))
+        actions_log.append(f"{datetime.now().strftime('%H:%M:%S')} {self.exchange_id} {event_type} {side} {symbol} {order_info['id']}")
+
+def get_order_reconciler(exchange_id):
+    reconciler = order_reconcilers.get(exchange_id)
+    if reconciler is None:
+        reconciler = OrderReconciler(exchange_id, interval=exchanges_config.get(exchange_id, {}).get('reconcile_interval', 2))
+        order_reconcilers[exchange_id] = reconciler
+    return reconciler
+
+async def stop_order_reconciler(exchange_id):
+    reconciler = order_reconcilers.pop(exchange_id, None)
+    if reconciler:
+        await reconciler.stop()
+
+async def manage_open_buy_orders(exchange_id, symbol, order_timeout, take_profit):
+    current_time = time.time()
+    for order in list(open_orders[exchange_id][symbol]):
+        order_info = get_order_state(exchange_id, order['id'])
+        if order_info is None:
+            continue
+        if order_info['status'] == 'closed' and order_info.get('side', order.get('side')) == 'sell':
+            open_orders[exchange_id][symbol].remove(order)
+        elif order_info['status'] == 'closed':
+            await settle_filled_buy(exchange_id, symbol, order_info, take_profit)
+            open_orders[exchange_id][symbol].remove(order)
+        elif order_info['status'] == 'open' and order_info['side'] == 'buy':
+            order_age = current_time - (order_info['timestamp'] / 1000)
+            if order_age > order_timeout:
                 try:
                     await cancel_order_async(order['id'], symbol, exchange_id)
-                    logging.info(f"Orden de compra {order['id']} cancelada en {exchange_id} para {symbol} después de {order_timeout} segundos")
+                    orders_logger.info("Orden de compra %s cancelada en %s para %s después de %s segundos", order['id'], exchange_id, symbol, order_timeout)
                 except Exception as e:
-                    logging.error(f"Error al cancelar la orden {order['id']} para {symbol} en {exchange_id}: {e}")
+                    orders_logger.error("Error al cancelar la orden %s para %s en %s: %s", order['id'], symbol, exchange_id, e)
                 finally:
                     open_orders[exchange_id][symbol].remove(order)
+        elif order_info['status'] in ('canceled', 'expired', 'rejected'):
+            orders_logger.info("Orden %s para %s en %s ya no está activa: %s", order['id'], symbol, exchange_id, order_info['status'])
+            open_orders[exchange_id][symbol].remove(order)
+
+async def settle_filled_buy(exchange_id, symbol, order_info, take_profit, amount=None):
+    amount = amount or order_info['amount']
+    orders_logger.info("Orden de compra ejecutada para %s en %s: %s", symbol, exchange_id, order_info)
+    record_order_fill(exchange_id, symbol, order_info, 'buy')
+    record_trade(exchange_id, symbol, {
+        'timestamp': datetime.now().isoformat(),
+        'exchange': exchange_id,
+        'symbol': symbol,
+        'side': 'buy',
+        'amount': amount,
+        'price': order_info['price'],
+        'order_id': order_info['id']
+    })
+    sell_order = None
+    if take_profit is not None:
+        sell_price = order_info['price'] * (1 + take_profit)
+        sell_order = await place_order_async(symbol, 'sell', amount, sell_price, exchange_id)
+    if sell_order:
+        orders_logger.info("Orden de venta colocada para %s en %s: %s", symbol, exchange_id, sell_order)
+        pending_sells[exchange_id][symbol].append(sell_order)
+    else:
+        orders_logger.error("Error al colocar la orden de venta para %s en %s, la compra %s queda pendiente de venta", symbol, exchange_id, order_info['id'])
+        pending_sells[exchange_id][symbol].append(dict(order_info, amount=amount))
 
 async def place_sell_orders(exchange_id, symbol, take_profit):
     for buy_order in list(pending_sells[exchange_id][symbol]):
@@ -829,26 +1938,12 @@ async def place_sell_orders(exchange_id, symbol, take_profit):
             try:
                 sell_order = await place_order_async(symbol, 'sell', buy_order['amount'], sell_price, exchange_id)
                 if sell_order:
-                    logging.info(f"Orden de venta colocada para {symbol} en {exchange_id}: {sell_order}")
+                    orders_logger.info("Orden de venta colocada para %s en %s: %s", symbol, exchange_id, sell_order)
                     pending_sells[exchange_id][symbol].remove(buy_order)
                 else:
-                    logging.error(f"Error al colocar la orden de venta para {symbol} en {exchange_id}")
+                    orders_logger.error("Error al colocar la orden de venta para %s en %s", symbol, exchange_id)
             except Exception as e:
-                logging.error(f"Error al intentar colocar la orden de venta para {symbol} en {exchange_id}: {e}")
-
-async def cancel_pending_buy_orders(exchange_id, symbol, order_timeout):
-    current_time = time.time()
-    for order in list(open_orders[exchange_id][symbol]):
-        if order['side'] == 'buy':
-            order_info = await exchanges[exchange_id].fetch_order(order['id'], symbol)
-            order_age = current_time - (order_info['timestamp'] / 1000)
-            if order_info['status'] == 'open' and order_age > order_timeout:
-                try:
-                    await cancel_order_async(order['id'], symbol, exchange_id)
-                    open_orders[exchange_id][symbol].remove(order)
-                    logging.info(f"Orden de compra {order['id']} cancelada en {exchange_id} para {symbol} después de {order_timeout} segundos")
-                except Exception as e:
-                    logging.error(f"Error al cancelar la orden {order['id']} para {symbol} en {exchange_id}: {e}")
+                orders_logger.error("Error al intentar colocar la orden de venta para %s en %s: %s", symbol, exchange_id, e)
 
 async def close_account_open_orders(exchange_id):
     tasks = []
@@ -858,7 +1953,7 @@ async def close_account_open_orders(exchange_id):
                 tasks.append(cancel_order_async(order['id'], symbol, exchange_id))
                 orders.remove(order)
     await asyncio.gather(*tasks)
-    logging.info(f"Todas las órdenes de compra abiertas han sido cerradas para {exchange_id}")
+    orders_logger.info("Todas las órdenes de compra abiertas han sido cerradas para %s", exchange_id)
 
 async def cancel_account_pending_buys(exchange_id):
     tasks = []
@@ -868,66 +1963,180 @@ async def cancel_account_pending_buys(exchange_id):
                 tasks.append(cancel_order_async(order['id'], symbol, exchange_id))
                 orders.remove(order)
     await asyncio.gather(*tasks)
-    logging.info(f"Todas las órdenes de compra pendientes han sido canceladas para {exchange_id}")
+    orders_logger.info("Todas las órdenes de compra pendientes han sido canceladas para %s", exchange_id)
+
+async def cancel_symbol_pending_buys(exchange_id, symbol, take_profit=None):
+    tasks = []
+    for book in (open_orders, pending_sells):
+        orders = book.get(exchange_id, {}).get(symbol, ())
+        for order in list(orders):
+            if order['side'] == 'buy' and order.get('status', 'open') == 'open':
+                tasks.append(cancel_tracked_buy(exchange_id, symbol, orders, order, take_profit))
+    await asyncio.gather(*tasks)
+    orders_logger.info("Órdenes de compra pendientes canceladas para %s en %s", symbol, exchange_id)
+
+async def cancel_tracked_buy(exchange_id, symbol, orders, order, take_profit):
+    try:
+        order_info = await exchange_request(exchange_id, 'cancel', 'cancel_order', order['id'], symbol)
+        orders_logger.info("Orden de compra cancelada: %s para %s en %s", order['id'], symbol, exchange_id)
+    except Exception as e:
+        orders_logger.warning("No se pudo cancelar la orden %s para %s en %s, consultando su estado: %s", order['id'], symbol, exchange_id, e)
+        try:
+            order_info = await exchange_request(exchange_id, 'status', 'fetch_order', order['id'], symbol)
+        except Exception as e:
+            orders_logger.error("Error al consultar la orden %s para %s en %s, se mantiene en seguimiento: %s", order['id'], symbol, exchange_id, e)
+            return
+    order_info = order_info or {}
+    status = order_info.get('status', 'canceled')
+    if status == 'open':
+        orders_logger.error("La orden %s para %s en %s sigue abierta, se mantiene en seguimiento", order['id'], symbol, exchange_id)
+        return
+    if order in orders:
+        orders.remove(order)
+    filled = order_info.get('filled') or (order_info.get('amount') if status == 'closed' else 0)
+    if filled:
+        await settle_filled_buy(exchange_id, symbol, dict(order, **{key: value for key, value in order_info.items() if value is not None}), take_profit, filled)
+
+def markets_cache_path(exchange):
+    return os.path.join(markets_cache_settings.get('directory', 'cache'), f"markets-{exchange.id}.json")
+
+def read_markets_cache(path):
+    try:
+        with open(path) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+def write_markets_cache(path, markets, currencies):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, 'w') as cache_file:
+        json.dump({'timestamp': time.time(), 'markets': markets, 'currencies': currencies}, cache_file, default=str)
+    os.replace(temporary, path)
+
+async def fetch_markets_async(exchange_id, exchange, reload=False):
+    started = time.perf_counter()
+    status = 'error'
+    try:
+        markets = await exchange.load_markets(reload)
+        status = 'ok'
+        return markets
+    finally:
+        observe_exchange_call(exchange_id, 'load_markets', started, status)
+
+async def refresh_markets_cache(exchange_id, exchange, path):
+    try:
+        await fetch_markets_async(exchange_id, exchange, reload=True)
+        await asyncio.get_running_loop().run_in_executor(None, write_markets_cache, path, exchange.markets, exchange.currencies)
+        market_logger.info("Caché de mercados actualizada para %s", exchange_id)
+    except Exception as e:
+        market_logger.error("Error al actualizar la caché de mercados para %s: %s", exchange_id, e)
+
+async def load_markets_async(exchange_id):
+    exchange = exchanges[exchange_id]
+    ttl = markets_cache_settings.get('ttl', 3600)
+    if not ttl or not isinstance(exchange, ccxt_async.Exchange):
+        return await fetch_markets_async(exchange_id, exchange)
+    loop = asyncio.get_running_loop()
+    path = markets_cache_path(exchange)
+    cached = await loop.run_in_executor(None, read_markets_cache, path)
+    if cached:
+        exchange.set_markets(cached['markets'], cached.get('currencies'))
+        if time.time() - cached['timestamp'] > ttl:
+            asyncio.create_task(refresh_markets_cache(exchange_id, exchange, path), name=f"refresh_markets[{exchange_id}]")
+        return exchange.markets
+    markets = await fetch_markets_async(exchange_id, exchange)
+    await loop.run_in_executor(None, write_markets_cache, path, exchange.markets, exchange.currencies)
+    return markets
 
 async def initialize_exchanges():
-    for exchange_id, creds in exchanges_config.items():
-        if creds.get('active', False):
-            try:
-                await initialize_exchange(exchange_id)
-                logging.warning(f"Exchange {exchange_id} inicializado correctamente")
-            except Exception as e:
-                logging.error(f"Error al inicializar {exchange_id}: {e}")
+    exchange_ids = [exchange_id for exchange_id, creds in exchanges_config.items() if creds.get('active', False)]
+    results = await asyncio.gather(*(initialize_exchange(exchange_id) for exchange_id in exchange_ids), return_exceptions=True)
+    for exchange_id, result in zip(exchange_ids, results):
+        if isinstance(result, Exception):
+            exchange_logger.error("Error al inicializar %s: %s", exchange_id, result)
+        elif connection_status.get(exchange_id) == 'Connected':
+            exchange_logger.warning("Exchange %s inicializado correctamente", exchange_id)
 
 async def initialize_exchange(exchange_id):
     creds = exchanges_config[exchange_id]
     if creds.get('active', False):
+        request_schedulers.pop(exchange_id, None)
         try:
-            exchange_class = getattr(ccxt_async, creds['name'])
+            if creds['name'] == 'simulated':
+                exchanges[exchange_id] = SimulatedExchange(creds.get('simulation', {}), creds.get('symbols', []))
+                await load_markets_async(exchange_id)
+                connection_status[exchange_id] = 'Connected'
+                exchange_logger.warning("Exchange simulado %s iniciado con %s símbolos.", exchange_id, len(exchanges[exchange_id].symbols))
+                await load_pending_orders(exchange_id)
+                return
+            if creds.get('streaming', False) and ccxt_pro is not None and hasattr(ccxt_pro, creds['name']):
+                exchange_class = getattr(ccxt_pro, creds['name'])
+            else:
+                exchange_class = getattr(ccxt_async, creds['name'])
             exchange_params = {
                 'apiKey': creds['api_key'],
                 'secret': creds['secret'],
-                'enableRateLimit': True
+                'enableRateLimit': True,
+                'options': {'warnOnFetchOpenOrdersWithoutSymbol': False}
             }
             if 'password' in creds:
                 exchange_params['password'] = creds['password']
-            exchanges[exchange_id] = exchange_class(exchange_params)
-            await exchanges[exchange_id].load_markets()
+            exchanges[exchange_id] = track_request_costs(exchange_class(exchange_params))
+            await load_markets_async(exchange_id)
             connection_status[exchange_id] = 'Connected'
-            logging.warning(f"Exchange {exchange_id} conectado exitosamente.")
+            exchange_logger.warning("Exchange %s conectado exitosamente.", exchange_id)
             await load_pending_orders(exchange_id)
         except Exception as e:
-            logging.error(f"Error al inicializar el exchange {exchange_id}: {e}")
+            exchange_logger.error("Error al inicializar el exchange %s: %s", exchange_id, e)
             connection_status[exchange_id] = 'Disconnected'
-        await asyncio.sleep(1)
 
 async def load_pending_orders(exchange_id):
-    exchange = exchanges[exchange_id]
-    for symbol in exchanges_config[exchange_id]['symbols']:
-        try:
-            open_orders_list = await exchange.fetch_open_orders(symbol)
-            for order in open_orders_list:
-                if 'highest_price' not in order:
-                    order['highest_price'] = order['price']
-                if order['side'] == 'sell':
-                    pending_sells[exchange_id][symbol].append(order)
-                elif order['side'] == 'buy':
-                    open_orders[exchange_id][symbol].append(order)
-            pending_sells_count = len(pending_sells[exchange_id][symbol])
-            logging.warning(f"Cargadas {pending_sells_count} órdenes de venta pendientes para {symbol} en {exchange_id}")
-            deactivate_token_if_needed(exchange_id, symbol)
-        except Exception as e:
-            logging.error(f"Error al cargar órdenes pendientes para {symbol} en {exchange_id}: {e}")
+    symbols = exchanges_config[exchange_id]['symbols']
+    try:
+        open_orders_list = await fetch_all_open_orders(exchange_id, symbols, partial=True)
+    except Exception as e:
+        orders_logger.error("Error al cargar órdenes pendientes en %s: %s", exchange_id, e)
+        return
+    books = {'buy': open_orders[exchange_id], 'sell': pending_sells[exchange_id]}
+    known = {order['id'] for book in books.values() for orders in book.values() for order in orders}
+    loaded = {'buy': 0, 'sell': 0}
+    for order in open_orders_list:
+        book = books.get(order['side'])
+        if book is None or order['symbol'] not in book or order['id'] in known:
+            continue
+        if 'highest_price' not in order:
+            order['highest_price'] = order['price']
+        book[order['symbol']].append(order)
+        known.add(order['id'])
+        loaded[order['side']] += 1
+    count_pending_sell_orders.cache_clear()
+    for symbol in symbols:
+        deactivate_token_if_needed(exchange_id, symbol)
+    orders_logger.warning("Cargadas %s órdenes de compra y %s de venta pendientes para %s símbolos en %s", loaded['buy'], loaded['sell'], len(symbols), exchange_id)
 
 async def shutdown_bot():
-    logging.warning("Cerrando bot y todas las sesiones de cliente...")
+    exchange_logger.warning("Cerrando bot y todas las sesiones de cliente...")
+    for exchange_id in list(market_data_hubs):
+        await stop_market_data_hub(exchange_id)
+    for exchange_id in list(order_reconcilers):
+        await stop_order_reconciler(exchange_id)
+    if training_service is not None:
+        await training_service.stop()
+    if trade_journal is not None:
+        await asyncio.get_running_loop().run_in_executor(None, trade_journal.close)
+    if state_store is not None:
+        state_store.snapshot()
+        await asyncio.get_running_loop().run_in_executor(None, state_store.close)
     tasks = []
     for exchange_id, exchange in exchanges.items():
         if exchange:
             tasks.append(exchange.close())
     if tasks:
         await asyncio.gather(*tasks)
-    logging.warning("Todas las sesiones de cliente han sido cerradas.")
+    for exchange_id in exchanges:
+        connection_status[exchange_id] = 'Disconnected'
+    exchange_logger.warning("Todas las sesiones de cliente han sido cerradas.")
 
 async def reconnect_exchanges():
     while True:
@@ -940,7 +2149,7 @@ async def reconnect_exchange(exchange_id):
         try:
             await initialize_exchange(exchange_id)
         except Exception as e:
-            logging.error(f"Error al reconectar el exchange {exchange_id}: {e}")
+            exchange_logger.error("Error al reconectar el exchange %s: %s", exchange_id, e)
     await asyncio.sleep(1)
 
 def validate_data(data):
@@ -948,205 +2157,2674 @@ def validate_data(data):
         raise ValueError("Data is empty or None")
     return True
 
-async def fetch_ohlcv_async(symbol, exchange_id, timeframe='1h', limit=500, retries=5):
+async def fetch_ohlcv_raw_async(symbol, exchange_id, timeframe='1h', since=None, limit=500, retries=5):
     for attempt in range(retries):
         try:
-            data = await exchanges[exchange_id].fetch_ohlcv(symbol, timeframe, limit=limit)
+            data = await exchange_request(exchange_id, 'market_data', 'fetch_ohlcv', symbol, timeframe, since=since, limit=limit)
             if not data:
                 raise ValueError("Received empty data")
-            df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            logging.info(f"OHLCV data fetched for {symbol} on {exchange_id}: {df.tail()}")
-            return df
+            return data
         except (ccxt.NetworkError, ccxt.ExchangeError) as e:
-            logging.error(f"Error fetching OHLCV data for {symbol} on {exchange_id}: {e}")
+            market_logger.error("Error fetching OHLCV data for %s on %s: %s", symbol, exchange_id, e)
             if attempt == retries - 1:
                 raise
+            record_retry(exchange_id, 'fetch_ohlcv', 2 ** attempt)
             await asyncio.sleep(2 ** attempt)
 
+class CandleStore:
+    columns = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, exchange_id, symbol, timeframe='1h', capacity=1000):
+        self.exchange_id = exchange_id
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.capacity = capacity
+        self.buffer = np.zeros((capacity, len(self.columns)), dtype=np.float64)
+        self.start = 0
+        self.size = 0
+        self.lock = asyncio.Lock()
+
+    def last_timestamp(self):
+        if not self.size:
+            return None
+        return int(self.buffer[(self.start + self.size - 1) % self.capacity, 0])
+
+    def append(self, candles):
+        for candle in candles:
+            timestamp = candle[0]
+            last_timestamp = self.last_timestamp()
+            if last_timestamp is not None and timestamp < last_timestamp:
+                continue
+            if last_timestamp is not None and timestamp == last_timestamp:
+                index = (self.start + self.size - 1) % self.capacity
+            elif self.size < self.capacity:
+                index = (self.start + self.size) % self.capacity
+                self.size += 1
+            else:
+                index = self.start
+                self.start = (self.start + 1) % self.capacity
+            self.buffer[index] = [np.nan if value is None else value for value in candle[:len(self.columns)]]
+
+    def merge_price(self, price):
+        if not self.size or price is None:
+            return
+        row = self.buffer[(self.start + self.size - 1) % self.capacity]
+        row[4] = price
+        row[2] = max(row[2], price)
+        row[3] = min(row[3], price)
+
+    def array(self, limit=None):
+        count = self.size if limit is None else min(limit, self.size)
+        indices = (self.start + self.size - count + np.arange(count)) % self.capacity
+        return self.buffer[indices]
+
+    def row(self, offset):
+        if offset >= self.size:
+            return None
+        values = self.buffer[(self.start + self.size - 1 - offset) % self.capacity]
+        candle = dict(zip(self.columns, values.tolist()))
+        candle['timestamp'] = int(candle['timestamp'])
+        return candle
+
+    def latest(self):
+        return self.row(0)
+
+    def to_dataframe(self, limit=None):
+        df = pd.DataFrame(self.array(limit), columns=list(self.columns))
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype('int64'), unit='ms')
+        return df
+
+    async def update(self, limit=500, retries=5):
+        async with self.lock:
+            since = self.last_timestamp()
+            data = await fetch_ohlcv_raw_async(self.symbol, self.exchange_id, self.timeframe, since=since, limit=None if since else limit, retries=retries)
+            self.append(data)
+            return len(data)
+
+def get_candle_store(exchange_id, symbol, timeframe='1h'):
+    key = (exchange_id, symbol, timeframe)
+    store = candle_stores.get(key)
+    if store is None:
+        store = CandleStore(exchange_id, symbol, timeframe)
+        candle_stores[key] = store
+    return store
+
+def get_model_filename(exchange_id, symbol):
+    return f'price_prediction_model_{exchange_id}_{symbol.replace("/", "_")}.pkl'
+
+class ModelRegistry:
+    def __init__(self, directory='models', cache_size=32, mmap_threshold=50 * 1024 * 1024, keep_versions=3):
+        self.directory = directory
+        self.index_file = os.path.join(directory, 'registry.json')
+        self.cache_size = cache_size
+        self.mmap_threshold = mmap_threshold
+        self.keep_versions = keep_versions
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.entries = self.load_index()
+
+    @staticmethod
+    def cache_key(entry):
+        return (entry['exchange'], entry['symbol'], entry['feature_set'], entry['version'])
+
+    def load_index(self):
+        if not os.path.exists(self.index_file):
+            return []
+        try:
+            with open(self.index_file, 'r') as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError) as e:
+            model_logger.error("Error al leer el registro de modelos %s: %s", self.index_file, e)
+            return []
+
+    def save_index(self, exchange_id, symbol, feature_set):
+        os.makedirs(self.directory, exist_ok=True)
+        key = (exchange_id, symbol, feature_set)
+        with open(os.path.join(self.directory, 'registry.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = [entry for entry in self.load_index() if (entry['exchange'], entry['symbol'], entry['feature_set']) != key]
+            entries.extend(entry for entry in self.entries if (entry['exchange'], entry['symbol'], entry['feature_set']) == key)
+            self.entries = entries
+            temp_file = f"{self.index_file}.{os.getpid()}.tmp"
+            with open(temp_file, 'w') as index_file:
+                json.dump(self.entries, index_file, indent=2)
+            os.replace(temp_file, self.index_file)
+
+    def versions(self, exchange_id, symbol, feature_set=default_feature_set):
+        return sorted(
+            (entry for entry in self.entries if entry['exchange'] == exchange_id and entry['symbol'] == symbol and entry['feature_set'] == feature_set),
+            key=lambda entry: entry['version']
+        )
+
+    def latest(self, exchange_id, symbol, feature_set=default_feature_set):
+        with self.lock:
+            versions = self.versions(exchange_id, symbol, feature_set)
+        return versions[-1] if versions else None
+
+    def register(self, exchange_id, symbol, model, metadata=None, feature_set=default_feature_set):
+        with self.lock:
+            versions = self.versions(exchange_id, symbol, feature_set)
+            version = versions[-1]['version'] + 1 if versions else 1
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{exchange_id}_{symbol.replace('/', '_')}_{feature_set}_v{version}.pkl")
+            joblib.dump(model, path)
+            entry = dict(metadata or {})
+            entry.update({
+                'exchange': exchange_id,
+                'symbol': symbol,
+                'feature_set': feature_set,
+                'version': version,
+                'path': path,
+                'size': os.path.getsize(path),
+                'trained_at': entry.get('trained_at', time.time())
+            })
+            self.entries.append(entry)
+            self.prune(exchange_id, symbol, feature_set)
+            self.save_index(exchange_id, symbol, feature_set)
+            self.cache_put(entry, model)
+        model_logger.warning("Modelo v%s registrado para %s en %s (%s bytes)", version, symbol, exchange_id, entry['size'])
+        return entry
+
+    def import_legacy(self, exchange_id, symbol, path, feature_set=default_feature_set):
+        if not os.path.exists(path):
+            return None
+        entry = {
+            'exchange': exchange_id,
+            'symbol': symbol,
+            'feature_set': feature_set,
+            'version': 0,
+            'path': path,
+            'size': os.path.getsize(path),
+            'trained_at': os.path.getmtime(path),
+            'legacy': True
+        }
+        with self.lock:
+            self.entries.append(entry)
+            self.save_index(exchange_id, symbol, feature_set)
+        return entry
+
+    def load(self, entry):
+        key = self.cache_key(entry)
+        with self.lock:
+            model = self.cache.get(key)
+            if model is not None:
+                self.cache.move_to_end(key)
+                return model
+        mmap_mode = 'r' if entry.get('size', 0) >= self.mmap_threshold else None
+        model = joblib.load(entry['path'], mmap_mode=mmap_mode)
+        with self.lock:
+            self.cache_put(entry, model)
+        return model
+
+    def cache_put(self, entry, model):
+        key = self.cache_key(entry)
+        self.cache[key] = model
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def prune(self, exchange_id, symbol, feature_set):
+        versions = self.versions(exchange_id, symbol, feature_set)
+        for entry in versions[:-self.keep_versions]:
+            self.entries.remove(entry)
+            self.cache.pop(self.cache_key(entry), None)
+            if not entry.get('legacy'):
+                try:
+                    os.remove(entry['path'])
+                except OSError as e:
+                    model_logger.error("Error al eliminar el modelo %s: %s", entry['path'], e)
+
+def get_model_registry():
+    global model_registry
+    if model_registry is None:
+        model_registry = ModelRegistry(**model_registry_settings)
+    return model_registry
+
+def load_saved_model(symbol, exchange_id):
+    registry = get_model_registry()
+    entry = registry.latest(exchange_id, symbol)
+    if entry is None:
+        entry = registry.import_legacy(exchange_id, symbol, get_model_filename(exchange_id, symbol))
+    if entry is None:
+        model_logger.warning("Archivo de modelo no encontrado para %s en %s. Entrenando un nuevo modelo", symbol, exchange_id)
+        return None, True, None
+    try:
+        model = registry.load(entry)
+    except Exception as e:
+        model_logger.warning("Error al cargar el modelo existente para %s en %s, intentando reentrenar: %s", symbol, exchange_id, e)
+        return None, True, None
+    if time.time() - entry['trained_at'] > retrain_interval:
+        model_logger.warning("El modelo para %s en %s está desactualizado. Reentrenando...", symbol, exchange_id)
+        return model, True, entry
+    model_logger.warning("Modelo v%s cargado desde el registro para %s en %s", entry['version'], symbol, exchange_id)
+    return model, False, entry
+
+def fit_price_model(data, n_jobs=-1):
+    from sklearn.model_selection import train_test_split, RandomizedSearchCV
+    from sklearn.ensemble import RandomForestRegressor
+    from scipy.stats import randint
+    data = data.tail(1000).copy()
+    data['target'] = data['close'].shift(-1)
+    data.dropna(inplace=True)
+    X = data[['open', 'high', 'low', 'close', 'volume']]
+    y = data['target']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    param_distributions = {
+        'n_estimators': randint(100, 500),
+        'max_depth': randint(10, 110),
+        'min_samples_split': randint(2, 21),
+        'min_samples_leaf': randint(1, 11),
+        'bootstrap': [True, False]
+    }
+    rf = RandomForestRegressor(random_state=42)
+    random_search = RandomizedSearchCV(
+        estimator=rf,
+        param_distributions=param_distributions,
+        n_iter=50,
+        cv=5,
+        verbose=0,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    started = time.time()
+    random_search.fit(X_train, y_train)
+    best_model = random_search.best_estimator_
+    metadata = {
+        'window_start': str(data['timestamp'].iloc[0]) if 'timestamp' in data else None,
+        'window_end': str(data['timestamp'].iloc[-1]) if 'timestamp' in data else None,
+        'rows': len(data),
+        'cv_score': float(random_search.best_score_),
+        'score': float(best_model.score(X_test, y_test)),
+        'train_seconds': time.time() - started,
+        'params': {name: value.item() if hasattr(value, 'item') else value for name, value in random_search.best_params_.items()}
+    }
+    return best_model, metadata
+
 def train_model(data, symbol, exchange_id):
-    model_filename = f'price_prediction_model_{exchange_id}_{symbol.replace("/", "_")}.pkl'
-    retrain_interval = 7 * 24 * 60 * 60
-    should_retrain = False
-    if os.path.exists(model_filename):
-        model_age = time.time() - os.path.getmtime(model_filename)
-        if model_age > retrain_interval:
-            logging.warning(f"El modelo para {symbol} en {exchange_id} está desactualizado. Reentrenando...")
-            should_retrain = True
+    model, should_retrain, entry = load_saved_model(symbol, exchange_id)
+    if not should_retrain:
+        return model
+    try:
+        best_model, metadata = fit_price_model(data)
+        get_model_registry().register(exchange_id, symbol, best_model, metadata)
+        model_logger.info("Modelo entrenado y guardado en archivo para %s en %s", symbol, exchange_id)
+        return best_model
+    except Exception as e:
+        model_logger.error("Error durante el reentrenamiento del modelo para %s en %s: %s", symbol, exchange_id, e)
+        if model is None:
+            raise
+        model_logger.info("Continuando con el modelo anterior.")
+        return model
+
+class FallbackModel:
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64)[:, 3]
+
+class TrainingService:
+    def __init__(self, max_workers=1, cpus=None, retry_delay=60, max_retry_delay=3600, stop_timeout=5):
+        self.max_workers = max(1, max_workers)
+        self.cpus = cpus
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.stop_timeout = stop_timeout
+        self.executor = None
+        self.queue = None
+        self.workers = []
+        self.pending = set()
+        self.trained_at = {}
+        self.failures = {}
+        self.retries = {}
+        self.counter = itertools.count()
+
+    def start(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+            self.queue = asyncio.PriorityQueue()
+            self.workers = [asyncio.create_task(self.worker(), name="training_worker") for _ in range(self.max_workers)]
+
+    async def stop(self):
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        for handle in self.retries.values():
+            handle.cancel()
+        self.retries.clear()
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            processes = list((executor._processes or {}).values())
+            executor.shutdown(wait=False, cancel_futures=True)
+            deadline = time.monotonic() + self.stop_timeout
+            while any(process.is_alive() for process in processes) and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            busy = [process for process in processes if process.is_alive()]
+            for process in busy:
+                process.kill()
+            if busy:
+                model_logger.warning("Terminados %s procesos de entrenamiento que seguían ocupados tras %s segundos", len(busy), self.stop_timeout)
+                await asyncio.get_running_loop().run_in_executor(None, lambda: [process.join() for process in busy])
+        self.pending.clear()
+
+    def submit(self, exchange_id, symbol, data, priority=1):
+        key = (exchange_id, symbol)
+        if key in self.pending:
+            return False
+        self.start()
+        self.pending.add(key)
+        self.queue.put_nowait((priority, next(self.counter), exchange_id, symbol, data))
+        model_logger.warning("Entrenamiento en cola para %s en %s (prioridad %s)", symbol, exchange_id, priority)
+        return True
+
+    def retry(self, priority, exchange_id, symbol, data):
+        self.retries.pop((exchange_id, symbol), None)
+        if self.executor is not None:
+            self.queue.put_nowait((priority, next(self.counter), exchange_id, symbol, data))
         else:
+            self.pending.discard((exchange_id, symbol))
+
+    def needs_retrain(self, exchange_id, symbol):
+        trained_at = self.trained_at.get((exchange_id, symbol))
+        return trained_at is not None and time.time() - trained_at > retrain_interval and (exchange_id, symbol) not in self.pending
+
+    async def worker(self):
+        loop = asyncio.get_running_loop()
+        n_jobs = max(1, (self.cpus or os.cpu_count() or 1) // self.max_workers)
+        while True:
+            priority, _, exchange_id, symbol, data = await self.queue.get()
+            started = time.time()
             try:
-                best_model = joblib.load(model_filename)
-                logging.warning(f"Modelo cargado desde el archivo existente para {symbol} en {exchange_id}")
-                return best_model
-            except:
-                logging.warning(f"Error al cargar el modelo existente, intentando reentrenar...")
-                should_retrain = True
-    else:
-        logging.warning(f"Archivo de modelo no encontrado para {symbol} en {exchange_id}. Entrenando un nuevo modelo")
-        should_retrain = True
+                model, metadata = await loop.run_in_executor(self.executor, fit_price_model, data, n_jobs)
+                entry = await loop.run_in_executor(None, get_model_registry().register, exchange_id, symbol, model, metadata)
+                models.setdefault(exchange_id, {})[symbol] = model
+                self.trained_at[(exchange_id, symbol)] = entry['trained_at']
+                self.failures.pop((exchange_id, symbol), None)
+                self.pending.discard((exchange_id, symbol))
+                model_logger.warning("Modelo entrenado para %s en %s en %.1f segundos", symbol, exchange_id, time.time() - started)
+            except Exception as e:
+                failures = self.failures[(exchange_id, symbol)] = self.failures.get((exchange_id, symbol), 0) + 1
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (failures - 1))
+                model_logger.error("Error durante el reentrenamiento del modelo para %s en %s (intento %s), reintentando en %s segundos: %s", symbol, exchange_id, failures, delay, e)
+                self.retries[(exchange_id, symbol)] = loop.call_later(delay, self.retry, priority, exchange_id, symbol, data)
+            finally:
+                self.queue.task_done()
+
+def get_training_service():
+    global training_service
+    if training_service is None:
+        training_service = TrainingService(max_workers=training_workers, cpus=sharding_settings.get('training_cpus'))
+    return training_service
+
+async def prepare_model(exchange_id, symbol, data):
+    loop = asyncio.get_running_loop()
+    model, should_retrain, entry = await loop.run_in_executor(None, load_saved_model, symbol, exchange_id)
+    service = get_training_service()
+    if entry is not None:
+        service.trained_at[(exchange_id, symbol)] = entry['trained_at']
     if should_retrain:
-        try:
-            data = data.tail(1000)
-            data['target'] = data['close'].shift(-1)
-            data.dropna(inplace=True)
-            X = data[['open', 'high', 'low', 'close', 'volume']]
-            y = data['target']
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            param_distributions = {
-                'n_estimators': randint(100, 500),
-                'max_depth': randint(10, 110),
-                'min_samples_split': randint(2, 21),
-                'min_samples_leaf': randint(1, 11),
-                'bootstrap': [True, False]
-            }
-            rf = RandomForestRegressor(random_state=42)
-            random_search = RandomizedSearchCV(
-                estimator=rf,
-                param_distributions=param_distributions,
-                n_iter=50,
-                cv=5,
-                verbose=0,
-                random_state=42,
-                n_jobs=-1
-            )
-            random_search.fit(X_train, y_train)
-            best_model = random_search.best_estimator_
-            joblib.dump(best_model, model_filename)
-            logging.info(f"Modelo entrenado y guardado en archivo para {symbol} en {exchange_id}")
-        except Exception as e:
-            logging.error(f"Error durante el reentrenamiento del modelo para {symbol} en {exchange_id}: {e}")
-            logging.info(f"Continuando con el modelo anterior.")
-    return best_model if 'best_model' in locals() else joblib.load(model_filename)
-
-async def get_market_prices_async(exchange_id, retries=5):
-    active_symbols_exchanges = get_active_symbols_and_exchanges()
-    symbols = active_symbols_exchanges.get(exchange_id, [])
-    if not symbols:
-        return {}
+        service.submit(exchange_id, symbol, data, priority=0 if model is None else 1)
+    if model is None:
+        model = FallbackModel()
+    models.setdefault(exchange_id, {})[symbol] = model
+    return model
+
+async def fetch_tickers_async(exchange_id, symbols, retries=5):
     for attempt in range(retries):
         try:
-            async with rate_limiter:
-                tickers = await exchanges[exchange_id].fetch_tickers(symbols)
-                for symbol, ticker in tickers.items():
+            tickers = await exchange_request(exchange_id, 'market_data', 'fetch_tickers', symbols)
+            for symbol, ticker in tickers.items():
+                if symbol in market_prices[exchange_id]:
                     market_prices[exchange_id][symbol] = ticker['last']
-                return {symbol: market_prices[exchange_id][symbol] for symbol in symbols}
+            return tickers
         except Exception as e:
-            logging.error(f"Error al obtener precios de mercado para {symbols} en {exchange_id}: {e}")
+            market_logger.error("Error al obtener precios de mercado para %s en %s: %s", symbols, exchange_id, e)
             if attempt == retries - 1:
                 raise
+            record_retry(exchange_id, 'fetch_tickers', 2 ** attempt)
             await asyncio.sleep(2 ** attempt)
     raise Exception(f"Failed to fetch market prices for {symbols} on {exchange_id} after {retries} attempts")
 
-async def cancel_order_async(order_id, symbol, exchange_id):
-    try:
-        await exchanges[exchange_id].cancel_order(order_id, symbol)
-        logging.info(f"Orden de compra cancelada: {order_id} para {symbol} en {exchange_id}")
-    except Exception as e:
-        logging.error(f"Error al cancelar la orden {order_id} para {symbol} en {exchange_id}: {e}")
+class MarketDataSubscription:
+    def __init__(self, hub, symbol):
+        self.hub = hub
+        self.symbol = symbol
+        self.queue = asyncio.Queue(maxsize=1)
 
-async def close_all_open_buy_orders():
-    logging.info("Cerrando todas las órdenes de compra abiertas...")
-    tasks = [close_account_open_buy_orders(exchange_id) for exchange_id in exchanges_config.keys()]
-    await asyncio.gather(*tasks)
-    logging.info("Todas las órdenes de compra abiertas han sido cerradas")
+    def push(self, snapshot):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(snapshot)
 
-async def close_account_open_buy_orders(exchange_id):
-    async with asyncio.Lock():
-        tasks = []
-        for symbol, orders in open_orders[exchange_id].items():
-            for order in list(orders):
-                if order['side'] == 'buy':
-                    tasks.append(cancel_order_async(order['id'], symbol, exchange_id))
-                    orders.remove(order)
-        await asyncio.gather(*tasks)
-        logging.info(f"Órdenes de compra cerradas para {exchange_id}")
+    async def get(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
 
-def predict_next_price(model, symbol, exchange_id, open, high, low, close, volume):
-    data = pd.DataFrame({
-        'open': [open],
-        'high': [high],
-        'low': [low],
-        'close': [close],
-        'volume': [volume]
-    })
-    prediction = model.predict(data)[0]
-    logging.info(f"Predicción del próximo precio para {symbol} en {exchange_id}: {prediction}")
-    predicted_prices[exchange_id][symbol] = prediction
-    return prediction
+    def close(self):
+        self.hub.unsubscribe(self)
 
-def calculate_daily_loss(symbol, exchange_id):
-    total_loss = 0
-    for trade in daily_trades[exchange_id][symbol]:
-        if trade['side'] == 'sell':
-            matching_buy = next((t for t in daily_trades[exchange_id][symbol] if t['side'] == 'buy' and t['amount'] == trade['amount'] and t['order_id'] == trade['order_id']), None)
-            if matching_buy:
-                loss = matching_buy['price'] - trade['price']
-                total_loss += loss
-    daily_losses[exchange_id][symbol] = total_loss
-    logging.info(f"Pérdida total del día calculada para {symbol} en {exchange_id}: {total_loss}")
-    return total_loss
+class MarketDataHub:
+    def __init__(self, exchange_id, interval=1, ohlcv_interval=60, timeframe='1h', streaming=False, max_stream_errors=5):
+        self.exchange_id = exchange_id
+        self.interval = interval
+        self.ohlcv_interval = ohlcv_interval
+        self.timeframe = timeframe
+        self.streaming = streaming
+        self.max_stream_errors = max_stream_errors
+        self.subscriptions = {}
+        self.tickers = {}
+        self.predictor = BatchPredictor()
+        self.predictions = {}
+        self.orders = {}
+        self.streaming_orders = False
+        self.watchers = {}
+        self.last_ohlcv_poll = 0
+        self.task = None
 
-def calculate_profit_loss():
-    for exchange_id, symbols in daily_trades.items():
-        for symbol in symbols_config:
-            symbol_name = symbol['symbol']
-            profit_loss[exchange_id][symbol_name] = 0
-            for trade in symbols[symbol_name]:
-                if trade['side'] == 'sell':
-                    matching_buy = next((t for t in symbols[symbol_name] if t['side'] == 'buy' and t['amount'] == trade['amount']), None)
-                    if matching_buy:
-                        profit = (trade['price'] - matching_buy['price']) * trade['amount']
-                        profit_loss[exchange_id][symbol_name] += profit
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run(), name=f"market_data_hub[{self.exchange_id}]")
 
-def calculate_trade_profit_loss(trade):
-    if trade['side'] == 'sell':
-        matching_buy = next((t for t in daily_trades[trade['exchange']][trade['symbol']] if t['side'] == 'buy' and t['amount'] == trade['amount'] and t['order_id'] == trade['order_id']), None)
-        if matching_buy:
-            return (trade['price'] - matching_buy['price']) * trade['amount']
-    return 0
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+        await self.stop_watchers()
 
-def calculate_total_invested(exchange_id, symbol):
-    return sum(trade['amount'] * trade['price'] for trade in daily_trades[exchange_id][symbol] if trade['side'] == 'buy')
+    def subscribe(self, symbol):
+        subscription = MarketDataSubscription(self, symbol)
+        self.subscriptions.setdefault(symbol, []).append(subscription)
+        snapshot = self.snapshot(symbol)
+        if snapshot:
+            subscription.push(snapshot)
+        self.start()
+        return subscription
 
-def save_trade_to_csv(trade, exchange_id):
-    csv_filename = f"{csv_filename_template.split('.')[0]}_{exchange_id}.csv"
-    file_exists = os.path.isfile(csv_filename)
-    with open(csv_filename, mode='a', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=trade.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(trade)
+    def unsubscribe(self, subscription):
+        subscriptions = self.subscriptions.get(subscription.symbol, [])
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+        if not subscriptions:
+            self.subscriptions.pop(subscription.symbol, None)
 
-def handle_command(command):
-    logging.info(f"Comando recibido: {command}")
+    def last_price(self, symbol):
+        ticker = self.tickers.get(symbol)
+        return ticker.get('last') if ticker else None
 
-async def main():
-    try:
-        load_encrypted_config()
-        logging.warning(f"Configuración cargada. Exchanges configurados: {list(exchanges_config.keys())}")
-        logging.warning(f"Símbolos configurados: {[s['symbol'] for s in symbols_config]}")
-        logging.warning(f"Configuración de exchanges:")
-        for exchange_id, exchange_data in exchanges_config.items():
-            logging.warning(f"{exchange_id}: {exchange_data}")
-        root = tk.Tk()
-        gui = BotGUI(root)
-        await initialize_exchanges()
-        bot_task = asyncio.create_task(gui.run_bot())
-        gui_task = asyncio.create_task(gui.run_gui())
-        await asyncio.gather(gui_task, bot_task)
-    except KeyboardInterrupt:
-        logging.warning("Programa terminado por el usuario")
-    except Exception as e:
-        logging.error(f"Error inesperado: {e}")
-        logging.exception("Traceback completo:")
-    finally:
-        logging.warning("Iniciando cierre del programa...")
-        await shutdown_bot()
-        for task in asyncio.all_tasks():
-            if task is not asyncio.current_task():
-                task.cancel()
-        await asyncio.gather(*asyncio.all_tasks(), return_exceptions=True)
-        logging.warning("Programa terminado completamente")
+    def streamed_order(self, order_id):
+        if not self.streaming_orders:
+            return None
+        return self.orders.get(order_id)
 
-if __name__ == "__main__":
-    asyncio.run(main())
+    def snapshot(self, symbol):
+        ticker = self.tickers.get(symbol)
+        if ticker is None:
+            return None
+        return {
+            'symbol': symbol,
+            'price': ticker.get('last'),
+            'ticker': ticker,
+            'ohlcv': get_candle_store(self.exchange_id, symbol, self.timeframe).latest(),
+            'predicted_price': self.predictions.get(symbol),
+            'timestamp': time.time()
+        }
+
+    async def run(self):
+        if self.streaming:
+            try:
+                await self.stream()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                market_logger.warning("Streaming no disponible para %s, usando polling: %s", self.exchange_id, e)
+            finally:
+                await self.stop_watchers()
+            self.streaming = False
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                market_logger.error("Error en el hub de datos de mercado de %s: %s", self.exchange_id, e)
+            await asyncio.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+    async def poll(self):
+        symbols = [symbol for symbol in self.subscriptions if active_symbols[self.exchange_id].get(symbol, True)]
+        if not symbols:
+            return
+        tickers = await fetch_tickers_async(self.exchange_id, symbols)
+        self.tickers.update({symbol: ticker for symbol, ticker in tickers.items() if symbol in self.subscriptions})
+        if time.monotonic() - self.last_ohlcv_poll >= self.ohlcv_interval:
+            await self.poll_ohlcv(symbols)
+        for symbol in symbols:
+            self.merge_ticker_into_candle(symbol)
+        self.predict(symbols)
+        for symbol in symbols:
+            self.publish(symbol)
+
+    async def poll_ohlcv(self, symbols):
+        stores = [get_candle_store(self.exchange_id, symbol, self.timeframe) for symbol in symbols]
+        results = await asyncio.gather(*[store.update(limit=1) for store in stores], return_exceptions=True)
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                market_logger.error("Error al actualizar la vela de %s en %s: %s", symbol, self.exchange_id, result)
+        self.last_ohlcv_poll = time.monotonic()
+
+    async def stream(self):
+        exchange = exchanges[self.exchange_id]
+        if not exchange.has.get('watchTicker'):
+            raise ccxt.NotSupported(f"{self.exchange_id} no soporta watch_ticker")
+        if exchange.has.get('watchOrders'):
+            self.start_watcher('orders', self.watch_orders)
+        while True:
+            for key, task in list(self.watchers.items()):
+                if task.done() and not task.cancelled() and task.exception():
+                    raise task.exception()
+            symbols = [symbol for symbol in self.subscriptions if active_symbols[self.exchange_id].get(symbol, True)]
+            wanted = {'orders'} if 'orders' in self.watchers else set()
+            for symbol in symbols:
+                wanted.add(('ticker', symbol))
+                self.start_watcher(('ticker', symbol), self.watch_ticker, symbol)
+                if exchange.has.get('watchOHLCV'):
+                    wanted.add(('ohlcv', symbol))
+                    self.start_watcher(('ohlcv', symbol), self.watch_ohlcv, symbol)
+            for key in [key for key in self.watchers if key not in wanted]:
+                self.watchers.pop(key).cancel()
+            if symbols and not exchange.has.get('watchOHLCV') and time.monotonic() - self.last_ohlcv_poll >= self.ohlcv_interval:
+                await self.poll_ohlcv(symbols)
+            self.evict_orders()
+            await asyncio.sleep(self.interval)
+
+    def start_watcher(self, key, watch, *args):
+        task = self.watchers.get(key)
+        if task is None or task.done():
+            name = f"watch_{key[0]}[{key[1]}@{self.exchange_id}]" if isinstance(key, tuple) else f"watch_{key}[{self.exchange_id}]"
+            self.watchers[key] = asyncio.create_task(watch(*args), name=name)
+
+    async def stop_watchers(self):
+        watchers = list(self.watchers.values())
+        self.watchers.clear()
+        self.streaming_orders = False
+        for task in watchers:
+            task.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+
+    async def watch_loop(self, description, watch, handle):
+        errors = 0
+        while True:
+            try:
+                message = await watch(exchanges[self.exchange_id])
+                errors = 0
+                handle(message)
+            except asyncio.CancelledError:
+                raise
+            except ccxt.NotSupported:
+                raise
+            except Exception as e:
+                errors += 1
+                market_logger.error("Error en el stream %s de %s: %s", description, self.exchange_id, e)
+                if errors >= self.max_stream_errors:
+                    raise
+                await asyncio.sleep(min(2 ** errors, 30))
+
+    async def watch_ticker(self, symbol):
+        def handle(ticker):
+            self.tickers[symbol] = ticker
+            if ticker.get('last') is not None:
+                market_prices[self.exchange_id][symbol] = ticker['last']
+            self.merge_ticker_into_candle(symbol)
+            self.predict([symbol])
+            self.publish(symbol)
+        await self.watch_loop(f"ticker {symbol}", lambda exchange: exchange.watch_ticker(symbol), handle)
+
+    async def watch_ohlcv(self, symbol):
+        def handle(candles):
+            get_candle_store(self.exchange_id, symbol, self.timeframe).append(candles)
+        await self.watch_loop(f"ohlcv {symbol}", lambda exchange: exchange.watch_ohlcv(symbol, self.timeframe), handle)
+
+    def evict_orders(self):
+        tracked = tracked_order_ids(self.exchange_id)
+        for order_id in [order_id for order_id, order in self.orders.items() if order.get('status') in finished_order_statuses and order_id not in tracked]:
+            del self.orders[order_id]
+
+    async def watch_orders(self):
+        def handle(orders):
+            for order in orders:
+                self.orders[order['id']] = order
+            self.evict_orders()
+        self.streaming_orders = True
+        try:
+            await self.watch_loop("orders", lambda exchange: exchange.watch_orders(), handle)
+        finally:
+            self.streaming_orders = False
+            self.orders.clear()
+
+    def predict(self, symbols):
+        symbol_models = models.get(self.exchange_id, {})
+        ready = []
+        for symbol in symbols:
+            candle = get_candle_store(self.exchange_id, symbol, self.timeframe).latest()
+            self.predictions.pop(symbol, None)
+            if candle is not None and symbol in symbol_models:
+                self.predictor.set_features(symbol, candle)
+                ready.append(symbol)
+        if not ready:
+            return
+        try:
+            predictions = self.predictor.predict(ready, symbol_models)
+        except Exception as e:
+            market_logger.error("Error en la predicción por lotes en %s: %s", self.exchange_id, e)
+            return
+        for symbol, prediction in predictions.items():
+            self.predictions[symbol] = prediction
+            predicted_prices[self.exchange_id][symbol] = prediction
+
+    def publish(self, symbol):
+        snapshot = self.snapshot(symbol)
+        if snapshot:
+            for subscription in list(self.subscriptions.get(symbol, [])):
+                subscription.push(snapshot)
+
+    def merge_ticker_into_candle(self, symbol):
+        get_candle_store(self.exchange_id, symbol, self.timeframe).merge_price(self.last_price(symbol))
+
+def get_market_data_hub(exchange_id):
+    hub = market_data_hubs.get(exchange_id)
+    if hub is None:
+        exchange_data = exchanges_config.get(exchange_id, {})
+        hub = MarketDataHub(
+            exchange_id,
+            interval=exchange_data.get('poll_interval', 1),
+            ohlcv_interval=exchange_data.get('ohlcv_interval', 60),
+            streaming=exchange_data.get('streaming', False)
+        )
+        market_data_hubs[exchange_id] = hub
+    return hub
+
+async def stop_market_data_hub(exchange_id):
+    hub = market_data_hubs.pop(exchange_id, None)
+    if hub:
+        await hub.stop()
+
+class LocalStreamExchange:
+    def __init__(self, exchange=None):
+        self.exchange = exchange
+        self.has = dict(getattr(exchange, 'has', {}), watchTicker=True, watchOHLCV=True, watchOrders=True)
+        self.streams = {}
+
+    def __getattr__(self, name):
+        if self.exchange is None:
+            raise AttributeError(name)
+        return getattr(self.exchange, name)
+
+    def stream(self, key):
+        if key not in self.streams:
+            self.streams[key] = asyncio.Queue()
+        return self.streams[key]
+
+    def push_ticker(self, symbol, ticker):
+        self.stream(('ticker', symbol)).put_nowait(dict(ticker, symbol=symbol))
+
+    def push_ohlcv(self, symbol, timeframe, candles):
+        self.stream(('ohlcv', symbol, timeframe)).put_nowait(candles)
+
+    def push_order(self, order):
+        self.stream('orders').put_nowait([order])
+
+    async def watch_ticker(self, symbol, params={}):
+        return await self.stream(('ticker', symbol)).get()
+
+    async def watch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        return await self.stream(('ohlcv', symbol, timeframe)).get()
+
+    async def watch_orders(self, symbol=None, since=None, limit=None, params={}):
+        return await self.stream('orders').get()
+
+    async def close(self):
+        if self.exchange is not None:
+            await self.exchange.close()
+
+class SimulatedExchange(LocalStreamExchange):
+    def __init__(self, settings=None, symbols=()):
+        super().__init__()
+        settings = settings or {}
+        self.id = 'simulated'
+        self.latency = settings.get('latency', 0.05)
+        self.jitter = settings.get('jitter', 0.0)
+        self.rate_limit = settings.get('rate_limit', 0)
+        self.rateLimit = 1000 / self.rate_limit if self.rate_limit else 0
+        self.error_rate = settings.get('error_rate', 0.0)
+        self.fill_probability = settings.get('fill_probability', 1.0)
+        self.volatility = settings.get('volatility', 0.001)
+        self.tick_interval = settings.get('tick_interval', 1.0)
+        self.history_bars = settings.get('history_bars', 1000)
+        self.keep_closed = settings.get('keep_closed', 10000)
+        self.rng = np.random.default_rng(settings.get('seed'))
+        quote = settings.get('quote', 'USDT')
+        names = [f"SIM{i:04d}/{quote}" for i in range(settings.get('symbol_count', 1000))]
+        names += [symbol for symbol in symbols if symbol not in names]
+        self.symbols = names
+        self.index = {symbol: i for i, symbol in enumerate(names)}
+        self.markets = {
+            symbol: {
+                'id': symbol.replace('/', ''),
+                'symbol': symbol,
+                'base': symbol.split('/')[0],
+                'quote': symbol.split('/')[1],
+                'active': True,
+                'spot': True,
+                'type': 'spot',
+                'precision': {'amount': 8, 'price': 8},
+                'limits': {'amount': {'min': 1e-8, 'max': None}, 'price': {'min': 1e-8, 'max': None}}
+            } for symbol in names
+        }
+        self.prices = np.exp(self.rng.uniform(np.log(0.1), np.log(1000), len(names)))
+        self.highs = self.prices.copy()
+        self.lows = self.prices.copy()
+        self.volumes = np.zeros(len(names))
+        self.last_tick = time.monotonic()
+        self.history = {}
+        self.orders = {}
+        self.open_by_symbol = {}
+        self.closed_ids = deque()
+        self.order_ids = itertools.count(1)
+        self.tokens = self.rate_limit
+        self.last_refill = time.monotonic()
+        self.has = dict(self.has, fetchTicker=True, fetchTickers=True, fetchOHLCV=True, fetchOrder=True,
+                        fetchOpenOrders=True, fetchClosedOrders=True, createOrder=True, createOrders=True, cancelOrder=True)
+
+    def milliseconds(self):
+        return int(time.time() * 1000)
+
+    async def request(self):
+        if self.rate_limit:
+            now = time.monotonic()
+            self.tokens = min(self.rate_limit, self.tokens + (now - self.last_refill) * self.rate_limit)
+            self.last_refill = now
+            if self.tokens < 1:
+                raise ccxt.RateLimitExceeded(f"{self.id} rate limit exceeded")
+            self.tokens -= 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0, self.rng.normal(self.latency, self.jitter) if self.jitter else self.latency))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise ccxt.RequestTimeout(f"{self.id} simulated network error")
+        self.advance()
+
+    def advance(self):
+        steps = int((time.monotonic() - self.last_tick) / self.tick_interval)
+        if steps <= 0:
+            return
+        self.last_tick += steps * self.tick_interval
+        sigma = self.volatility * np.sqrt(steps)
+        previous = self.prices
+        self.prices = previous * np.exp(self.rng.normal(0, sigma, len(previous)))
+        spread = np.abs(self.rng.normal(0, sigma / 2, len(previous)))
+        low = np.minimum(previous, self.prices) * (1 - spread)
+        high = np.maximum(previous, self.prices) * (1 + spread)
+        self.lows = np.minimum(self.lows, low)
+        self.highs = np.maximum(self.highs, high)
+        self.volumes += self.rng.gamma(2.0, 50.0, len(previous)) * steps
+        self.match(low, high)
+
+    def match(self, low, high):
+        for symbol, orders in list(self.open_by_symbol.items()):
+            index = self.index[symbol]
+            for order in list(orders.values()):
+                crossed = low[index] <= order['price'] if order['side'] == 'buy' else high[index] >= order['price']
+                if crossed and (self.fill_probability >= 1 or self.rng.random() < self.fill_probability):
+                    self.fill(order)
+
+    def fill(self, order):
+        order.update({
+            'status': 'closed',
+            'filled': order['amount'],
+            'remaining': 0.0,
+            'average': order['price'],
+            'cost': order['amount'] * order['price'],
+            'lastTradeTimestamp': self.milliseconds()
+        })
+        self.finish(order)
+        if 'orders' in self.streams:
+            self.push_order(dict(order))
+
+    def finish(self, order):
+        orders = self.open_by_symbol.get(order['symbol'], {})
+        orders.pop(order['id'], None)
+        if not orders:
+            self.open_by_symbol.pop(order['symbol'], None)
+        self.closed_ids.append(order['id'])
+        while len(self.closed_ids) > self.keep_closed:
+            self.orders.pop(self.closed_ids.popleft(), None)
+
+    def market(self, symbol):
+        if symbol not in self.index:
+            raise ccxt.BadSymbol(f"{self.id} does not have market symbol {symbol}")
+        return self.index[symbol]
+
+    def ticker(self, symbol):
+        index = self.market(symbol)
+        price = float(self.prices[index])
+        timestamp = self.milliseconds()
+        return {
+            'symbol': symbol,
+            'timestamp': timestamp,
+            'datetime': datetime.fromtimestamp(timestamp / 1000, timezone.utc).isoformat(),
+            'last': price,
+            'close': price,
+            'bid': price * (1 - self.volatility / 2),
+            'ask': price * (1 + self.volatility / 2),
+            'high': float(self.highs[index]),
+            'low': float(self.lows[index]),
+            'baseVolume': float(self.volumes[index])
+        }
+
+    def synthesize(self, first_open, last_close, count, bar_volatility):
+        steps = np.linspace(np.log(first_open), np.log(last_close), count + 1)
+        noise = np.cumsum(self.rng.normal(0, bar_volatility, count + 1))
+        noise -= np.linspace(noise[0], noise[-1], count + 1)
+        path = np.exp(steps + noise)
+        opens, closes = path[:-1], path[1:]
+        wicks = np.abs(self.rng.normal(0, bar_volatility / 2, (2, count)))
+        highs = np.maximum(opens, closes) * (1 + wicks[0])
+        lows = np.minimum(opens, closes) * (1 - wicks[1])
+        volumes = self.rng.gamma(2.0, 50.0, count)
+        return opens, highs, lows, closes, volumes
+
+    def candles(self, symbol, timeframe):
+        period = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        bar_volatility = self.volatility * np.sqrt(period / 1000 / self.tick_interval)
+        price = float(self.prices[self.market(symbol)])
+        current = self.milliseconds() // period * period
+        history = self.history.get((symbol, timeframe))
+        if history is None:
+            count = self.history_bars
+            first_open = price * np.exp(self.rng.normal(0, bar_volatility * np.sqrt(count)))
+            start = current - period * (count - 1)
+            history = self.history[(symbol, timeframe)] = []
+        elif history[-1][0] < current:
+            count = (current - history[-1][0]) // period
+            first_open = history[-1][4]
+            start = history[-1][0] + period
+        else:
+            last = history[-1]
+            last[2], last[3], last[4] = max(last[2], price), min(last[3], price), price
+            return history
+        columns = self.synthesize(first_open, price, count, bar_volatility)
+        history.extend([start + i * period, *map(float, values)] for i, values in enumerate(zip(*columns)))
+        del history[:-self.history_bars]
+        return history
+
+    async def load_markets(self, reload=False, params={}):
+        return self.markets
+
+    async def fetch_ticker(self, symbol, params={}):
+        await self.request()
+        return self.ticker(symbol)
+
+    async def fetch_tickers(self, symbols=None, params={}):
+        await self.request()
+        return {symbol: self.ticker(symbol) for symbol in (symbols or self.symbols)}
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        await self.request()
+        history = self.candles(symbol, timeframe)
+        if since is not None:
+            history = [candle for candle in history if candle[0] >= since]
+            return [list(candle) for candle in history[:limit]]
+        return [list(candle) for candle in history[-(limit or len(history)):]]
+
+    async def create_order(self, symbol, type, side, amount, price=None, params={}):
+        await self.request()
+        return self.place(symbol, type, side, amount, price)
+
+    def place(self, symbol, type, side, amount, price=None):
+        index = self.market(symbol)
+        if type == 'market' or price is None:
+            price = float(self.prices[index])
+        timestamp = self.milliseconds()
+        order = {
+            'id': str(next(self.order_ids)),
+            'clientOrderId': None,
+            'timestamp': timestamp,
+            'datetime': datetime.fromtimestamp(timestamp / 1000, timezone.utc).isoformat(),
+            'lastTradeTimestamp': None,
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'price': price,
+            'amount': amount,
+            'filled': 0.0,
+            'remaining': amount,
+            'average': None,
+            'cost': 0.0,
+            'status': 'open',
+            'fee': None,
+            'trades': []
+        }
+        self.orders[order['id']] = order
+        self.open_by_symbol.setdefault(symbol, {})[order['id']] = order
+        if type == 'market' or (price >= self.prices[index] if side == 'buy' else price <= self.prices[index]):
+            self.fill(order)
+        return dict(order)
+
+    async def create_orders(self, orders, params={}):
+        await self.request()
+        results = []
+        for order in orders:
+            try:
+                if self.error_rate and self.rng.random() < self.error_rate:
+                    raise ccxt.InvalidOrder(f"{self.id} simulated order rejection")
+                results.append(self.place(order['symbol'], order['type'], order['side'], order['amount'], order.get('price')))
+            except ccxt.BaseError as e:
+                results.append({'id': None, 'symbol': order['symbol'], 'status': 'rejected', 'info': {'error': str(e)}})
+        return results
+
+    async def fetch_order(self, id, symbol=None, params={}):
+        await self.request()
+        order = self.orders.get(id)
+        if order is None:
+            raise ccxt.OrderNotFound(f"{self.id} order {id} not found")
+        return dict(order)
+
+    async def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        await self.request()
+        orders = self.open_by_symbol.get(symbol, {}).values() if symbol else [order for orders in self.open_by_symbol.values() for order in orders.values()]
+        return [dict(order) for order in orders if since is None or order['timestamp'] >= since][:limit]
+
+    async def fetch_closed_orders(self, symbol=None, since=None, limit=None, params={}):
+        await self.request()
+        orders = (self.orders.get(id) for id in self.closed_ids)
+        return [dict(order) for order in orders if order and (symbol is None or order['symbol'] == symbol) and (since is None or order['timestamp'] >= since)][:limit]
+
+    async def cancel_order(self, id, symbol=None, params={}):
+        await self.request()
+        order = self.orders.get(id)
+        if order is None or order['status'] != 'open':
+            raise ccxt.OrderNotFound(f"{self.id} order {id} is not open")
+        order['status'] = 'canceled'
+        self.finish(order)
+        if 'orders' in self.streams:
+            self.push_order(dict(order))
+        return dict(order)
+
+    async def watch_ticker(self, symbol, params={}):
+        await asyncio.sleep(self.tick_interval)
+        self.advance()
+        return self.ticker(symbol)
+
+    async def watch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        await asyncio.sleep(self.tick_interval)
+        self.advance()
+        return [list(self.candles(symbol, timeframe)[-1])]
+
+    async def watch_orders(self, symbol=None, since=None, limit=None, params={}):
+        stream = self.stream('orders')
+        while stream.empty():
+            await asyncio.sleep(self.tick_interval)
+            self.advance()
+        return await stream.get()
+
+    async def close(self):
+        pass
+
+async def cancel_order_async(order_id, symbol, exchange_id):
+    try:
+        await exchange_request(exchange_id, 'cancel', 'cancel_order', order_id, symbol)
+        orders_logger.info("Orden de compra cancelada: %s para %s en %s", order_id, symbol, exchange_id)
+    except Exception as e:
+        orders_logger.error("Error al cancelar la orden %s para %s en %s: %s", order_id, symbol, exchange_id, e)
+
+async def close_account_open_buy_orders(exchange_id):
+    async with asyncio.Lock():
+        tasks = []
+        for symbol, orders in open_orders[exchange_id].items():
+            for order in list(orders):
+                if order['side'] == 'buy':
+                    tasks.append(cancel_order_async(order['id'], symbol, exchange_id))
+                    orders.remove(order)
+        await asyncio.gather(*tasks)
+        orders_logger.info("Órdenes de compra cerradas para %s", exchange_id)
+
+class FlatForest:
+    def __init__(self, left, right, feature, threshold, value, roots, depth, tree_row=None, row_count=None):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.tree_row = tree_row
+        self.tree_counts = np.bincount(tree_row, minlength=row_count) if tree_row is not None else None
+
+    @classmethod
+    def from_model(cls, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            nodes = np.arange(tree.node_count) + offset
+            leaf = tree.children_left == -1
+            left.append(np.where(leaf, nodes, tree.children_left + offset))
+            right.append(np.where(leaf, nodes, tree.children_right + offset))
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            value.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+        return cls(
+            np.concatenate(left), np.concatenate(right), np.concatenate(feature),
+            np.concatenate(threshold), np.concatenate(value), np.array(roots, dtype=np.intp),
+            max(tree.max_depth for tree in trees)
+        )
+
+    @classmethod
+    def concatenate(cls, forests):
+        offsets = np.cumsum([0] + [len(forest.left) for forest in forests[:-1]])
+        return cls(
+            np.concatenate([forest.left + offset for forest, offset in zip(forests, offsets)]),
+            np.concatenate([forest.right + offset for forest, offset in zip(forests, offsets)]),
+            np.concatenate([forest.feature for forest in forests]),
+            np.concatenate([forest.threshold for forest in forests]),
+            np.concatenate([forest.value for forest in forests]),
+            np.concatenate([forest.roots + offset for forest, offset in zip(forests, offsets)]),
+            max(forest.depth for forest in forests),
+            tree_row=np.concatenate([np.full(len(forest.roots), row, dtype=np.intp) for row, forest in enumerate(forests)]),
+            row_count=len(forests)
+        )
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        nodes = np.repeat(self.roots[np.newaxis, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, np.newaxis]
+        for _ in range(self.depth):
+            nodes = np.where(X[rows, self.feature[nodes]] <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+    def predict_rows(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        nodes = self.roots
+        for _ in range(self.depth):
+            nodes = np.where(X[self.tree_row, self.feature[nodes]] <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+        return np.bincount(self.tree_row, weights=self.value[nodes], minlength=len(self.tree_counts)) / self.tree_counts
+
+def compile_model(model):
+    from sklearn.ensemble import RandomForestRegressor
+    if not isinstance(model, RandomForestRegressor) or getattr(model, 'n_outputs_', 1) != 1:
+        return None
+    forest = compiled_forests.get(model)
+    if forest is None:
+        forest = FlatForest.from_model(model)
+        compiled_forests[model] = forest
+    return forest
+
+class BatchPredictor:
+    feature_columns = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, capacity=64):
+        self.features = np.zeros((capacity, len(self.feature_columns)), dtype=np.float64)
+        self.slots = {}
+        self.batch = None
+        self.batch_key = None
+
+    def slot(self, symbol):
+        index = self.slots.get(symbol)
+        if index is None:
+            index = len(self.slots)
+            if index >= len(self.features):
+                self.features = np.concatenate([self.features, np.zeros_like(self.features)])
+            self.slots[symbol] = index
+        return index
+
+    def set_features(self, symbol, candle):
+        index = self.slot(symbol)
+        row = self.features[index]
+        for column, name in enumerate(self.feature_columns):
+            row[column] = candle[name]
+
+    def predict(self, symbols, symbol_models):
+        X = self.features[[self.slots[symbol] for symbol in symbols]]
+        predictions = np.empty(len(symbols), dtype=np.float64)
+        forest_rows, forests = [], []
+        for row, symbol in enumerate(symbols):
+            forest = compile_model(symbol_models[symbol])
+            if forest is None:
+                predictions[row] = symbol_models[symbol].predict(X[row:row + 1])[0]
+            else:
+                forest_rows.append(row)
+                forests.append(forest)
+        if len(forests) == 1:
+            predictions[forest_rows[0]] = forests[0].predict(X[forest_rows[0]:forest_rows[0] + 1])[0]
+        elif forests:
+            batch_key = tuple(forests)
+            if batch_key != self.batch_key:
+                self.batch = FlatForest.concatenate(forests)
+                self.batch_key = batch_key
+            predictions[forest_rows] = self.batch.predict_rows(X[forest_rows])
+        return dict(zip(symbols, predictions.tolist()))
+
+def predict_next_price(model, symbol, exchange_id, open, high, low, close, volume):
+    data = np.array([[open, high, low, close, volume]], dtype=np.float64)
+    forest = compile_model(model)
+    prediction = forest.predict(data)[0] if forest is not None else model.predict(data)[0]
+    tick_logger.info("Predicción del próximo precio para %s en %s: %s", symbol, exchange_id, prediction)
+    predicted_prices[exchange_id][symbol] = prediction
+    return prediction
+
+class ActionsFeed:
+    def __init__(self, maxlen=5000):
+        self.events = deque(maxlen=maxlen)
+        self.last_seq = 0
+
+    def append(self, trade, profit_loss=0):
+        self.last_seq += 1
+        event = {
+            'seq': self.last_seq,
+            'timestamp': trade['timestamp'],
+            'exchange': trade['exchange'],
+            'side': trade['side'],
+            'symbol': trade['symbol'],
+            'amount': trade['amount'],
+            'price': trade['price'],
+            'order_id': trade.get('order_id'),
+            'profit_loss': profit_loss
+        }
+        self.events.append(event)
+        return event
+
+    def extend(self, events):
+        for event in events:
+            if event['seq'] > self.last_seq:
+                self.events.append(event)
+                self.last_seq = event['seq']
+
+    def since(self, cursor=0, limit=None):
+        events = []
+        for event in reversed(self.events):
+            if event['seq'] <= cursor:
+                break
+            events.append(event)
+        events.reverse()
+        return events if limit is None else events[:limit]
+
+actions_feed = ActionsFeed()
+
+def record_trade(exchange_id, symbol, trade):
+    daily_trades[exchange_id][symbol].append(trade)
+    if state_store is not None:
+        state_store.log('trade', exchange_id, symbol, trade)
+    return actions_feed.append(trade, calculate_trade_profit_loss(trade))
+
+class TradeLedger:
+    def __init__(self):
+        self.fills = {}
+        self.lots = {}
+        self.realized = {}
+        self.daily_realized = {}
+        self.invested = {}
+
+    def record_fill(self, exchange_id, symbol, side, amount, price, order_id, timestamp=None, day=None):
+        if order_id in self.fills:
+            return None
+        key = (exchange_id, symbol)
+        lots = self.lots.setdefault(key, deque())
+        realized = 0
+        day = day or datetime.now().date().isoformat()
+        if side == 'buy':
+            lots.append([amount, price])
+            self.invested[key] = self.invested.get(key, 0) + amount * price
+        else:
+            remaining = amount
+            while remaining > 1e-12 and lots:
+                lot = lots[0]
+                matched = min(lot[0], remaining)
+                realized += (price - lot[1]) * matched
+                self.invested[key] = self.invested.get(key, 0) - matched * lot[1]
+                lot[0] -= matched
+                remaining -= matched
+                if lot[0] <= 1e-12:
+                    lots.popleft()
+            self.realized[key] = self.realized.get(key, 0) + realized
+            last_day, day_realized = self.daily_realized.get(key, (day, 0))
+            if last_day <= day:
+                self.daily_realized[key] = (day, (day_realized if last_day == day else 0) + realized)
+        fill = {
+            'exchange': exchange_id,
+            'symbol': symbol,
+            'side': side,
+            'amount': amount,
+            'price': price,
+            'order_id': order_id,
+            'timestamp': timestamp,
+            'day': day,
+            'realized': realized
+        }
+        self.fills[order_id] = fill
+        return fill
+
+    def pairs(self):
+        return set(self.lots) | set(self.realized) | set(self.daily_realized) | set(self.invested) | {(fill['exchange'], fill['symbol']) for fill in self.fills.values()}
+
+    def export(self, pairs=None):
+        return {
+            'fills': [fill for fill in self.fills.values() if pairs is None or (fill['exchange'], fill['symbol']) in pairs],
+            'lots': [[exchange_id, symbol, [list(lot) for lot in lots]] for (exchange_id, symbol), lots in self.lots.items() if pairs is None or (exchange_id, symbol) in pairs],
+            'realized': [[exchange_id, symbol, value] for (exchange_id, symbol), value in self.realized.items() if pairs is None or (exchange_id, symbol) in pairs],
+            'daily_realized': [[exchange_id, symbol, day, value] for (exchange_id, symbol), (day, value) in self.daily_realized.items() if pairs is None or (exchange_id, symbol) in pairs],
+            'invested': [[exchange_id, symbol, value] for (exchange_id, symbol), value in self.invested.items() if pairs is None or (exchange_id, symbol) in pairs]
+        }
+
+    def load(self, state):
+        self.fills, self.lots, self.realized, self.daily_realized, self.invested = {}, {}, {}, {}, {}
+        self.merge(state)
+
+    def merge(self, state):
+        self.fills.update((fill['order_id'], fill) for fill in state.get('fills', []))
+        self.lots.update(((exchange_id, symbol), deque(lots)) for exchange_id, symbol, lots in state.get('lots', []))
+        self.realized.update(((exchange_id, symbol), value) for exchange_id, symbol, value in state.get('realized', []))
+        self.daily_realized.update(((exchange_id, symbol), (day, value)) for exchange_id, symbol, day, value in state.get('daily_realized', []))
+        self.invested.update(((exchange_id, symbol), value) for exchange_id, symbol, value in state.get('invested', []))
+
+    def prune(self, day, keep=()):
+        self.fills = {order_id: fill for order_id, fill in self.fills.items() if (fill.get('day') or '') >= day or order_id in keep}
+
+    def trade_profit_loss(self, order_id):
+        fill = self.fills.get(order_id)
+        return fill['realized'] if fill else 0
+
+    def realized_profit_loss(self, exchange_id, symbol):
+        return self.realized.get((exchange_id, symbol), 0)
+
+    def daily_loss(self, exchange_id, symbol):
+        day, day_realized = self.daily_realized.get((exchange_id, symbol), (None, 0))
+        return -day_realized if day == datetime.now().date().isoformat() else 0
+
+    def total_invested(self, exchange_id, symbol):
+        return self.invested.get((exchange_id, symbol), 0)
+
+trade_ledger = TradeLedger()
+
+def record_order_fill(exchange_id, symbol, order_info, side=None):
+    side = order_info.get('side') or side
+    amount = order_info.get('filled') or order_info['amount']
+    price = order_info.get('average') or order_info['price']
+    fill = trade_ledger.record_fill(exchange_id, symbol, side, amount, price, order_info['id'], order_info.get('timestamp'))
+    if fill is not None and state_store is not None:
+        state_store.log('fill', exchange_id, symbol, side, amount, price, order_info['id'], order_info.get('timestamp'), fill['day'])
+    if fill is not None and side == 'sell':
+        record_trade(exchange_id, symbol, {
+            'timestamp': datetime.now().isoformat(),
+            'exchange': exchange_id,
+            'symbol': symbol,
+            'side': 'sell',
+            'amount': amount,
+            'price': price,
+            'order_id': order_info['id']
+        })
+    return fill
+
+def calculate_daily_loss(symbol, exchange_id):
+    total_loss = trade_ledger.daily_loss(exchange_id, symbol)
+    daily_losses[exchange_id][symbol] = total_loss
+    tick_logger.info("Pérdida total del día calculada para %s en %s: %s", symbol, exchange_id, total_loss)
+    return total_loss
+
+def calculate_profit_loss():
+    for exchange_id, symbols in daily_trades.items():
+        for symbol in symbols:
+            profit_loss[exchange_id][symbol] = trade_ledger.realized_profit_loss(exchange_id, symbol)
+
+def calculate_trade_profit_loss(trade):
+    if trade['side'] == 'sell':
+        return trade_ledger.trade_profit_loss(trade.get('order_id'))
+    return 0
+
+def calculate_total_invested(exchange_id, symbol):
+    return trade_ledger.total_invested(exchange_id, symbol)
+
+class CSVJournalBackend:
+    def __init__(self, base_name):
+        self.base_name = base_name
+        self.files = {}
+
+    def path(self, exchange_id, day):
+        return f"{self.base_name}_{exchange_id}_{day}.csv" if day else f"{self.base_name}_{exchange_id}.csv"
+
+    def write_batch(self, exchange_id, day, records, fsync):
+        path = self.path(exchange_id, day)
+        entry = self.files.get(exchange_id)
+        if entry is None or entry[0] != path:
+            if entry is not None:
+                entry[1].close()
+            file_exists = os.path.isfile(path) and os.path.getsize(path) > 0
+            file = open(path, mode='a', newline='')
+            writer = csv.DictWriter(file, fieldnames=list(records[0].keys()), extrasaction='ignore')
+            if not file_exists:
+                writer.writeheader()
+            entry = self.files[exchange_id] = (path, file, writer)
+        path, file, writer = entry
+        writer.writerows(records)
+        file.flush()
+        if fsync:
+            os.fsync(file.fileno())
+
+    def close(self):
+        for path, file, writer in self.files.values():
+            file.close()
+        self.files.clear()
+
+class SQLiteJournalBackend:
+    columns = ('timestamp', 'exchange', 'symbol', 'side', 'amount', 'price', 'order_id')
+
+    def __init__(self, base_name):
+        self.base_name = base_name
+        self.connections = {}
+
+    def connection(self, day):
+        path = f"{self.base_name}_{day}.sqlite" if day else f"{self.base_name}.sqlite"
+        connection = self.connections.get(path)
+        if connection is None:
+            for old_connection in self.connections.values():
+                old_connection.close()
+            self.connections.clear()
+            connection = sqlite3.connect(path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"CREATE TABLE IF NOT EXISTS trades ({', '.join(self.columns)})")
+            self.connections[path] = connection
+        return connection
+
+    def write_batch(self, exchange_id, day, records, fsync):
+        connection = self.connection(day)
+        connection.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        connection.executemany(
+            f"INSERT INTO trades ({', '.join(self.columns)}) VALUES ({', '.join('?' for _ in self.columns)})",
+            [tuple(record.get(column, exchange_id if column == 'exchange' else None) for column in self.columns) for record in records]
+        )
+        connection.commit()
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.connections.clear()
+
+class ParquetJournalBackend:
+    def __init__(self, base_name):
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.base_name = base_name
+        self.part = itertools.count()
+
+    def write_batch(self, exchange_id, day, records, fsync):
+        directory = f"{self.base_name}_{exchange_id}_{day}.parquet" if day else f"{self.base_name}_{exchange_id}.parquet"
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{int(time.time() * 1000)}-{next(self.part)}.parquet")
+        self.pyarrow.parquet.write_table(self.pyarrow.Table.from_pylist(records), path)
+        if fsync:
+            with open(path, 'rb') as file:
+                os.fsync(file.fileno())
+
+    def close(self):
+        pass
+
+journal_backends = {
+    'csv': CSVJournalBackend,
+    'sqlite': SQLiteJournalBackend,
+    'parquet': ParquetJournalBackend
+}
+
+def create_journal_backend(name, base_name):
+    try:
+        return journal_backends[name](base_name)
+    except Exception as e:
+        journal_logger.error("No se pudo iniciar el diario de operaciones '%s', se usará CSV: %s", name, e)
+        return CSVJournalBackend(base_name)
+
+class TradeJournal:
+    def __init__(self, backend='csv', batch_size=100, flush_interval=1.0, fsync='batch', rotation='none'):
+        self.backend = create_journal_backend(backend, csv_filename_template.split('.')[0])
+        self.batch_size = 1 if fsync == 'always' else max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync in ('batch', 'always')
+        self.rotation = rotation
+        self.queue = queue.Queue()
+        self.thread = None
+        self.stop_marker = object()
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="trade-journal", daemon=True)
+            self.thread.start()
+
+    def record(self, trade, exchange_id):
+        self.start()
+        self.queue.put_nowait((exchange_id, dict(trade)))
+
+    def run(self):
+        backend = self.backend
+        pending = []
+        first_pending = None
+        try:
+            while True:
+                timeout = None if not pending else max(0, self.flush_interval - (time.monotonic() - first_pending))
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is self.stop_marker:
+                    break
+                if item is not None:
+                    if not pending:
+                        first_pending = time.monotonic()
+                    pending.append(item)
+                if pending and (len(pending) >= self.batch_size or time.monotonic() - first_pending >= self.flush_interval):
+                    self.flush(backend, pending)
+                    pending = []
+        finally:
+            if pending:
+                self.flush(backend, pending)
+            backend.close()
+
+    def flush(self, backend, pending):
+        batches = {}
+        for exchange_id, trade in pending:
+            day = str(trade.get('timestamp', ''))[:10] if self.rotation == 'daily' else None
+            batches.setdefault((exchange_id, day), []).append(trade)
+        for (exchange_id, day), records in batches.items():
+            try:
+                backend.write_batch(exchange_id, day, records, self.fsync)
+            except Exception as e:
+                journal_logger.error("Error al escribir %s operaciones en el diario de %s: %s", len(records), exchange_id, e)
+
+    def close(self, timeout=10):
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(self.stop_marker)
+            self.thread.join(timeout)
+        self.thread = None
+
+def get_trade_journal():
+    global trade_journal
+    if trade_journal is None:
+        trade_journal = TradeJournal(**journal_settings)
+    return trade_journal
+
+def get_trade_sink():
+    return trade_sink if trade_sink is not None else get_trade_journal()
+
+def save_trade_to_csv(trade, exchange_id):
+    get_trade_sink().record(trade, exchange_id)
+
+def state_paths(directory, name):
+    return os.path.join(directory, f"{name}.snapshot.json"), os.path.join(directory, f"{name}.wal")
+
+def state_names(directory):
+    try:
+        files = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted({file[:-len(suffix)] for file in files for suffix in ('.snapshot.json', '.wal') if file.endswith(suffix)})
+
+def state_document(symbols, trades, ledger):
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'symbols': [[exchange_id, symbol, state] for (exchange_id, symbol), state in symbols.items()],
+        'trades': [[exchange_id, symbol, list(items)[-trade_history_size:]] for (exchange_id, symbol), items in trades.items() if items],
+        'ledger': ledger
+    }
+
+def write_state_snapshot(path, sequence, state, fsync=True):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        json.dump(dict(state, sequence=sequence), handle, default=str)
+        handle.flush()
+        if fsync:
+            os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+def remove_state_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def read_state_file(directory, name):
+    snapshot_path, wal_path = state_paths(directory, name)
+    document = {'name': name, 'updated': 0, 'sequence': 0, 'replayed': 0, 'symbols': {}, 'trades': {}, 'ledger': TradeLedger()}
+    try:
+        with open(snapshot_path, encoding='utf-8') as handle:
+            snapshot = json.load(handle)
+        document['updated'] = os.path.getmtime(snapshot_path)
+        document['sequence'] = snapshot.get('sequence', 0)
+        document['ledger'].load(snapshot.get('ledger', {}))
+        for exchange_id, symbol, state in snapshot.get('symbols', []):
+            document['symbols'][(exchange_id, symbol)] = state
+        for exchange_id, symbol, trades in snapshot.get('trades', []):
+            document['trades'][(exchange_id, symbol)] = list(trades)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        state_logger.error("No se pudo leer la instantánea de estado %s: %s", snapshot_path, e)
+    try:
+        with open(wal_path, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    state_logger.warning("Registro incompleto en %s, se descarta el resto del log", wal_path)
+                    break
+                if record[0] <= document['sequence']:
+                    continue
+                document['sequence'] = record[0]
+                document['replayed'] += 1
+                kind, exchange_id, symbol, *payload = record[1:]
+                if kind == 'fill':
+                    document['ledger'].record_fill(exchange_id, symbol, *payload)
+                elif kind == 'trade':
+                    document['trades'].setdefault((exchange_id, symbol), []).append(payload[0])
+                elif kind == 'symbol':
+                    document['symbols'][(exchange_id, symbol)] = payload[0]
+        if document['replayed']:
+            document['updated'] = max(document['updated'], os.path.getmtime(wal_path))
+    except FileNotFoundError:
+        pass
+    return document
+
+def read_state_directory(directory, names=None):
+    documents = sorted((read_state_file(directory, name) for name in (state_names(directory) if names is None else names)), key=lambda document: document['updated'])
+    owners = {}
+    for document in documents:
+        for pair in set(document['symbols']) | set(document['trades']) | document['ledger'].pairs():
+            owners[pair] = document
+    merged = {'symbols': {}, 'trades': {}, 'ledger': TradeLedger()}
+    for document in documents:
+        pairs = {pair for pair, owner in owners.items() if owner is document}
+        merged['symbols'].update((pair, state) for pair, state in document['symbols'].items() if pair in pairs)
+        merged['trades'].update((pair, trades) for pair, trades in document['trades'].items() if pair in pairs)
+        merged['ledger'].merge(document['ledger'].export(pairs))
+    return merged, documents
+
+def partition_state(assignment, workers):
+    if not state_settings.get('enabled', True):
+        return
+    directory = state_settings.get('directory', 'state')
+    names = state_names(directory)
+    if not names:
+        return
+    merged, documents = read_state_directory(directory, names)
+    pairs = set(merged['symbols']) | set(merged['trades']) | merged['ledger'].pairs()
+    targets = [f"shard{shard_id}" for shard_id in range(workers)]
+    for shard_id, name in enumerate(targets):
+        owned = {pair for pair in pairs if assignment.get(pair, 0) == shard_id}
+        symbols = {pair: state for pair, state in merged['symbols'].items() if pair in owned}
+        trades = {pair: items for pair, items in merged['trades'].items() if pair in owned}
+        write_state_snapshot(state_paths(directory, name)[0], 0, state_document(symbols, trades, merged['ledger'].export(owned)), state_settings.get('fsync', 'batch') in ('batch', 'always'))
+    remove_state_files([path for name in names for path in state_paths(directory, name) if name not in targets or path.endswith('.wal')])
+    state_logger.warning("Estado de %s archivos repartido por (exchange, símbolo) entre %s shards", len(documents), workers)
+
+class StateStore:
+    def __init__(self, directory='state', name='botxi', snapshot_interval=300, snapshot_records=10000, capture_interval=1.0, flush_interval=0.2, fsync='batch', fill_retention_days=2, collect=True):
+        self.directory = directory
+        self.name = name
+        self.snapshot_path, self.wal_path = state_paths(directory, name)
+        self.fill_retention_days = fill_retention_days
+        self.collect = collect
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_records = snapshot_records
+        self.capture_interval = capture_interval
+        self.flush_interval = 0 if fsync == 'always' else flush_interval
+        self.fsync = fsync in ('batch', 'always')
+        self.queue = queue.Queue()
+        self.thread = None
+        self.stop_marker = object()
+        self.task = None
+        self.sequence = 0
+        self.records = 0
+        self.last_snapshot = time.monotonic()
+        self.sent = {}
+        self.replaying = False
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="state-store", daemon=True)
+            self.thread.start()
+
+    def log(self, kind, *payload):
+        if self.replaying:
+            return
+        self.start()
+        self.sequence += 1
+        self.records += 1
+        self.queue.put_nowait((self.sequence, kind, payload))
+
+    def run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        wal = open(self.wal_path, 'a', encoding='utf-8')
+        first_pending = None
+        try:
+            while True:
+                timeout = None if first_pending is None else max(0, self.flush_interval - (time.monotonic() - first_pending))
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is self.stop_marker:
+                    break
+                if item is not None:
+                    sequence, kind, payload = item
+                    try:
+                        if kind == 'snapshot':
+                            self.sync(wal)
+                            first_pending = None
+                            state, discard = payload
+                            write_state_snapshot(self.snapshot_path, sequence, state, self.fsync)
+                            remove_state_files(discard)
+                            state_logger.info("Instantánea de estado %s escrita en %s", sequence, self.snapshot_path)
+                            wal.close()
+                            wal = open(self.wal_path, 'w', encoding='utf-8')
+                            continue
+                        wal.write(json.dumps([sequence, kind, *payload], default=str) + '\n')
+                    except Exception as e:
+                        state_logger.error("Error al escribir el registro %s (%s) del estado: %s", sequence, kind, e)
+                    if first_pending is None:
+                        first_pending = time.monotonic()
+                if first_pending is not None and time.monotonic() - first_pending >= self.flush_interval:
+                    self.sync(wal)
+                    first_pending = None
+        finally:
+            self.sync(wal)
+            wal.close()
+
+    def sync(self, wal):
+        try:
+            wal.flush()
+            if self.fsync:
+                os.fsync(wal.fileno())
+        except Exception as e:
+            state_logger.error("Error al sincronizar el log de estado %s: %s", self.wal_path, e)
+
+    def close(self, timeout=10):
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(self.stop_marker)
+            self.thread.join(timeout)
+        self.thread = None
+
+    def tracked_pairs(self):
+        return [(exchange_id, symbol) for exchange_id, symbols in open_orders.items() for symbol in symbols]
+
+    def signature(self, exchange_id, symbol):
+        return (
+            tuple((order['id'], order.get('status'), order.get('filled'), order.get('highest_price')) for order in open_orders[exchange_id][symbol]),
+            tuple((order['id'], order.get('status'), order.get('filled'), order.get('highest_price')) for order in pending_sells[exchange_id][symbol]),
+            active_symbols.get(exchange_id, {}).get(symbol, True),
+            reactivation_thresholds.get(exchange_id, {}).get(symbol)
+        )
+
+    def symbol_state(self, exchange_id, symbol):
+        return {
+            'open': [dict(order) for order in open_orders[exchange_id][symbol]],
+            'sell': [dict(order) for order in pending_sells[exchange_id][symbol]],
+            'active': active_symbols.get(exchange_id, {}).get(symbol, True),
+            'threshold': reactivation_thresholds.get(exchange_id, {}).get(symbol)
+        }
+
+    def capture(self):
+        for exchange_id, symbol in self.tracked_pairs():
+            signature = self.signature(exchange_id, symbol)
+            if self.sent.get((exchange_id, symbol)) != signature:
+                self.sent[(exchange_id, symbol)] = signature
+                self.log('symbol', exchange_id, symbol, self.symbol_state(exchange_id, symbol))
+        if self.records >= self.snapshot_records or time.monotonic() - self.last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def snapshot(self, discard=()):
+        tracked = {order['id'] for book in (open_orders, pending_sells) for symbols in book.values() for orders in symbols.values() for order in orders}
+        trade_ledger.prune((datetime.now().date() - timedelta(days=self.fill_retention_days)).isoformat(), tracked)
+        state = state_document(
+            {(exchange_id, symbol): self.symbol_state(exchange_id, symbol) for exchange_id, symbol in self.tracked_pairs()},
+            {(exchange_id, symbol): trades for exchange_id, symbols in daily_trades.items() for symbol, trades in symbols.items()},
+            trade_ledger.export()
+        )
+        self.start()
+        self.queue.put_nowait((self.sequence, 'snapshot', (state, list(discard))))
+        self.records = 0
+        self.last_snapshot = time.monotonic()
+
+    async def capture_loop(self):
+        while True:
+            try:
+                self.capture()
+            except Exception as e:
+                state_logger.error("Error al capturar el estado: %s", e)
+            await asyncio.sleep(self.capture_interval)
+
+    def start_capture(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.capture_loop(), name="state_capture")
+
+    async def stop(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+        self.snapshot()
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def restore(self):
+        started = time.perf_counter()
+        names = sorted(set(state_names(self.directory)) | {self.name}) if self.collect else [self.name]
+        merged, documents = read_state_directory(self.directory, names)
+        self.replaying = True
+        try:
+            trade_ledger.load(merged['ledger'].export())
+            for (exchange_id, symbol), state in merged['symbols'].items():
+                self.apply_symbol(exchange_id, symbol, state)
+            for (exchange_id, symbol), trades in merged['trades'].items():
+                if symbol in daily_trades.get(exchange_id, {}):
+                    for trade in trades[-trade_history_size:]:
+                        record_trade(exchange_id, symbol, trade)
+        finally:
+            self.replaying = False
+        self.sequence = max([document['sequence'] for document in documents if document['name'] == self.name], default=0)
+        count_pending_sell_orders.cache_clear()
+        for exchange_id, symbol in self.tracked_pairs():
+            if symbol in daily_losses.get(exchange_id, {}):
+                daily_losses[exchange_id][symbol] = trade_ledger.daily_loss(exchange_id, symbol)
+            self.sent[(exchange_id, symbol)] = self.signature(exchange_id, symbol)
+        self.snapshot([path for name in names if name != self.name for path in state_paths(self.directory, name)])
+        state_logger.warning("Estado restaurado desde %s (%s archivos): %s registros del log en %.1f ms", self.directory, sum(1 for document in documents if document['updated']), sum(document['replayed'] for document in documents), (time.perf_counter() - started) * 1000)
+
+    def apply_symbol(self, exchange_id, symbol, state):
+        if symbol not in open_orders.get(exchange_id, {}):
+            return
+        if exchanges_config.get(exchange_id, {}).get('name') != 'simulated':
+            for book, orders in ((open_orders, state['open']), (pending_sells, state['sell'])):
+                book[exchange_id][symbol].clear()
+                book[exchange_id][symbol].extend(orders)
+        active_symbols[exchange_id][symbol] = state['active']
+        reactivation_thresholds[exchange_id][symbol] = state['threshold']
+
+def get_state_store():
+    global state_store
+    if state_store is None and state_settings.get('enabled', True):
+        state_store = StateStore(**{key: value for key, value in state_settings.items() if key != 'enabled'})
+    return state_store
+
+class Backtester:
+    max_pending_sells = 3
+
+    def __init__(self, data, model=None, train_fraction=0.5, bar_seconds=3600, fee=None):
+        data = data.reset_index(drop=True)
+        self.split = int(len(data) * train_fraction)
+        if model is None:
+            model, metadata = fit_price_model(data.iloc[:self.split], n_jobs=1)
+        self.model = model
+        self.bar_seconds = bar_seconds
+        self.fee = commission_rate if fee is None else fee
+        self.open, self.high, self.low, self.close, self.volume = (data[column].to_numpy(dtype=np.float64) for column in BatchPredictor.feature_columns)
+        self.days = pd.to_datetime(data['timestamp']).to_numpy().astype('datetime64[D]').astype(np.int64)
+        X = np.column_stack([self.open, self.high, self.low, self.close, self.volume])[self.split:]
+        forest = compile_model(model)
+        self.predictions = np.full(len(data), np.nan)
+        self.predictions[self.split:] = forest.predict(X) if forest is not None else model.predict(X)
+        self.signals = self.predictions > self.close
+
+    def buy_fills(self, bar, prices, timeout_bars):
+        window = self.low[bar + 1:bar + 1 + timeout_bars]
+        if not len(window):
+            return np.full(len(prices), -1)
+        hits = window[np.newaxis, :] <= prices[:, np.newaxis]
+        return np.where(hits.any(axis=1), hits.argmax(axis=1) + bar + 1, -1)
+
+    def sell_fill(self, bar, price):
+        hits = np.flatnonzero(self.high[bar + 1:] >= price)
+        return bar + 1 + hits[0] if len(hits) else -1
+
+    def run(self, spread, take_profit, max_orders, order_timeout, max_daily_loss, trade_amount=1.0, **ignored):
+        timeout_bars = max(1, int(np.ceil(order_timeout / self.bar_seconds)))
+        buys = []
+        sells = []
+        realized = 0.0
+        fees = 0.0
+        inventory = 0.0
+        cost = 0.0
+        day = None
+        day_realized = 0.0
+        round_trips = 0
+        buys_placed = 0
+        equity = np.zeros(len(self.close) - self.split)
+        for bar in range(self.split, len(self.close)):
+            if self.days[bar] != day:
+                day = self.days[bar]
+                day_realized = 0.0
+            for order in [order for order in buys if order[1] == bar]:
+                buys.remove(order)
+                price, amount = order[0], order[2]
+                fee = price * amount * self.fee
+                fees += fee
+                realized -= fee
+                day_realized -= fee
+                inventory += amount
+                cost += price * amount
+                sell_price = price * (1 + take_profit)
+                sells.append((sell_price, self.sell_fill(bar, sell_price), amount, price))
+            buys = [order for order in buys if order[1] != -1 or order[3] > bar]
+            for order in [order for order in sells if order[1] == bar]:
+                sells.remove(order)
+                sell_price, fill_bar, amount, buy_price = order
+                fee = sell_price * amount * self.fee
+                profit = (sell_price - buy_price) * amount - fee
+                fees += fee
+                realized += profit
+                day_realized += profit
+                inventory -= amount
+                cost -= buy_price * amount
+                round_trips += 1
+            equity[bar - self.split] = realized + inventory * self.close[bar] - cost
+            if not self.signals[bar] or -day_realized > max_daily_loss or len(sells) >= self.max_pending_sells:
+                continue
+            count = max_orders - len(buys) - len(sells)
+            if count <= 0:
+                continue
+            prices = self.close[bar] * (1 - spread * np.arange(1, count + 1))
+            fills = self.buy_fills(bar, prices, timeout_bars)
+            buys.extend((price, fill, trade_amount, bar + timeout_bars) for price, fill in zip(prices.tolist(), fills.tolist()))
+            buys_placed += count
+        drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity if len(equity) else equity
+        return {
+            'bars': len(equity),
+            'signals': int(self.signals[self.split:].sum()),
+            'buys_placed': buys_placed,
+            'round_trips': round_trips,
+            'realized': realized,
+            'fees': fees,
+            'unrealized': float(equity[-1]) - realized if len(equity) else 0.0,
+            'equity': float(equity[-1]) if len(equity) else 0.0,
+            'max_drawdown': float(drawdown.max()) if len(drawdown) else 0.0,
+            'open_inventory': inventory
+        }
+
+def expand_backtest_grid(base_params, grid):
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(base_params)
+        params.update(zip(names, values))
+        yield params
+
+def run_backtest_task(exchange_id, symbol, data, base_params, grid, fee):
+    backtester = Backtester(data, fee=fee)
+    results = []
+    for params in expand_backtest_grid(base_params, grid):
+        result = backtester.run(**params)
+        result.update({'exchange': exchange_id, 'symbol': symbol})
+        result.update({name: params[name] for name in ('spread', 'take_profit', 'max_orders', 'order_timeout', 'max_daily_loss')})
+        results.append(result)
+    return results
+
+async def fetch_ohlcv_history_async(symbol, exchange_id, timeframe='1h', days=90):
+    exchange = exchanges[exchange_id]
+    since = exchange.milliseconds() - days * 86400000
+    rows = []
+    while True:
+        batch = await fetch_ohlcv_raw_async(symbol, exchange_id, timeframe, since=since, limit=1000)
+        batch = [row for row in batch if not rows or row[0] > rows[-1][0]]
+        if not batch:
+            break
+        rows.extend(batch)
+        since = rows[-1][0] + 1
+        if len(batch) < 2:
+            break
+    df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+async def run_backtest(days=90, grid_file=None, output='backtest_results.csv', workers=None):
+    grid = {}
+    if grid_file:
+        with open(grid_file) as file:
+            grid = json.load(file)
+    await initialize_exchanges()
+    datasets = []
+    try:
+        for exchange_id, exchange in exchanges.items():
+            for symbol_config in symbols_config:
+                symbol = symbol_config['symbol']
+                if symbol not in exchanges_config[exchange_id].get('symbols', []):
+                    continue
+                try:
+                    data = await fetch_ohlcv_history_async(symbol, exchange_id, days=days)
+                    if validate_data(data):
+                        datasets.append((exchange_id, symbol, data, symbol_config))
+                except Exception as e:
+                    backtest_logger.error("Error al descargar el histórico de %s en %s: %s", symbol, exchange_id, e)
+    finally:
+        for exchange in exchanges.values():
+            await exchange.close()
+    backtest_logger.warning("Backtest de %s símbolos con %s combinaciones de parámetros", len(datasets), len(list(expand_backtest_grid({}, grid))))
+    loop = asyncio.get_running_loop()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [
+            loop.run_in_executor(executor, run_backtest_task, exchange_id, symbol, data, symbol_config, grid, commission_rate)
+            for exchange_id, symbol, data, symbol_config in datasets
+        ]
+        for (exchange_id, symbol, data, symbol_config), future in zip(datasets, futures):
+            try:
+                symbol_results = await future
+            except Exception as e:
+                backtest_logger.error("Error en el backtest de %s en %s: %s", symbol, exchange_id, e)
+                continue
+            best = max(symbol_results, key=lambda result: result['equity'])
+            backtest_logger.warning("Mejor configuración para %s en %s: spread=%s take_profit=%s max_orders=%s equity=%.4f max_drawdown=%.4f", symbol, exchange_id, best['spread'], best['take_profit'], best['max_orders'], best['equity'], best['max_drawdown'])
+            results.extend(symbol_results)
+    if results:
+        pd.DataFrame(results).sort_values(['exchange', 'symbol', 'equity'], ascending=[True, True, False]).to_csv(output, index=False)
+        backtest_logger.warning("Resultados del backtest guardados en %s", output)
+    return results
+
+def handle_command(command):
+    engine_logger.info("Comando recibido: %s", command)
+
+def get_orders_snapshot():
+    orders = []
+    for book_name, book in (('open', open_orders), ('pending_sell', pending_sells)):
+        for exchange_id, symbols in book.items():
+            for symbol, symbol_orders in symbols.items():
+                for order in symbol_orders:
+                    orders.append(dict({'book': book_name, 'exchange': exchange_id}, **summarize_order(symbol, order)))
+    return orders
+
+def summarize_order(symbol, order):
+    return {
+        'symbol': order.get('symbol', symbol),
+        'id': order.get('id'),
+        'side': order.get('side'),
+        'amount': order.get('amount'),
+        'price': order.get('price'),
+        'status': order.get('status'),
+        'timestamp': order.get('timestamp')
+    }
+
+def get_actions_snapshot(since=0, limit=100):
+    return {
+        'events': actions_feed.since(since, limit),
+        'last_seq': actions_feed.last_seq,
+        'log': list(actions_log)[-limit:]
+    }
+
+class ControlServer:
+    reasons = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+    def __init__(self, engine, host='127.0.0.1', port=8765, unix_socket=None, token=None):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.token = token
+        self.server = None
+
+    async def start(self):
+        if self.unix_socket:
+            self.server = await asyncio.start_unix_server(self.handle, path=self.unix_socket)
+            api_logger.warning("API de control escuchando en %s", self.unix_socket)
+        else:
+            self.server = await asyncio.start_server(self.handle, self.host, self.port)
+            api_logger.warning("API de control escuchando en http://%s:%s", self.host, self.port)
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1')
+            method, target, _ = request_line.split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            body = await reader.readexactly(length) if length else b''
+            if self.token and headers.get('x-botxi-token') != self.token:
+                status, payload = 401, {'error': 'unauthorized'}
+            else:
+                status, payload = await self.route(method.upper(), target, body)
+        except Exception as e:
+            status, payload = 400, {'error': str(e)}
+        if isinstance(payload, str):
+            data = payload.encode()
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            data = json.dumps(payload, default=str).encode()
+            content_type = 'application/json'
+        head = f"HTTP/1.1 {status} {self.reasons.get(status, '')}\r\nContent-Type: {content_type}\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n"
+        try:
+            writer.write(head.encode('latin-1') + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def route(self, method, target, body):
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+        if method == 'GET':
+            if parts == ['status']:
+                return 200, self.engine.status()
+            if parts == ['orders']:
+                return 200, get_orders_snapshot()
+            if parts == ['loop']:
+                return 200, {'slow_callbacks': list(loop_monitor.slow_callbacks) if loop_monitor else []}
+            if parts == ['metrics']:
+                return 200, metrics.render()
+            if parts == ['actions']:
+                return 200, get_actions_snapshot(int(query.get('since', ['0'])[0]), int(query.get('limit', ['100'])[0]))
+            return 404, {'error': 'not found'}
+        if method == 'POST':
+            if parts == ['bot', 'start']:
+                self.engine.start_bot()
+                return 200, self.engine.status()
+            if parts == ['config', 'reload']:
+                return 200, await self.engine.reload_config()
+            if parts == ['profile']:
+                started = start_profiler(float(query['seconds'][0]) if 'seconds' in query else None)
+                return 200, {'profiling': True, 'started': started}
+            if parts == ['bot', 'stop']:
+                await self.engine.stop_bot()
+                return 200, self.engine.status()
+            if len(parts) == 3 and parts[0] == 'accounts' and parts[2] in ('start', 'stop'):
+                exchange_id = urllib.parse.unquote(parts[1])
+                if exchange_id not in exchanges_config:
+                    return 404, {'error': f"exchange {exchange_id} no configurado"}
+                if parts[2] == 'start':
+                    self.engine.start_account(exchange_id)
+                else:
+                    self.engine.stop_account(exchange_id)
+                return 200, self.engine.status()
+            return 404, {'error': 'not found'}
+        return 405, {'error': 'method not allowed'}
+
+class ControlClient:
+    def __init__(self, url='http://127.0.0.1:8765', token=None):
+        self.url = urllib.parse.urlsplit(url)
+        self.token = token
+
+    async def request(self, method, path, payload=None):
+        if self.url.scheme == 'unix':
+            reader, writer = await asyncio.open_unix_connection(self.url.path)
+            host = 'localhost'
+        else:
+            reader, writer = await asyncio.open_connection(self.url.hostname, self.url.port or 80)
+            host = self.url.netloc
+        body = json.dumps(payload).encode() if payload is not None else b''
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}", "Connection: close"]
+        if self.token:
+            headers.append(f"X-Botxi-Token: {self.token}")
+        try:
+            writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, data = response.partition(b'\r\n\r\n')
+        status = int(head.split(b' ', 2)[1])
+        result = json.loads(data) if data else None
+        if status != 200:
+            raise RuntimeError(f"Error {status} en {method} {path}: {result}")
+        return result
+
+class RemoteEngine:
+    def __init__(self, client, interval=2):
+        self.client = client
+        self.interval = interval
+        self.is_running = False
+        self.running_accounts = set()
+        self.status_listeners = []
+
+    def add_status_listener(self, callback):
+        self.status_listeners.append(callback)
+
+    def notify_status(self):
+        for callback in self.status_listeners:
+            try:
+                callback()
+            except Exception as e:
+                gui_logger.error("Error al notificar el cambio de estado: %s", e)
+
+    def start_bot(self):
+        asyncio.create_task(self.command('/bot/start'))
+
+    async def stop_bot(self):
+        await self.command('/bot/stop')
+
+    def start_account(self, exchange_id):
+        asyncio.create_task(self.command(f"/accounts/{urllib.parse.quote(exchange_id, safe='')}/start"))
+
+    def stop_account(self, exchange_id):
+        asyncio.create_task(self.command(f"/accounts/{urllib.parse.quote(exchange_id, safe='')}/stop"))
+
+    def schedule_reload(self):
+        asyncio.create_task(self.reload_config(), name="reload_config")
+
+    async def reload_config(self):
+        try:
+            changes = await self.client.request('POST', '/config/reload')
+            gui_logger.warning("Configuración recargada en el bot remoto: %s", changes)
+        except Exception as e:
+            gui_logger.error("Error al recargar la configuración remota: %s", e)
+
+    async def command(self, path):
+        try:
+            self.apply_status(await self.client.request('POST', path))
+        except Exception as e:
+            gui_logger.error("Error al enviar %s a la API de control: %s", path, e)
+
+    def apply_status(self, status):
+        self.is_running = status['running']
+        self.running_accounts = set()
+        for exchange_id, account in status['accounts'].items():
+            connection_status[exchange_id] = account['connection']
+            exchange_running_status[exchange_id] = account['running']
+            if account['running']:
+                self.running_accounts.add(exchange_id)
+            for symbol, symbol_status in account['symbols'].items():
+                active_symbols.setdefault(exchange_id, {})[symbol] = symbol_status['active']
+                market_prices.setdefault(exchange_id, {})[symbol] = symbol_status['market_price']
+                predicted_prices.setdefault(exchange_id, {})[symbol] = symbol_status['predicted_price']
+        self.notify_status()
+
+    async def sync(self):
+        self.apply_status(await self.client.request('GET', '/status'))
+        orders = await self.client.request('GET', '/orders')
+        for book in (open_orders, pending_sells):
+            for symbols in book.values():
+                for symbol_orders in symbols.values():
+                    symbol_orders.clear()
+        for order in orders:
+            book = open_orders if order['book'] == 'open' else pending_sells
+            book.setdefault(order['exchange'], {}).setdefault(order['symbol'], deque(maxlen=order_buffer_size)).append(order)
+        while True:
+            actions = await self.client.request('GET', f"/actions?since={actions_feed.last_seq}&limit=1000")
+            actions_feed.extend(actions['events'])
+            if not actions['events'] or actions_feed.last_seq >= actions['last_seq']:
+                break
+        actions_log.clear()
+        actions_log.extend(actions['log'])
+
+    async def run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                gui_logger.error("Error al sincronizar con la API de control: %s", e)
+            await asyncio.sleep(self.interval)
+
+def account_loss_exceeded(exchange_id):
+    limit = exchanges_config.get(exchange_id, {}).get('max_account_daily_loss')
+    return limit is not None and sum(daily_losses.get(exchange_id, {}).values()) > limit
+
+def drain_queue(source, timeout):
+    try:
+        items = [source.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    while True:
+        try:
+            items.append(source.get_nowait())
+        except queue.Empty:
+            return items
+
+def assign_shards(workers, previous=None):
+    pairs = [(exchange_id, symbol) for exchange_id, exchange_data in exchanges_config.items() if exchange_data.get('active', False) for symbol in configured_symbols(exchange_id)]
+    if not previous:
+        size = max(1, -(-len(pairs) // workers))
+        return {pair: index // size for index, pair in enumerate(pairs)}
+    assignment = {pair: previous[pair] for pair in pairs if pair in previous}
+    loads = [0] * workers
+    for shard in assignment.values():
+        loads[shard] += 1
+    for pair in pairs:
+        if pair not in assignment:
+            shard = loads.index(min(loads))
+            assignment[pair] = shard
+            loads[shard] += 1
+    return assignment
+
+def shard_config(shard_id, assignment, workers):
+    config = config_snapshot()
+    hosts = {}
+    for (exchange_id, symbol), shard in assignment.items():
+        hosts.setdefault(exchange_id, set()).add(shard)
+    exchanges_subset = {}
+    for exchange_id, exchange_data in config['exchanges'].items():
+        symbols = [symbol for symbol in exchange_data.get('symbols', []) if assignment.get((exchange_id, symbol)) == shard_id]
+        if symbols:
+            exchanges_subset[exchange_id] = dict(exchange_data, symbols=symbols, rate_limit_share=1 / len(hosts[exchange_id]))
+    config.update({
+        'exchanges': exchanges_subset,
+        'training_workers': max(1, config['training_workers'] // workers),
+        'control_api': {},
+        'journal': {},
+        'state': dict(config.get('state', {}), name=f"shard{shard_id}", collect=False),
+        'sharding': {'training_cpus': max(1, (os.cpu_count() or 1) // workers)}
+    })
+    return config
+
+class ShardReporter:
+    def __init__(self, shard_id, engine, updates, interval=0.5):
+        self.shard_id = shard_id
+        self.engine = engine
+        self.updates = updates
+        self.interval = interval
+        self.sent_symbols = {}
+        self.sent_orders = {}
+        self.cursor = 0
+        self.trades = []
+
+    def record(self, trade, exchange_id):
+        self.trades.append((trade, exchange_id))
+
+    def collect(self):
+        calculate_profit_loss()
+        symbols = {}
+        orders = {}
+        for exchange_id, prices in market_prices.items():
+            for symbol in prices:
+                key = (exchange_id, symbol)
+                state = (
+                    active_symbols.get(exchange_id, {}).get(symbol, True),
+                    prices[symbol],
+                    predicted_prices.get(exchange_id, {}).get(symbol),
+                    daily_losses.get(exchange_id, {}).get(symbol, 0),
+                    profit_loss.get(exchange_id, {}).get(symbol, 0)
+                )
+                if self.sent_symbols.get(key) != state:
+                    symbols[key] = self.sent_symbols[key] = state
+                books = tuple(
+                    [summarize_order(symbol, order) for order in book.get(exchange_id, {}).get(symbol, ())]
+                    for book in (open_orders, pending_sells)
+                )
+                if self.sent_orders.get(key) != books:
+                    orders[key] = self.sent_orders[key] = books
+        events = actions_feed.since(self.cursor)
+        if events:
+            self.cursor = events[-1]['seq']
+        log = list(actions_log)
+        actions_log.clear()
+        trades, self.trades = self.trades, []
+        return {
+            'shard': self.shard_id,
+            'is_running': self.engine.is_running,
+            'accounts': sorted(self.engine.running_accounts),
+            'connection': dict(connection_status),
+            'running': dict(exchange_running_status),
+            'symbols': symbols,
+            'orders': orders,
+            'events': events,
+            'log': log,
+            'trades': trades
+        }
+
+    async def run(self):
+        while True:
+            try:
+                self.updates.put(self.collect())
+            except Exception as e:
+                engine_logger.error("Error al enviar el estado del shard %s: %s", self.shard_id, e)
+            await asyncio.sleep(self.interval)
+
+def run_shard(shard_id, config, commands, updates):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    try:
+        asyncio.run(shard_main(shard_id, config, commands, updates))
+    finally:
+        stop_logging()
+
+async def shard_main(shard_id, config, commands, updates):
+    global trade_sink, applied_config
+    apply_config_settings(config)
+    configure_logging(logging_settings)
+    initialize_structures()
+    applied_config = config_snapshot()
+    engine = TradingEngine()
+    reporter = trade_sink = ShardReporter(shard_id, engine, updates, config.get('report_interval', 0.5))
+    get_loop_monitor().start()
+    loop = asyncio.get_running_loop()
+    reporter_task = asyncio.create_task(reporter.run(), name=f"shard_reporter[{shard_id}]")
+    engine_logger.warning("Shard %s iniciado con %s exchanges (pid %s)", shard_id, len(exchanges_config), os.getpid())
+    try:
+        await engine.prepare()
+        coordinator = multiprocessing.parent_process()
+        while coordinator is None or coordinator.is_alive():
+            for command, *args in await loop.run_in_executor(None, drain_queue, commands, 0.5):
+                if command == 'stop':
+                    return
+                try:
+                    if command == 'start_bot':
+                        engine.start_bot(*args)
+                    elif command == 'stop_bot':
+                        await engine.stop_bot()
+                    elif command == 'start_account' and args[0] in exchanges_config:
+                        engine.start_account(args[0])
+                    elif command == 'stop_account':
+                        engine.stop_account(args[0])
+                    elif command == 'reload':
+                        await engine.reload_config(args[0])
+                except Exception as e:
+                    engine_logger.error("Error al ejecutar %s en el shard %s: %s", command, shard_id, e)
+    finally:
+        if engine.is_running:
+            await engine.stop_bot()
+        await shutdown_bot()
+        reporter_task.cancel()
+        updates.put(reporter.collect())
+        loop_monitor.stop()
+        engine_logger.warning("Shard %s detenido", shard_id)
+
+class ShardedEngine(TradingEngine):
+    def __init__(self, workers, report_interval=0.5):
+        super().__init__()
+        self.workers = workers
+        self.report_interval = report_interval
+        self.context = multiprocessing.get_context('spawn')
+        self.updates = self.context.Queue()
+        self.shards = []
+        self.assignment = {}
+        self.shard_state = {}
+        self.consumer = None
+
+    def spawn_shard(self, shard_id):
+        config = dict(shard_config(shard_id, self.assignment, self.workers), report_interval=self.report_interval)
+        commands = self.context.Queue()
+        process = self.context.Process(target=run_shard, args=(shard_id, config, commands, self.updates), name=f"botxi-shard-{shard_id}")
+        process.start()
+        engine_logger.warning("Shard %s lanzado (pid %s) con %s símbolos", shard_id, process.pid, sum(1 for shard in self.assignment.values() if shard == shard_id))
+        return {'process': process, 'commands': commands}
+
+    async def prepare(self):
+        self.assignment = assign_shards(self.workers)
+        await asyncio.get_running_loop().run_in_executor(None, partition_state, self.assignment, self.workers)
+        self.shards = [self.spawn_shard(shard_id) for shard_id in range(self.workers)]
+        self.consumer = asyncio.create_task(self.consume(), name="shard_coordinator")
+
+    def send(self, command, exchange_id=None):
+        for shard_id, shard in enumerate(self.shards):
+            if exchange_id is None or any(owner == shard_id and pair[0] == exchange_id for pair, owner in self.assignment.items()):
+                shard['commands'].put(command)
+
+    def shard_accounts(self, shard_id):
+        return sorted({exchange_id for (exchange_id, symbol), owner in self.assignment.items() if owner == shard_id and exchange_id in self.running_accounts})
+
+    def start_bot(self, accounts=None):
+        if not self.is_running:
+            self.is_running = True
+            self.running_accounts = {exchange_id for exchange_id, _ in self.assignment if accounts is None or exchange_id in accounts}
+            for exchange_id in self.running_accounts:
+                exchange_running_status[exchange_id] = True
+            for shard_id, shard in enumerate(self.shards):
+                shard['commands'].put(('start_bot', self.shard_accounts(shard_id)))
+            self.notify_status()
+            engine_logger.info("Bot iniciado en %s shards", len(self.shards))
+        else:
+            engine_logger.info("El bot ya está en ejecución.")
+
+    async def run_bot(self):
+        pass
+
+    async def stop_bot(self):
+        if self.is_running:
+            self.is_running = False
+            self.running_accounts.clear()
+            for exchange_id in exchanges_config.keys():
+                exchange_running_status[exchange_id] = False
+            self.send(('stop_bot',))
+            self.notify_status()
+            engine_logger.info("Bot detenido en todos los shards")
+
+    def start_account(self, exchange_id):
+        if exchange_id not in self.running_accounts:
+            self.running_accounts.add(exchange_id)
+            exchange_running_status[exchange_id] = True
+            self.send(('start_account', exchange_id), exchange_id)
+            self.notify_status()
+            engine_logger.info("Iniciando %s en sus shards", exchange_id)
+
+    def stop_account(self, exchange_id):
+        if exchange_id in self.running_accounts:
+            self.running_accounts.remove(exchange_id)
+            exchange_running_status[exchange_id] = False
+            self.send(('stop_account', exchange_id), exchange_id)
+            self.notify_status()
+            engine_logger.info("Deteniendo %s en sus shards", exchange_id)
+
+    async def apply_config(self, config=None):
+        global applied_config
+        previous = applied_config or config_snapshot()
+        if config is None:
+            config = await asyncio.get_running_loop().run_in_executor(None, read_encrypted_config)
+        apply_config_settings(copy.deepcopy(config))
+        initialize_structures()
+        assignment = assign_shards(self.workers, self.assignment)
+        added = [pair for pair in assignment if pair not in self.assignment]
+        removed = [pair for pair in self.assignment if pair not in assignment]
+        self.assignment = assignment
+        for shard_id, shard in enumerate(self.shards):
+            shard['commands'].put(('reload', dict(shard_config(shard_id, assignment, self.workers), report_interval=self.report_interval)))
+        applied_config = config_snapshot()
+        changes = {
+            'symbols': len(assignment),
+            'symbols_started': [f"{symbol}@{exchange_id}" for exchange_id, symbol in added],
+            'symbols_stopped': [f"{symbol}@{exchange_id}" for exchange_id, symbol in removed],
+            'settings': sorted(key for key in set(previous) | set(applied_config) if previous.get(key) != applied_config.get(key))
+        }
+        if 'logging' in changes['settings']:
+            configure_logging(logging_settings)
+        self.notify_status()
+        config_logger.warning("Configuración recargada en %s shards: %s", len(self.shards), changes)
+        return changes
+
+    def status(self):
+        status = super().status()
+        status['shards'] = [
+            {
+                'pid': shard['process'].pid,
+                'alive': shard['process'].is_alive(),
+                'symbols': sum(1 for owner in self.assignment.values() if owner == shard_id),
+                'accounts': self.shard_state.get(shard_id, {}).get('accounts', []),
+                'last_update': self.shard_state.get(shard_id, {}).get('updated')
+            }
+            for shard_id, shard in enumerate(self.shards)
+        ]
+        return status
+
+    def apply_update(self, update):
+        shard_id = update['shard']
+        self.shard_state[shard_id] = {'accounts': update['accounts'], 'connection': update['connection'], 'running': update['running'], 'updated': time.time()}
+        for (exchange_id, symbol), (active, price, predicted, loss, pnl) in update['symbols'].items():
+            active_symbols.setdefault(exchange_id, {})[symbol] = active
+            market_prices.setdefault(exchange_id, {})[symbol] = price
+            predicted_prices.setdefault(exchange_id, {})[symbol] = predicted
+            daily_losses.setdefault(exchange_id, {})[symbol] = loss
+            profit_loss.setdefault(exchange_id, {})[symbol] = pnl
+        for (exchange_id, symbol), books in update['orders'].items():
+            for book, orders in zip((open_orders, pending_sells), books):
+                symbol_orders = book.setdefault(exchange_id, {}).setdefault(symbol, deque(maxlen=order_buffer_size))
+                symbol_orders.clear()
+                symbol_orders.extend(orders)
+        for event in update['events']:
+            actions_feed.append(event, event['profit_loss'])
+        actions_log.extend(update['log'])
+        for trade, exchange_id in update['trades']:
+            get_trade_journal().record(trade, exchange_id)
+
+    def merge_account_status(self):
+        for exchange_id in exchanges_config:
+            states = [state for state in self.shard_state.values() if exchange_id in state['connection']]
+            if states:
+                connected = all(state['connection'][exchange_id] == 'Connected' for state in states)
+                connection_status[exchange_id] = 'Connected' if connected else 'Disconnected'
+
+    async def consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            updates = await loop.run_in_executor(None, drain_queue, self.updates, 0.5)
+            for update in updates:
+                try:
+                    self.apply_update(update)
+                except Exception as e:
+                    engine_logger.error("Error al aplicar el estado del shard %s: %s", update.get('shard'), e)
+            if updates:
+                self.merge_account_status()
+                for exchange_id in list(self.running_accounts):
+                    if account_loss_exceeded(exchange_id):
+                        engine_logger.warning("Pérdida diaria máxima de la cuenta alcanzada en %s, deteniendo operaciones", exchange_id)
+                        self.stop_account(exchange_id)
+            respawned = False
+            for shard_id, shard in enumerate(self.shards):
+                if not shard['process'].is_alive() and shard['process'].exitcode not in (0, None):
+                    engine_logger.error("Shard %s terminó con código %s, relanzando", shard_id, shard['process'].exitcode)
+                    self.shards[shard_id] = self.spawn_shard(shard_id)
+                    if self.is_running:
+                        self.shards[shard_id]['commands'].put(('start_bot', self.shard_accounts(shard_id)))
+                    respawned = True
+            if updates or respawned:
+                self.notify_status()
+
+    async def close(self):
+        for shard in self.shards:
+            shard['commands'].put(('stop',))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, shard['process'].join, 30) for shard in self.shards))
+        for shard_id, shard in enumerate(self.shards):
+            if shard['process'].is_alive():
+                engine_logger.warning("Shard %s no terminó a tiempo, forzando su cierre", shard_id)
+                shard['process'].kill()
+        if self.consumer is not None:
+            self.consumer.cancel()
+            await asyncio.gather(self.consumer, return_exceptions=True)
+            for update in drain_queue(self.updates, 0):
+                self.apply_update(update)
+        engine_logger.warning("Shards detenidos")
+
+def create_control_server(engine):
+    return ControlServer(
+        engine,
+        host=control_api_settings.get('host', '127.0.0.1'),
+        port=control_api_settings.get('port', 8765),
+        unix_socket=control_api_settings.get('unix_socket'),
+        token=control_api_settings.get('token')
+    )
+
+async def wait_for_shutdown_signal(engine=None):
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    handlers = [(signal.SIGINT, stop_event.set), (signal.SIGTERM, stop_event.set)]
+    if engine is not None and hasattr(signal, 'SIGHUP'):
+        handlers.append((signal.SIGHUP, engine.schedule_reload))
+    for signum, handler in handlers:
+        try:
+            loop.add_signal_handler(signum, handler)
+        except (NotImplementedError, RuntimeError):
+            pass
+    await stop_event.wait()
+
+def create_engine(shards=None):
+    workers = shards if shards is not None else sharding_settings.get('workers', 0)
+    if workers > 1:
+        return ShardedEngine(workers, sharding_settings.get('report_interval', 0.5))
+    return TradingEngine()
+
+async def main(mode='gui', control_url=None, autostart=True, profile=None, shards=None):
+    control_server = None
+    engine = None
+    try:
+        load_encrypted_config()
+        engine_logger.warning("Configuración cargada. Exchanges configurados: %s", list(exchanges_config.keys()))
+        engine_logger.warning("Símbolos configurados: %s", [s['symbol'] for s in symbols_config])
+        engine_logger.warning("Configuración de exchanges:")
+        for exchange_id, exchange_data in exchanges_config.items():
+            engine_logger.warning("%s: %s", exchange_id, exchange_data)
+        get_loop_monitor().start()
+        if profile:
+            start_profiler(profile)
+        if mode == 'client':
+            load_gui_modules()
+            root = tk.Tk()
+            engine = RemoteEngine(ControlClient(control_url, token=control_api_settings.get('token')))
+            gui = BotGUI(root, engine)
+            await asyncio.gather(gui.run_gui(), engine.run())
+            return
+        engine = create_engine(shards)
+        if mode == 'headless' or control_api_settings.get('enabled', False):
+            control_server = create_control_server(engine)
+            await control_server.start()
+        if mode == 'headless':
+            await engine.prepare()
+            if autostart:
+                engine.start_bot()
+            await wait_for_shutdown_signal(engine)
+            return
+        load_gui_modules()
+        root = tk.Tk()
+        gui = BotGUI(root, engine)
+        await engine.prepare()
+        await gui.run_gui()
+    except KeyboardInterrupt:
+        engine_logger.warning("Programa terminado por el usuario")
+    except Exception as e:
+        engine_logger.error("Error inesperado: %s", e)
+        engine_logger.exception("Traceback completo:")
+    finally:
+        engine_logger.warning("Iniciando cierre del programa...")
+        if control_server:
+            await control_server.stop()
+        if isinstance(engine, ShardedEngine):
+            await engine.close()
+        if loop_monitor is not None:
+            loop_monitor.stop()
+        await shutdown_bot()
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+        await asyncio.gather(*[task for task in asyncio.all_tasks() if task is not asyncio.current_task()], return_exceptions=True)
+        engine_logger.warning("Programa terminado completamente")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BOTXI Cryptocurrency Trading Bot")
+    parser.add_argument('--headless', action='store_true', help="ejecutar el motor de trading sin GUI, controlado por la API local")
+    parser.add_argument('--no-autostart', action='store_true', help="en modo headless, no iniciar las cuentas al arrancar")
+    parser.add_argument('--connect', metavar='URL', help="abrir la GUI como cliente de un bot headless (http://host:puerto o unix:///ruta)")
+    parser.add_argument('--profile', type=float, metavar='SEGUNDOS', help="perfilar las tareas del bucle de eventos durante los primeros SEGUNDOS")
+    parser.add_argument('--shards', type=int, metavar='N', help="repartir los símbolos entre N procesos de trading")
+    parser.add_argument('--backtest', action='store_true', help="simular la estrategia sobre el histórico de los símbolos configurados")
+    parser.add_argument('--days', type=int, default=90, help="días de histórico para el backtest")
+    parser.add_argument('--sweep', metavar='JSON', help="archivo JSON con listas de valores por parámetro para el barrido del backtest")
+    parser.add_argument('--output', default='backtest_results.csv', help="archivo CSV con los resultados del backtest")
+    parser.add_argument('--workers', type=int, help="procesos para el backtest (por defecto, uno por núcleo)")
+    parser.add_argument('--rotate-key', action='store_true', help="generar una nueva clave de cifrado y volver a cifrar config.enc con ella")
+    args = parser.parse_args()
+    configure_logging()
+    if args.rotate_key:
+        rotate_encryption_key()
+        raise SystemExit
+    if args.backtest:
+        load_encrypted_config()
+        asyncio.run(run_backtest(args.days, args.sweep, args.output, args.workers))
+        raise SystemExit
+    if args.connect:
+        mode = 'client'
+    elif args.headless:
+        mode = 'headless'
+    else:
+        mode = 'gui'
+    asyncio.run(main(mode, control_url=args.connect, autostart=not args.no_autostart, profile=args.profile, shards=args.shards))
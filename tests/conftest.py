@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import botxi
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for store in (botxi.open_orders, botxi.pending_sells, botxi.daily_trades, botxi.active_symbols, botxi.reactivation_thresholds, botxi.daily_losses, botxi.market_prices, botxi.predicted_prices, botxi.profit_loss):
+        store.clear()
+    for registry in (botxi.exchanges, botxi.connection_status, botxi.exchange_running_status, botxi.request_schedulers):
+        registry.clear()
+    botxi.trade_ledger.load({})
+    monkeypatch.setattr(botxi, 'state_store', None)
+    monkeypatch.setattr(botxi, 'cipher_suite', None)
+    monkeypatch.setattr(botxi, 'actions_feed', botxi.ActionsFeed())
+    yield botxi
+    if botxi.state_store is not None:
+        botxi.state_store.close()
+
+
+def configure(bot, exchanges, **settings):
+    symbols = sorted({symbol for exchange in exchanges.values() for symbol in exchange['symbols']})
+    bot.apply_config_settings(dict({'exchanges': exchanges, 'symbols': [{'symbol': symbol, 'take_profit': 0.01} for symbol in symbols]}, **settings))
+    bot.initialize_structures()
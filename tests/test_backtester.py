@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import configure
+
+EXCHANGES = {'x': {'name': 'binance', 'active': True, 'symbols': ['AAA/USDT']}}
+PARAMS = {'spread': 0.01, 'take_profit': 0.02, 'max_orders': 1, 'order_timeout': 3600, 'max_daily_loss': 1000}
+
+
+class ConstantModel:
+    def predict(self, X):
+        return np.full(len(X), 200.0)
+
+
+def candles():
+    low = [99.5] * 8
+    high = [100.5] * 8
+    low[5] = 98.5
+    high[6] = 101.5
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=8, freq='h'),
+        'open': [100.0] * 8,
+        'high': high,
+        'low': low,
+        'close': [100.0] * 8,
+        'volume': [10.0] * 8
+    })
+
+
+def test_backtester_replays_fixed_candles(bot):
+    configure(bot, EXCHANGES, commission_rate=0.001)
+    backtester = bot.Backtester(candles(), model=ConstantModel())
+
+    result = backtester.run(**PARAMS)
+
+    buy_fee = 99 * 0.001
+    sell_fee = 99 * 1.02 * 0.001
+    realized = 99 * 0.02 - buy_fee - sell_fee
+    assert result['bars'] == 4
+    assert result['signals'] == 4
+    assert result['buys_placed'] == 3
+    assert result['round_trips'] == 1
+    assert result['open_inventory'] == 0
+    assert result['fees'] == pytest.approx(buy_fee + sell_fee)
+    assert result['realized'] == pytest.approx(realized)
+    assert result['equity'] == pytest.approx(realized)
+    assert result['unrealized'] == pytest.approx(0)
+
+
+def test_backtester_keeps_unsold_inventory_when_take_profit_is_never_reached(bot):
+    configure(bot, EXCHANGES, commission_rate=0.001)
+    backtester = bot.Backtester(candles(), model=ConstantModel())
+
+    result = backtester.run(**dict(PARAMS, take_profit=0.05))
+
+    assert result['round_trips'] == 0
+    assert result['buys_placed'] == 1
+    assert result['open_inventory'] == 1
+    assert result['realized'] == pytest.approx(-99 * 0.001)
+    assert result['equity'] == pytest.approx(100 - 99 - 99 * 0.001)
@@ -0,0 +1,86 @@
+import asyncio
+import math
+
+HOUR = 3600 * 1000
+
+
+def candle(hour, close, volume=1.0):
+    return [hour * HOUR, close, close + 1, close - 1, close, volume]
+
+
+def closes(store):
+    return store.array()[:, 4].tolist()
+
+
+def test_ring_buffer_wraps_around_keeping_the_newest_candles(bot):
+    store = bot.CandleStore('x', 'AAA/USDT', capacity=3)
+    store.append([candle(hour, 100 + hour) for hour in range(5)])
+
+    assert store.size == 3
+    assert store.start == 2
+    assert closes(store) == [102, 103, 104]
+    assert store.last_timestamp() == 4 * HOUR
+    assert store.latest()['close'] == 104
+    assert store.row(2)['timestamp'] == 2 * HOUR
+    assert store.row(3) is None
+    assert store.array(limit=2)[:, 4].tolist() == [103, 104]
+
+    store.append([candle(5, 105)])
+
+    assert store.start == 0
+    assert closes(store) == [103, 104, 105]
+    assert store.to_dataframe()['timestamp'].dt.hour.tolist() == [3, 4, 5]
+
+
+def test_duplicate_candles_replace_the_last_row_and_older_ones_are_dropped(bot):
+    store = bot.CandleStore('x', 'AAA/USDT', capacity=3)
+    store.append([candle(0, 100), candle(1, 101), candle(2, 102)])
+
+    store.append([candle(1, 999), candle(2, 103, volume=5.0), candle(0, 999), candle(2, 104, volume=6.0)])
+
+    assert store.size == 3
+    assert closes(store) == [100, 101, 104]
+    assert store.latest()['volume'] == 6.0
+
+    store.append([candle(3, 105), candle(3, 106)])
+
+    assert closes(store) == [101, 104, 106]
+
+
+def test_missing_values_are_stored_as_nan_and_live_prices_merge_into_the_last_candle(bot):
+    store = bot.CandleStore('x', 'AAA/USDT', capacity=3)
+    store.merge_price(100)
+    assert store.size == 0
+
+    store.append([[0, 100, 101, 99, 100, None]])
+    store.merge_price(103)
+    store.merge_price(97)
+
+    latest = store.latest()
+    assert (latest['high'], latest['low'], latest['close']) == (103, 97, 97)
+    assert math.isnan(latest['volume'])
+
+
+class OHLCVExchange:
+    rateLimit = 0
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.calls = []
+
+    async def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=None):
+        self.calls.append((since, limit))
+        return [row for row in self.candles if since is None or row[0] >= since][-(limit or len(self.candles)):]
+
+
+def test_update_fetches_from_the_last_candle_and_refreshes_it(bot):
+    exchange = bot.exchanges['x'] = OHLCVExchange([candle(hour, 100 + hour) for hour in range(4)])
+    store = bot.CandleStore('x', 'AAA/USDT', capacity=3)
+
+    assert asyncio.run(store.update(limit=3)) == 3
+    exchange.candles[-1] = candle(3, 200)
+    exchange.candles.append(candle(4, 201))
+    assert asyncio.run(store.update(limit=3)) == 2
+
+    assert exchange.calls == [(None, 3), (3 * HOUR, None)]
+    assert closes(store) == [102, 200, 201]
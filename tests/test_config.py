@@ -0,0 +1,24 @@
+from conftest import configure
+
+
+def test_migrate_config_converts_per_unit_loss_limits_once(bot):
+    config = {'symbols': [
+        {'symbol': 'AAA/USDT', 'trade_amount': 5, 'max_daily_loss': 0.02},
+        {'symbol': 'BBB/USDT', 'trade_amount': 0.0, 'max_daily_loss': 0.02}
+    ]}
+
+    assert bot.migrate_config(config) is True
+    assert bot.migrate_config(config) is False
+
+    assert config['daily_loss_unit'] == 'quote'
+    assert [symbol['max_daily_loss'] for symbol in config['symbols']] == [0.1, 0.02]
+
+
+def test_saved_config_is_marked_as_quote_currency(bot):
+    configure(bot, {'x': {'name': 'binance', 'active': True, 'symbols': ['AAA/USDT']}})
+    bot.save_encrypted_config()
+
+    config = bot.read_encrypted_config()
+
+    assert config['daily_loss_unit'] == 'quote'
+    assert bot.migrate_config(config) is False
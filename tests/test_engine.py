@@ -0,0 +1,28 @@
+import asyncio
+
+from conftest import configure
+
+EXCHANGES = {'sim': {'name': 'simulated', 'active': True, 'symbols': [], 'simulation': {'latency': 0, 'symbol_count': 2}}}
+
+
+def test_start_bot_after_prepare_reuses_the_connected_exchange(bot):
+    configure(bot, EXCHANGES, state={'enabled': False})
+    engine = bot.TradingEngine()
+
+    async def scenario():
+        await engine.prepare()
+        connected = bot.exchanges['sim']
+        await engine.run_bot()
+        idle = (bot.connection_status['sim'], bot.exchanges['sim'] is connected)
+        engine.start_bot()
+        await asyncio.sleep(0.1)
+        running = (bot.connection_status['sim'], bot.exchanges['sim'] is connected, 'sim' in engine.account_tasks)
+        await engine.stop_bot()
+        return idle, running
+
+    idle, running = asyncio.run(scenario())
+
+    assert idle == ('Connected', True)
+    assert running == ('Connected', True, True)
+    assert bot.connection_status['sim'] == 'Disconnected'
+    assert engine.account_tasks == {}
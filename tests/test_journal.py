@@ -0,0 +1,98 @@
+import csv
+import sqlite3
+import sys
+import time
+
+import pytest
+
+
+def trade(order_id, timestamp='2024-05-01T10:00:00'):
+    return {'timestamp': timestamp, 'symbol': 'AAA/USDT', 'side': 'buy', 'amount': 1.0, 'price': 10.0, 'order_id': order_id}
+
+
+def rows(path):
+    with open(path, newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_csv_writes_full_batches_and_flushes_the_rest_on_close(bot, tmp_path):
+    journal = bot.TradeJournal(batch_size=3, flush_interval=60, fsync='never')
+    path = tmp_path / 'trades_x.csv'
+
+    journal.record(trade('o1'), 'x')
+    journal.record(trade('o2'), 'x')
+    time.sleep(0.1)
+    assert not path.exists()
+
+    journal.record(trade('o3'), 'x')
+    wait_for(lambda: path.exists() and len(rows(path)) == 3)
+
+    journal.record(trade('o4'), 'x')
+    journal.close()
+
+    assert [row['order_id'] for row in rows(path)] == ['o1', 'o2', 'o3', 'o4']
+
+
+def test_flush_interval_writes_a_partial_batch(bot, tmp_path):
+    journal = bot.TradeJournal(batch_size=100, flush_interval=0.05, fsync='never')
+    path = tmp_path / 'trades_x.csv'
+
+    journal.record(trade('o1'), 'x')
+    wait_for(lambda: path.exists() and len(rows(path)) == 1)
+    journal.close()
+
+
+def test_daily_rotation_splits_files_by_trade_day(bot, tmp_path):
+    journal = bot.TradeJournal(fsync='never', rotation='daily')
+    journal.record(trade('o1', '2024-05-01T23:59:59'), 'x')
+    journal.record(trade('o2', '2024-05-02T00:00:01'), 'x')
+    journal.record(trade('o3', '2024-05-02T00:00:02'), 'y')
+    journal.close()
+
+    assert [row['order_id'] for row in rows(tmp_path / 'trades_x_2024-05-01.csv')] == ['o1']
+    assert [row['order_id'] for row in rows(tmp_path / 'trades_x_2024-05-02.csv')] == ['o2']
+    assert [row['order_id'] for row in rows(tmp_path / 'trades_y_2024-05-02.csv')] == ['o3']
+
+
+def test_sqlite_backend_rotates_databases_by_day(bot, tmp_path):
+    journal = bot.TradeJournal(backend='sqlite', rotation='daily')
+    journal.record(trade('o1', '2024-05-01T12:00:00'), 'x')
+    journal.record(trade('o2', '2024-05-01T13:00:00'), 'y')
+    journal.record(trade('o3', '2024-05-02T12:00:00'), 'x')
+    journal.close()
+
+    with sqlite3.connect(tmp_path / 'trades_2024-05-01.sqlite') as connection:
+        assert connection.execute("SELECT exchange, order_id FROM trades ORDER BY order_id").fetchall() == [('x', 'o1'), ('y', 'o2')]
+    with sqlite3.connect(tmp_path / 'trades_2024-05-02.sqlite') as connection:
+        assert connection.execute("SELECT exchange, order_id FROM trades").fetchall() == [('x', 'o3')]
+
+
+def test_parquet_backend_writes_one_part_per_batch(bot, tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    journal = bot.TradeJournal(backend='parquet', batch_size=2, flush_interval=60)
+    for order_id in ('o1', 'o2', 'o3'):
+        journal.record(trade(order_id), 'x')
+    journal.close()
+
+    directory = tmp_path / 'trades_x.parquet'
+    assert len(list(directory.iterdir())) == 2
+    assert sorted(parquet.read_table(directory).column('order_id').to_pylist()) == ['o1', 'o2', 'o3']
+
+
+def test_unavailable_backend_falls_back_to_csv(bot, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    journal = bot.TradeJournal(backend='parquet', fsync='never')
+
+    assert isinstance(journal.backend, bot.CSVJournalBackend)
+
+    journal.record(trade('o1'), 'x')
+    journal.close()
+
+    assert [row['order_id'] for row in rows(tmp_path / 'trades_x.csv')] == ['o1']
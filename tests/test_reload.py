@@ -0,0 +1,78 @@
+import asyncio
+import copy
+
+import joblib
+import numpy as np
+
+SYMBOL = {'spread': 0.01, 'take_profit': 0.01, 'trade_amount': 1, 'max_orders': 1, 'order_timeout': 60, 'max_daily_loss': 1000}
+SIMULATION = {'latency': 0, 'symbol_count': 2, 'tick_interval': 0.01, 'seed': 1}
+CONFIG = {
+    'exchanges': {
+        'a': {'name': 'simulated', 'active': True, 'symbols': ['SIM0000/USDT'], 'poll_interval': 0.05, 'simulation': SIMULATION},
+        'b': {'name': 'simulated', 'active': False, 'symbols': ['SIM0001/USDT'], 'poll_interval': 0.05, 'simulation': SIMULATION}
+    },
+    'symbols': [dict(SYMBOL, symbol='SIM0000/USDT'), dict(SYMBOL, symbol='SIM0001/USDT')],
+    'state': {'enabled': False}
+}
+
+
+class ConstantModel:
+    def predict(self, X):
+        return np.zeros(len(X))
+
+
+async def wait_for(condition, timeout=10):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_apply_config_updates_the_running_engine_in_place(bot, monkeypatch):
+    monkeypatch.setattr(bot, 'model_registry', None)
+    monkeypatch.setattr(bot, 'trade_journal', None)
+    for exchange_id, symbol in (('a', 'SIM0000/USDT'), ('b', 'SIM0001/USDT')):
+        joblib.dump(ConstantModel(), bot.get_model_filename(exchange_id, symbol))
+    bot.apply_config_settings(copy.deepcopy(CONFIG))
+    bot.initialize_structures()
+    engine = bot.TradingEngine()
+
+    async def scenario():
+        await engine.prepare()
+        engine.start_bot()
+        await wait_for(lambda: 'SIM0000/USDT' in engine.symbol_tasks.get('a', {}))
+        exchange = bot.exchanges['a']
+        task = engine.symbol_tasks['a']['SIM0000/USDT']
+
+        config = copy.deepcopy(CONFIG)
+        config['symbols'][0]['spread'] = 0.02
+        config['exchanges']['b']['active'] = True
+        changes = await engine.reload_config(config)
+        await wait_for(lambda: 'SIM0001/USDT' in engine.symbol_tasks.get('b', {}))
+        first = (changes, bot.get_symbol_settings('SIM0000/USDT')['spread'], bot.exchanges['a'] is exchange,
+                 engine.symbol_tasks['a'].get('SIM0000/USDT') is task, task.done())
+
+        config['exchanges']['a']['active'] = False
+        changes = await engine.reload_config(config)
+        second = (changes, sorted(engine.running_accounts), bot.connection_status['a'], 'a' in engine.account_tasks)
+        await engine.stop_bot()
+        return first, second
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        if bot.trade_journal is not None:
+            bot.trade_journal.close()
+
+    changes, spread, same_exchange, same_task, task_done = first
+    assert changes['accounts_started'] == ['b']
+    assert changes['accounts_restarted'] == [] and changes['accounts_stopped'] == []
+    assert changes['symbols_started'] == {} and changes['symbols_stopped'] == {}
+    assert spread == 0.02
+    assert same_exchange and same_task and not task_done
+
+    changes, running, connection, account_task = second
+    assert changes['accounts_stopped'] == ['a']
+    assert running == ['b']
+    assert connection == 'Disconnected'
+    assert not account_task
@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import ccxt
+import pytest
+
+
+class FakeClock:
+    perf_counter = staticmethod(time.perf_counter)
+    time = staticmethod(time.time)
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeExchange:
+    rateLimit = 0
+
+    def __init__(self):
+        self.calls = []
+        self.cost = 1
+
+    def calculate_rate_limiter_cost(self, api, method, path, params, config={}):
+        return self.cost
+
+    async def fetch_open_orders(self, symbol=None):
+        self.calls.append(('fetch_open_orders', symbol))
+        self.calculate_rate_limiter_cost('private', 'GET', 'openOrders', {})
+        return []
+
+    async def fetch_order(self, order_id, symbol=None):
+        self.calls.append(('fetch_order', order_id))
+        return {'id': order_id}
+
+    async def cancel_order(self, order_id, symbol=None):
+        self.calls.append(('cancel_order', order_id))
+        return {'id': order_id}
+
+    async def fetch_tickers(self, symbols=None):
+        self.calls.append(('fetch_tickers', None))
+        raise ccxt.RateLimitExceeded('429')
+
+
+@pytest.fixture
+def clock(bot, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(bot, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def exchange(bot):
+    exchange = bot.exchanges['x'] = bot.track_request_costs(FakeExchange())
+    return exchange
+
+
+def test_refill_accrues_at_the_rate_and_is_capped_at_the_burst(bot, clock, exchange):
+    scheduler = bot.RequestScheduler('x', rate=2, burst=4)
+    scheduler.tokens = 0
+
+    clock.advance(1)
+    scheduler.refill()
+    assert scheduler.tokens == 2
+
+    clock.advance(10)
+    scheduler.refill()
+    assert scheduler.tokens == 4
+
+
+def test_waiters_are_served_by_priority_not_arrival(bot, clock, exchange):
+    scheduler = bot.RequestScheduler('x', rate=10, burst=1, weights={'fetch_open_orders': 1})
+    scheduler.tokens = 0
+
+    async def scenario():
+        calls = [
+            asyncio.create_task(scheduler.call('market_data', 'fetch_open_orders', 'AAA/USDT')),
+            asyncio.create_task(scheduler.call('status', 'fetch_order', 'o1')),
+            asyncio.create_task(scheduler.call('cancel', 'cancel_order', 'o2'))
+        ]
+        await asyncio.sleep(0)
+        depth = dict(scheduler.depth)
+        while not all(call.done() for call in calls):
+            clock.advance(0.1)
+            await asyncio.sleep(0.11)
+        return depth
+
+    depth = asyncio.run(scenario())
+
+    assert depth == {'cancel': 1, 'order': 0, 'status': 1, 'market_data': 1}
+    assert [name for name, _ in exchange.calls] == ['cancel_order', 'fetch_order', 'fetch_open_orders']
+    assert scheduler.completed == {'cancel': 1, 'order': 0, 'status': 1, 'market_data': 1}
+
+
+def test_ccxt_cost_shortfall_is_charged_and_learned_per_symbol_scope(bot, clock, exchange):
+    scheduler = bot.RequestScheduler('x', rate=1, burst=20)
+    exchange.cost = 16
+
+    asyncio.run(scheduler.call('status', 'fetch_open_orders'))
+
+    assert scheduler.tokens == 20 - 16
+    assert scheduler.cost('fetch_open_orders', ()) == 16
+    assert scheduler.cost('fetch_open_orders', ('AAA/USDT',)) == bot.RequestScheduler.default_weights['fetch_open_orders']
+
+    clock.advance(12)
+    asyncio.run(scheduler.call('status', 'fetch_open_orders'))
+
+    assert scheduler.tokens == 0
+
+
+def test_configured_weights_override_learned_costs(bot, clock, exchange):
+    scheduler = bot.RequestScheduler('x', rate=1, burst=20, weights={'fetch_open_orders': 2})
+    exchange.cost = 16
+
+    asyncio.run(scheduler.call('status', 'fetch_open_orders'))
+
+    assert scheduler.cost('fetch_open_orders', ()) == 2
+
+
+def test_rate_limit_error_drains_the_bucket_for_the_penalty(bot, clock, exchange):
+    scheduler = bot.RequestScheduler('x', rate=2, burst=10, penalty=5)
+
+    with pytest.raises(ccxt.RateLimitExceeded):
+        asyncio.run(scheduler.call('market_data', 'fetch_tickers'))
+
+    assert scheduler.rate_limited == 1
+    assert scheduler.tokens == -10
+    clock.advance(5)
+    scheduler.refill()
+    assert scheduler.tokens == 0
@@ -0,0 +1,128 @@
+import json
+import os
+from datetime import datetime
+
+from conftest import configure
+
+EXCHANGES = {'x': {'name': 'binance', 'active': True, 'symbols': ['AAA/USDT', 'BBB/USDT']}}
+
+
+def order(order_id, side, symbol, price=1.0, amount=1):
+    return {'id': order_id, 'side': side, 'symbol': symbol, 'price': price, 'amount': amount, 'status': 'open'}
+
+
+def fill(bot, order_id, side, amount, price, symbol='AAA/USDT'):
+    return bot.record_order_fill('x', symbol, {'id': order_id, 'side': side, 'filled': amount, 'amount': amount, 'price': price})
+
+
+def reset(bot):
+    for store in (bot.open_orders, bot.pending_sells, bot.daily_trades, bot.active_symbols, bot.reactivation_thresholds, bot.daily_losses):
+        store.clear()
+    bot.trade_ledger.load({})
+    bot.initialize_structures()
+
+
+def test_restore_replays_snapshot_and_wal_tail(bot, tmp_path):
+    configure(bot, EXCHANGES, state={'directory': str(tmp_path / 'state')})
+    store = bot.get_state_store()
+    store.restore()
+    fill(bot, 'b1', 'buy', 2, 10)
+    bot.open_orders['x']['BBB/USDT'].append(order('o1', 'buy', 'BBB/USDT'))
+    store.capture()
+    store.snapshot()
+    fill(bot, 's1', 'sell', 2, 8)
+    bot.pending_sells['x']['AAA/USDT'].append(order('o2', 'sell', 'AAA/USDT', 12.0))
+    bot.active_symbols['x']['AAA/USDT'] = False
+    bot.reactivation_thresholds['x']['AAA/USDT'] = 8.4
+    store.capture()
+    store.close()
+
+    reset(bot)
+    bot.state_store = None
+    bot.get_state_store().restore()
+
+    assert bot.trade_ledger.realized_profit_loss('x', 'AAA/USDT') == -4
+    assert list(bot.trade_ledger.lots[('x', 'AAA/USDT')]) == []
+    assert bot.daily_losses['x']['AAA/USDT'] == 4
+    assert [o['id'] for o in bot.open_orders['x']['BBB/USDT']] == ['o1']
+    assert [o['id'] for o in bot.pending_sells['x']['AAA/USDT']] == ['o2']
+    assert bot.active_symbols['x']['AAA/USDT'] is False
+    assert bot.reactivation_thresholds['x']['AAA/USDT'] == 8.4
+    assert [trade['order_id'] for trade in bot.daily_trades['x']['AAA/USDT']] == ['s1']
+
+
+def test_torn_wal_line_and_covered_records_are_skipped(bot, tmp_path):
+    directory = tmp_path / 'state'
+    directory.mkdir()
+    today = datetime.now().date().isoformat()
+    ledger = bot.TradeLedger()
+    ledger.record_fill('x', 'AAA/USDT', 'buy', 1, 10, 'b1', day=today)
+    (directory / 'botxi.snapshot.json').write_text(json.dumps(bot.state_document({}, {}, ledger.export()) | {'sequence': 2}))
+    records = [
+        [1, 'fill', 'x', 'AAA/USDT', 'buy', 1, 10, 'old', None, today],
+        [2, 'fill', 'x', 'AAA/USDT', 'buy', 1, 10, 'old2', None, today],
+        [3, 'fill', 'x', 'AAA/USDT', 'sell', 1, 7, 's1', None, today],
+        [4, 'fill', 'x', 'AAA/USDT', 'sell', 1, 7, 's1', None, today]
+    ]
+    (directory / 'botxi.wal').write_text(''.join(json.dumps(record) + '\n' for record in records) + '[5, "fill", "x", "AAA/US')
+
+    document = bot.read_state_file(str(directory), 'botxi')
+
+    assert document['sequence'] == 4
+    assert document['replayed'] == 2
+    assert set(document['ledger'].fills) == {'b1', 's1'}
+    assert document['ledger'].daily_loss('x', 'AAA/USDT') == 3
+
+
+def test_partition_state_follows_pairs_to_their_new_shard(bot, tmp_path):
+    directory = tmp_path / 'state'
+    configure(bot, EXCHANGES, state={'directory': str(directory)})
+    for name, symbol in (('shard0', 'AAA/USDT'), ('shard1', 'BBB/USDT')):
+        ledger = bot.TradeLedger()
+        ledger.record_fill('x', symbol, 'buy', 1, 10, f"b-{symbol}")
+        ledger.record_fill('x', symbol, 'sell', 1, 5, f"s-{symbol}")
+        state = {'open': [], 'sell': [], 'active': False, 'threshold': 5.25}
+        os.makedirs(directory, exist_ok=True)
+        bot.write_state_snapshot(bot.state_paths(str(directory), name)[0], 0, bot.state_document({('x', symbol): state}, {}, ledger.export()))
+
+    bot.partition_state({('x', 'AAA/USDT'): 1, ('x', 'BBB/USDT'): 1}, 2)
+
+    assert sorted(os.listdir(directory)) == ['shard0.snapshot.json', 'shard1.snapshot.json']
+    empty = bot.read_state_file(str(directory), 'shard0')
+    moved = bot.read_state_file(str(directory), 'shard1')
+    assert empty['symbols'] == {} and empty['ledger'].pairs() == set()
+    assert set(moved['symbols']) == {('x', 'AAA/USDT'), ('x', 'BBB/USDT')}
+    assert moved['ledger'].daily_loss('x', 'AAA/USDT') == 5
+    assert moved['ledger'].daily_loss('x', 'BBB/USDT') == 5
+
+
+def test_single_process_collects_shard_files(bot, tmp_path):
+    directory = tmp_path / 'state'
+    configure(bot, EXCHANGES, state={'directory': str(directory)})
+    os.makedirs(directory)
+    state = {'open': [], 'sell': [], 'active': False, 'threshold': 2.0}
+    bot.write_state_snapshot(bot.state_paths(str(directory), 'shard1')[0], 0, bot.state_document({('x', 'BBB/USDT'): state}, {}, bot.TradeLedger().export()))
+
+    store = bot.get_state_store()
+    store.restore()
+    store.close()
+
+    assert bot.active_symbols['x']['BBB/USDT'] is False
+    assert sorted(os.listdir(directory)) == ['botxi.snapshot.json', 'botxi.wal']
+
+
+def test_snapshot_prunes_old_fills_but_keeps_tracked_orders(bot, tmp_path):
+    configure(bot, EXCHANGES, state={'directory': str(tmp_path / 'state'), 'fill_retention_days': 2})
+    bot.trade_ledger.record_fill('x', 'AAA/USDT', 'buy', 1, 10, 'old', day='2000-01-01')
+    bot.trade_ledger.record_fill('x', 'AAA/USDT', 'buy', 1, 10, 'tracked', day='2000-01-01')
+    bot.trade_ledger.record_fill('x', 'AAA/USDT', 'buy', 1, 10, 'recent')
+    bot.open_orders['x']['AAA/USDT'].append(order('tracked', 'buy', 'AAA/USDT'))
+
+    store = bot.get_state_store()
+    store.snapshot()
+    store.close()
+
+    assert set(bot.trade_ledger.fills) == {'tracked', 'recent'}
+    assert len(bot.trade_ledger.lots[('x', 'AAA/USDT')]) == 3
+    snapshot = json.loads((tmp_path / 'state' / 'botxi.snapshot.json').read_text())
+    assert {fill['order_id'] for fill in snapshot['ledger']['fills']} == {'tracked', 'recent'}
@@ -0,0 +1,60 @@
+import asyncio
+
+from conftest import configure
+
+EXCHANGES = {'l': {'name': 'local', 'active': True, 'symbols': ['AAA/USDT'], 'streaming': True}}
+
+
+def streaming_hub(bot, monkeypatch):
+    configure(bot, EXCHANGES)
+    exchange = bot.LocalStreamExchange()
+    monkeypatch.setitem(bot.exchanges, 'l', exchange)
+    return exchange, bot.MarketDataHub('l', interval=0.01, streaming=True)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0.02)
+
+
+def test_streamed_ticker_reaches_prices_and_subscribers(bot, monkeypatch):
+    exchange, hub = streaming_hub(bot, monkeypatch)
+
+    async def scenario():
+        subscription = hub.subscribe('AAA/USDT')
+        await settle()
+        exchange.push_ticker('AAA/USDT', {'last': 101.5})
+        snapshot = await asyncio.wait_for(subscription.queue.get(), 1)
+        await hub.stop()
+        return snapshot
+
+    snapshot = asyncio.run(scenario())
+
+    assert snapshot['price'] == 101.5
+    assert bot.market_prices['l']['AAA/USDT'] == 101.5
+    assert hub.last_price('AAA/USDT') == 101.5
+
+
+def test_streamed_orders_are_evicted_once_finished_and_untracked(bot, monkeypatch):
+    exchange, hub = streaming_hub(bot, monkeypatch)
+    bot.open_orders['l']['AAA/USDT'].append({'id': 'tracked', 'side': 'buy', 'symbol': 'AAA/USDT', 'price': 1.0, 'amount': 1})
+
+    async def scenario():
+        hub.subscribe('AAA/USDT')
+        await settle()
+        exchange.push_order({'id': 'tracked', 'status': 'closed', 'symbol': 'AAA/USDT'})
+        exchange.push_order({'id': 'foreign', 'status': 'canceled', 'symbol': 'AAA/USDT'})
+        exchange.push_order({'id': 'manual', 'status': 'open', 'symbol': 'AAA/USDT'})
+        await settle()
+        seen = {order_id: hub.streamed_order(order_id) is not None for order_id in ('tracked', 'foreign', 'manual')}
+        bot.open_orders['l']['AAA/USDT'].clear()
+        await settle()
+        remaining = set(hub.orders)
+        await hub.stop()
+        return seen, remaining
+
+    seen, remaining = asyncio.run(scenario())
+
+    assert seen == {'tracked': True, 'foreign': False, 'manual': True}
+    assert remaining == {'manual'}
+    assert hub.orders == {}